@@ -1,10 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-from irrigation_dsl import executar_sistema_irrigacao
+from irrigation_dsl import executar_programa_analisado
+from frontend_incremental import FrontendIncremental
 import sys
 from io import StringIO
 from mqtt_handler import MQTTHandler
-import json
+from atuadores import CamadaAtuadores
 
 class IrrigationGUI:
     def __init__(self, root):
@@ -12,8 +13,14 @@ class IrrigationGUI:
         self.root.title("Sistema de Irrigação DSL com MQTT")
         self.root.geometry("1000x800")
         
+        # Front-end incremental do editor e análise adiada durante a digitação
+        self.frontend = FrontendIncremental()
+        self.analise_agendada = None
+        
         # Inicializar MQTT
         self.mqtt_handler = MQTTHandler()
+        # Comandos só são publicados quando o estado do dispositivo muda
+        self.atuadores = CamadaAtuadores(self.mqtt_handler)
         self.registrar_callbacks_mqtt()
         
         # Configurar o estilo
@@ -42,11 +49,11 @@ class IrrigationGUI:
         
         # Aplicar regras automaticamente
         if dados['valor'] < 30:
-            self.mqtt_handler.client.publish("bomba", json.dumps({"bomba": "ligada"}))
-            self.output_text.insert(tk.END, "⚠️ Umidade baixa -> Bomba LIGADA\n")
+            if self.atuadores.comandar("bomba", True, {"bomba": "ligada"}):
+                self.output_text.insert(tk.END, "⚠️ Umidade baixa -> Bomba LIGADA\n")
         else:
-            self.mqtt_handler.client.publish("bomba", json.dumps({"bomba": "desligada"}))
-            self.output_text.insert(tk.END, "⚠️ Umidade adequada -> Bomba DESLIGADA\n")
+            if self.atuadores.comandar("bomba", False, {"bomba": "desligada"}):
+                self.output_text.insert(tk.END, "⚠️ Umidade adequada -> Bomba DESLIGADA\n")
         self.output_text.see(tk.END)
 
     def atualizar_temperatura(self, dados):
@@ -57,11 +64,11 @@ class IrrigationGUI:
         
         # Aplicar regras automaticamente
         if dados['valor'] > 35:
-            self.mqtt_handler.client.publish("ventilador", json.dumps({"ventilador": "ligado"}))
-            self.output_text.insert(tk.END, "⚠️ Temperatura alta -> Ventilador LIGADO\n")
+            if self.atuadores.comandar("ventilador", True, {"ventilador": "ligado"}):
+                self.output_text.insert(tk.END, "⚠️ Temperatura alta -> Ventilador LIGADO\n")
         else:
-            self.mqtt_handler.client.publish("ventilador", json.dumps({"ventilador": "desligado"}))
-            self.output_text.insert(tk.END, "⚠️ Temperatura adequada -> Ventilador DESLIGADO\n")
+            if self.atuadores.comandar("ventilador", False, {"ventilador": "desligado"}):
+                self.output_text.insert(tk.END, "⚠️ Temperatura adequada -> Ventilador DESLIGADO\n")
         self.output_text.see(tk.END)
 
     def atualizar_bomba(self, dados):
@@ -93,6 +100,10 @@ class IrrigationGUI:
         
         self.program_text = scrolledtext.ScrolledText(main_frame, width=70, height=15)
         self.program_text.grid(row=2, column=0, columnspan=2, pady=5)
+        self.program_text.bind("<KeyRelease>", self.agendar_analise)
+        
+        self.analise_label = ttk.Label(main_frame, text="")
+        self.analise_label.grid(row=1, column=1, sticky=tk.E)
         
         # Botões
         button_frame = ttk.Frame(main_frame)
@@ -129,47 +140,28 @@ class IrrigationGUI:
             messagebox.showerror("Erro", "O programa está vazio!")
             return
             
-        # Verificar estrutura básica
-        linhas = programa.split('\n')
-        encontrou_sensor = False
-        encontrou_regra = False
-        
-        for i, linha in enumerate(linhas, 1):
-            linha = linha.strip()
-            if not linha or linha.startswith('#'):
-                continue
-                
-            # Verificar declaração de sensor
-            if linha.startswith('INSERIR SENSOR'):
-                encontrou_sensor = True
-            # Verificar regras
-            elif linha.startswith('SE SENSOR'):
-                if not encontrou_sensor:
-                    messagebox.showerror("Erro de Sintaxe", 
-                        "Erro na linha {}: Você deve declarar os sensores (INSERIR SENSOR) antes de usar regras SE!\n\n"
-                        "Exemplo de estrutura correta:\n"
-                        "INSERIR SENSOR \"Nome do Sensor\" ID 1\n"
-                        "SE SENSOR 1 < 30 ENTAO LIGAR \"Dispositivo\"".format(i))
-                    return
-                encontrou_regra = True
-            # Verificar se a linha segue algum padrão conhecido
-            elif not (linha.startswith('ESPERAR') or linha.startswith('INSERIR') or linha.startswith('SE')):
-                messagebox.showerror("Erro de Sintaxe", 
-                    "Erro na linha {}: Comando não reconhecido: '{}'\n\n"
-                    "Comandos válidos:\n"
-                    "- INSERIR SENSOR \"Nome\" ID número\n"
-                    "- SE SENSOR id operador valor ENTAO LIGAR|DESLIGAR \"Dispositivo\"\n"
-                    "- ESPERAR segundos".format(i, linha))
-                return
+        # Análise incremental: só as linhas editadas desde a última análise são
+        # relexadas e reanalisadas
+        resultado = self.frontend.atualizar(programa)
+        if resultado.erros_sintaticos:
+            linha, mensagem = resultado.erros_sintaticos[0]
+            messagebox.showerror("Erro de Sintaxe", 
+                "Erro na linha {}: {}\n\n"
+                "Comandos válidos:\n"
+                "- INSERIR SENSOR \"Nome\" ID número\n"
+                "- SE SENSOR id operador valor ENTAO LIGAR|DESLIGAR \"Dispositivo\"\n"
+                "- ESPERAR segundos".format(linha, mensagem))
+            return
         
-        if not encontrou_sensor:
+        tipos = {no['tipo'] for no in resultado.ast}
+        if 'declaracao_sensor' not in tipos:
             messagebox.showerror("Erro de Estrutura", 
                 "O programa deve conter pelo menos uma declaração de sensor (INSERIR SENSOR)!\n\n"
                 "Exemplo:\n"
                 "INSERIR SENSOR \"Umidade Solo\" ID 1")
             return
             
-        if not encontrou_regra:
+        if 'regra' not in tipos:
             messagebox.showerror("Erro de Estrutura", 
                 "O programa deve conter pelo menos uma regra (SE)!\n\n"
                 "Exemplo:\n"
@@ -177,8 +169,8 @@ class IrrigationGUI:
             return
         
         try:
-            # Executar o programa
-            executar_sistema_irrigacao(programa)
+            # Executar o programa já analisado
+            executar_programa_analisado(resultado.ast, not resultado.erros_semanticos, resultado.erros_semanticos)
             
             # Atualizar a área de saída
             output = self.output_buffer.getvalue()
@@ -206,6 +198,24 @@ class IrrigationGUI:
                     "2. Defina as regras (SE)\n"
                     "3. Use ESPERAR para esperas".format(erro))
 
+    def agendar_analise(self, event=None):
+        """Reanalisa o programa pouco depois que o usuário para de digitar"""
+        if self.analise_agendada is not None:
+            self.root.after_cancel(self.analise_agendada)
+        self.analise_agendada = self.root.after(300, self.analisar_edicao)
+
+    def analisar_edicao(self):
+        self.analise_agendada = None
+        resultado = self.frontend.atualizar(self.program_text.get(1.0, tk.END).strip())
+        if resultado.erros_sintaticos:
+            linha, mensagem = resultado.erros_sintaticos[0]
+            self.analise_label.config(text=f"❌ Linha {linha}: {mensagem}")
+        elif resultado.erros_semanticos:
+            erro = resultado.erros_semanticos[0]
+            self.analise_label.config(text=f"⚠️ Linha {erro.linha}: {erro.mensagem}")
+        else:
+            self.analise_label.config(text="✅ Programa válido")
+
     def clear_program(self):
         """Limpa apenas a área do programa"""
         self.program_text.delete(1.0, tk.END)
@@ -248,6 +258,7 @@ ESPERAR 5'''
         
         self.program_text.delete(1.0, tk.END)
         self.program_text.insert(1.0, exemplo)
+        self.agendar_analise()
 
     def __del__(self):
         # Restaurar a saída padrão
@@ -0,0 +1,88 @@
+"""
+Camada de estado dos atuadores (bombas, ventiladores...).
+
+Guarda o último estado comandado de cada dispositivo e só publica o comando
+no MQTT quando o estado muda. Opcionalmente o estado é republicado depois de
+`intervalo_renovacao` segundos sem publicação, para ressincronizar um relé
+que tenha perdido uma mensagem.
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+
+class CamadaAtuadores:
+    """
+    Publica comandos por meio de `mqtt_handler.publicar` apenas nas transições.
+    Contadores: `publicados` (transições), `renovacoes` (republicações pelo
+    intervalo) e `suprimidos` (comandos repetidos que não foram enviados).
+    """
+
+    def __init__(self, mqtt_handler, intervalo_renovacao: Optional[float] = None, relogio=time):
+        self.mqtt_handler = mqtt_handler
+        self.intervalo_renovacao = intervalo_renovacao
+        # Relógio com monotonic_ns() (o módulo time ou um RelogioVirtual)
+        self.relogio = relogio
+        # A publicação acontece com a trava: comandar e renovar (em threads
+        # diferentes) não podem chegar ao broker em ordem inversa
+        self.trava = threading.Lock()
+        # topico -> [ligado, dados publicados, instante da publicação em ns]
+        self.estados: Dict[str, list] = {}
+        self.publicados = 0
+        self.renovacoes = 0
+        self.suprimidos = 0
+
+    def comandar(self, topico: str, ligado: bool, dados) -> bool:
+        """Publica `dados` se o estado do dispositivo mudou; retorna se publicou"""
+        agora = self.relogio.monotonic_ns()
+        with self.trava:
+            estado = self.estados.get(topico)
+            if estado is not None and estado[0] == ligado:
+                if not self._vencido(estado, agora):
+                    self.suprimidos += 1
+                    return False
+                self.renovacoes += 1
+            else:
+                self.publicados += 1
+            self.estados[topico] = [ligado, dados, agora]
+            self.mqtt_handler.publicar(topico, dados)
+        return True
+
+    def renovar(self) -> int:
+        """
+        Republica os estados sem publicação há mais de `intervalo_renovacao`
+        segundos (para ser chamado periodicamente). Retorna quantos foram enviados.
+        """
+        if self.intervalo_renovacao is None:
+            return 0
+        agora = self.relogio.monotonic_ns()
+        with self.trava:
+            vencidos = [(topico, estado) for topico, estado in self.estados.items() if self._vencido(estado, agora)]
+            for topico, estado in vencidos:
+                estado[2] = agora
+                self.mqtt_handler.publicar(topico, estado[1])
+            self.renovacoes += len(vencidos)
+        return len(vencidos)
+
+    def esquecer(self, topico: Optional[str] = None):
+        """Descarta o estado conhecido (ex.: após reconectar): o próximo comando é publicado"""
+        with self.trava:
+            if topico is None:
+                self.estados.clear()
+            else:
+                self.estados.pop(topico, None)
+
+    def estado(self, topico: str) -> Optional[bool]:
+        estado = self.estados.get(topico)
+        return estado[0] if estado is not None else None
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self.trava:
+            return {
+                'publicados': self.publicados,
+                'renovacoes': self.renovacoes,
+                'suprimidos': self.suprimidos,
+            }
+
+    def _vencido(self, estado: list, agora: int) -> bool:
+        return self.intervalo_renovacao is not None and agora - estado[2] >= self.intervalo_renovacao * 1e9
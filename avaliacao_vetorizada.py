@@ -0,0 +1,136 @@
+"""
+Avaliação vetorizada de um programa sobre séries de leituras (NumPy).
+
+Para perguntas do tipo "quantas horas de bomba estas regras teriam causado
+com 10 milhões de leituras históricas", cada cadeia de condições é avaliada
+de uma vez sobre o array de leituras do sensor (máscaras booleanas) e o
+estado de cada dispositivo vem da última regra verdadeira em ordem de
+programa; nos instantes sem nenhuma regra verdadeira, o dispositivo mantém o
+estado anterior. O resultado é o mesmo de MaquinaVirtual.executar (ou da
+execução por ciclos) aplicada a cada instante com as leituras daquele instante.
+
+As leituras de cada sensor são arrays de mesmo tamanho, um valor por instante;
+NaN significa "sem leitura ainda" e faz as regras do sensor serem falsas.
+"""
+from typing import Dict, Iterable, List, Optional
+
+from compilador import GrupoRegras, RegraCompilada, compilar_programa, OP_REGRA
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional para o resto do sistema
+    np = None
+
+
+def _exigir_numpy():
+    if np is None:
+        raise ImportError("A avaliação vetorizada requer NumPy (pip install numpy)")
+
+
+# Mesma semântica de compilador.COMPARADORES, aplicada a arrays
+COMPARADORES_VETORIAIS = {
+    '<': 'less',
+    '>': 'greater',
+    '<=': 'less_equal',
+    '>=': 'greater_equal',
+    '==': 'equal',
+}
+
+
+def mascara_condicoes(valores, condicoes: List) -> 'np.ndarray':
+    """
+    Cadeia de condições avaliada sobre todo o array, com os operadores lógicos
+    aplicados da esquerda para a direita (como MaquinaVirtual.avaliar_condicoes).
+    """
+    operador, limite = condicoes[0]
+    mascara = getattr(np, COMPARADORES_VETORIAIS[operador])(valores, limite)
+    for op_logico, operador, limite in condicoes[1:]:
+        proxima = getattr(np, COMPARADORES_VETORIAIS[operador])(valores, limite)
+        if op_logico == 'PALAVRA_AND':
+            mascara &= proxima
+        else:  # OR
+            mascara |= proxima
+    return mascara
+
+
+def preencher_adiante(valores) -> 'np.ndarray':
+    """Repete a última leitura válida nas posições NaN seguintes"""
+    _exigir_numpy()
+    valores = np.asarray(valores, dtype=np.float64)
+    posicoes = np.where(np.isnan(valores), 0, np.arange(len(valores)))
+    np.maximum.accumulate(posicoes, out=posicoes)
+    return valores[posicoes]
+
+
+def alinhar_leituras(sensores, valores) -> Dict[int, 'np.ndarray']:
+    """
+    Converte um fluxo de leituras (sensor_id[i], valor[i]), uma por instante,
+    em um array por sensor com o último valor conhecido em cada instante.
+    """
+    _exigir_numpy()
+    sensores = np.asarray(sensores)
+    valores = np.asarray(valores, dtype=np.float64)
+    alinhadas = {}
+    for id_sensor in np.unique(sensores):
+        serie = np.full(len(valores), np.nan)
+        proprias = sensores == id_sensor
+        serie[proprias] = valores[proprias]
+        alinhadas[int(id_sensor)] = preencher_adiante(serie)
+    return alinhadas
+
+
+def avaliar_regras(regras: Iterable[RegraCompilada], leituras: Dict[int, object],
+                   estado_inicial: Optional[Dict[str, bool]] = None) -> Dict[str, 'np.ndarray']:
+    """
+    Estado (array booleano por instante) de cada dispositivo comandado pelas
+    regras, em ordem de programa. Cadeias repetidas no mesmo sensor são
+    avaliadas uma vez só.
+    """
+    _exigir_numpy()
+    series = {id_sensor: np.asarray(valores, dtype=np.float64) for id_sensor, valores in leituras.items()}
+    tamanhos = {len(valores) for valores in series.values()}
+    if len(tamanhos) > 1:
+        raise ValueError("As séries de leituras devem ter o mesmo tamanho")
+    tamanho = tamanhos.pop() if tamanhos else 0
+    estado_inicial = estado_inicial or {}
+
+    mascaras = {}
+    # Por dispositivo: -1 = nenhuma regra verdadeira, 0 = desligar, 1 = ligar
+    decisoes: Dict[str, 'np.ndarray'] = {}
+    for regra in regras:
+        decisao = decisoes.get(regra.alvo)
+        if decisao is None:
+            decisao = decisoes[regra.alvo] = np.full(tamanho, -1, dtype=np.int8)
+        valores = series.get(regra.sensor_id)
+        if valores is None:
+            continue  # sensor sem leituras: a regra nunca é avaliada
+        membros = regra.regras if isinstance(regra, GrupoRegras) else [regra]
+        for membro in membros:
+            chave = (regra.sensor_id, tuple(membro.no['condicoes']))
+            mascara = mascaras.get(chave)
+            if mascara is None:
+                mascara = mascaras[chave] = mascara_condicoes(valores, membro.no['condicoes'])
+            # A última regra verdadeira em ordem de programa prevalece
+            decisao[mascara] = regra.ligar
+
+    estados = {}
+    for alvo, decisao in decisoes.items():
+        # Sem regra verdadeira, vale a última decisão anterior (ou o estado inicial)
+        posicoes = np.where(decisao >= 0, np.arange(tamanho), -1)
+        np.maximum.accumulate(posicoes, out=posicoes)
+        estados[alvo] = np.where(posicoes >= 0, decisao[posicoes] == 1, estado_inicial.get(alvo, False))
+    return estados
+
+
+def avaliar_programa(ast: List[Dict], leituras: Dict[int, object],
+                     estado_inicial: Optional[Dict[str, bool]] = None) -> Dict[str, 'np.ndarray']:
+    """avaliar_regras com as regras compiladas do programa (ESPERAR não tem efeito)"""
+    regras = [arg for opcode, arg in compilar_programa(ast) if opcode == OP_REGRA]
+    return avaliar_regras(regras, leituras, estado_inicial)
+
+
+def tempo_ligado(estado, instantes) -> float:
+    """Segundos ligado: cada instante ligado conta até o instante seguinte"""
+    _exigir_numpy()
+    instantes = np.asarray(instantes, dtype=np.float64)
+    return float(np.diff(instantes)[np.asarray(estado)[:-1]].sum())
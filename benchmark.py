@@ -0,0 +1,491 @@
+"""
+Medições de desempenho do Sistema de Irrigação.
+Execute `python benchmark.py` para rodar todas as medições.
+"""
+import contextlib
+import io
+import json
+import os
+import tempfile
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from irrigation_dsl import MaquinaVirtual, AnalisadorSintatico, iter_tokens
+from compilador import compilar_regra, compilar_programa, OP_REGRA
+from hospedeiro import HospedeiroProgramas, EVENTO_LEITURA
+from semantic_analyzer import AnalisadorSemantico
+from log_estruturado import GravadorJSONL, consultar
+from historico_sqlite import HistoricoSQLite, leituras
+from execucao_reativa import ExecucaoReativa
+from series_temporais import SeriesSensores
+from reproducao import reproduzir
+import avaliacao_vetorizada
+from frontend_incremental import FrontendIncremental
+
+# Regra representativa: cadeia com E/OU sobre um único sensor
+REGRA_EXEMPLO = {
+    'tipo': 'regra',
+    'sensor_id': 1,
+    'condicoes': [('>', 10), ('PALAVRA_AND', '<', 30), ('PALAVRA_OR', '>=', 90), ('PALAVRA_AND', '<=', 95)],
+    'acao': 'turn_on',
+    'alvo': 'Bomba',
+    'linha': 1
+}
+
+
+def gerar_leituras(n: int, semente: int = 42):
+    gerador = random.Random(semente)
+    return [gerador.randint(0, 100) for _ in range(n)]
+
+
+def medir(funcao, leituras) -> float:
+    """Executa `funcao` para cada leitura e retorna o tempo gasto em segundos"""
+    inicio = time.perf_counter()
+    for valor in leituras:
+        funcao(valor)
+    return time.perf_counter() - inicio
+
+
+def benchmark_avaliacao(n: int):
+    """Compara a avaliação interpretada (AST) com a compilada e a por tabela-verdade"""
+    leituras = gerar_leituras(n)
+    maquina = MaquinaVirtual()
+    condicoes = REGRA_EXEMPLO['condicoes']
+    regra = compilar_regra(REGRA_EXEMPLO)
+
+    interpretado = medir(lambda valor: maquina.avaliar_condicoes(valor, condicoes), leituras)
+    compilado = medir(regra.condicao, leituras)
+    tabela = medir(regra.avaliar, leituras)
+
+    print(f"📊 Avaliação de regras ({n:,} avaliações)")
+    print(f"  - Interpretada: {interpretado:.3f}s ({n / interpretado:,.0f} aval/s)")
+    print(f"  - Compilada:    {compilado:.3f}s ({n / compilado:,.0f} aval/s)")
+    print(f"  - Tabela 0–100: {tabela:.3f}s ({n / tabela:,.0f} aval/s)")
+    print(f"  - Ganho:        {interpretado / compilado:.1f}x (compilada), {interpretado / tabela:.1f}x (tabela)")
+
+
+def gerar_ast(n_sensores: int, regras_por_sensor: int, semente: int = 42):
+    """Gera a AST de um programa com `regras_por_sensor` regras em cada sensor"""
+    gerador = random.Random(semente)
+    ast = []
+    for id_sensor in range(1, n_sensores + 1):
+        ast.append({'tipo': 'declaracao_sensor', 'nome': f"Sensor {id_sensor}", 'id': id_sensor})
+    for id_sensor in range(1, n_sensores + 1):
+        for i in range(regras_por_sensor):
+            limite = gerador.randint(0, 100)
+            ast.append({
+                'tipo': 'regra',
+                'sensor_id': id_sensor,
+                'condicoes': [('<', limite)] if i % 2 == 0 else [('>=', limite)],
+                'acao': 'turn_on' if i % 2 == 0 else 'turn_off',
+                'alvo': f"Bomba {id_sensor}"
+            })
+    return ast
+
+
+def benchmark_ciclos(n_sensores: int, regras_por_sensor: int, ciclos: int = 50, fracao_alterada: float = 0.05):
+    """Compara a reavaliação completa com a reavaliação apenas dos sensores alterados"""
+    gerador = random.Random(1)
+    ast = gerar_ast(n_sensores, regras_por_sensor)
+    maquina = MaquinaVirtual()
+    with open(os.devnull, 'w', encoding='utf-8') as nulo, contextlib.redirect_stdout(nulo):
+        maquina.carregar(ast)
+        maquina.executar_ciclo()
+        todas = sorted(r for regras in maquina.regras_por_sensor.values() for r in regras)
+
+        completo = 0.0
+        incremental = 0.0
+        for _ in range(ciclos):
+            leituras = {s: gerador.randint(0, 100) for s in gerador.sample(range(1, n_sensores + 1), max(1, int(n_sensores * fracao_alterada)))}
+
+            inicio = time.perf_counter()
+            for id_sensor, valor in leituras.items():
+                maquina.sensores[id_sensor]['valor'] = valor
+            for _, regra in todas:
+                maquina.executar_regra_compilada(regra)
+            completo += time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            maquina.executar_ciclo(leituras)
+            incremental += time.perf_counter() - inicio
+
+    print(f"📊 Ciclos ({n_sensores:,} sensores x {regras_por_sensor} regras, {fracao_alterada:.0%} alterados, {ciclos} ciclos)")
+    print(f"  - Reavaliação completa:  {completo:.3f}s")
+    print(f"  - Só sensores alterados: {incremental:.3f}s")
+    print(f"  - Ganho:                 {completo / incremental:.1f}x")
+
+
+def gerar_programa_zona(zona: int, n_sensores: int, gerador: random.Random):
+    """AST de uma zona: dois sensores do conjunto compartilhado, quatro regras"""
+    ast = []
+    for id_sensor in gerador.sample(range(1, n_sensores + 1), 2):
+        limite = gerador.randint(10, 90)
+        ast.append({'tipo': 'declaracao_sensor', 'nome': f"Sensor {id_sensor}", 'id': id_sensor})
+        ast.append({'tipo': 'regra', 'sensor_id': id_sensor, 'condicoes': [('<', limite)],
+                    'acao': 'turn_on', 'alvo': f"Bomba {zona}"})
+        ast.append({'tipo': 'regra', 'sensor_id': id_sensor, 'condicoes': [('>=', limite)],
+                    'acao': 'turn_off', 'alvo': f"Bomba {zona}"})
+    return ast
+
+
+def benchmark_hospedeiro(n_programas: int, n_sensores: int = 500, n_leituras: int = 10_000):
+    """Vazão de leituras roteadas para `n_programas` programas hospedados"""
+    gerador = random.Random(3)
+    hospedeiro = HospedeiroProgramas()
+
+    inicio = time.perf_counter()
+    for zona in range(n_programas):
+        hospedeiro.carregar_programa(f"Zona {zona}", gerar_programa_zona(zona, n_sensores, gerador))
+    carga = time.perf_counter() - inicio
+
+    leituras = [(gerador.choice(list(hospedeiro.inscritos)), gerador.randint(0, 100)) for _ in range(n_leituras)]
+    publicar = hospedeiro.barramento.publicar
+    inicio = time.perf_counter()
+    for id_sensor, valor in leituras:
+        publicar(EVENTO_LEITURA, id_sensor, valor)
+    decorrido = time.perf_counter() - inicio
+
+    print(f"📊 Hospedeiro ({n_programas:,} programas, {n_sensores} sensores compartilhados)")
+    print(f"  - Carga dos programas: {carga:.3f}s")
+    print(f"  - {n_leituras:,} leituras em {decorrido:.3f}s ({n_leituras / decorrido:,.0f} leituras/s)")
+
+
+@dataclass
+class TokenDataclass:
+    """Representação anterior dos tokens (@dataclass com __dict__ por objeto)"""
+    tipo: str
+    valor: str
+    linha: int
+    coluna: int = 0
+
+
+def gerar_texto_programa(n_regras: int, n_sensores: int = 100, semente: int = 42) -> str:
+    gerador = random.Random(semente)
+    linhas = [f'INSERIR SENSOR "Sensor {i}" ID {i}' for i in range(1, n_sensores + 1)]
+    for i in range(n_regras):
+        sensor = gerador.randint(1, n_sensores)
+        baixo = gerador.randint(0, 50)
+        linhas.append(f'SE SENSOR {sensor} > {baixo} E <= {baixo + 30} ENTAO LIGAR "Bomba {sensor}"')
+    return "\n".join(linhas)
+
+
+def como_dict_legado(node) -> dict:
+    """Reconstrói o nó no formato anterior: dict com condições em tuplas de strings"""
+    dados = node.para_dict()
+    for chave in ('nome', 'alvo'):
+        if chave in dados:
+            # O parser antigo criava uma string nova por nó (valor.strip('"'))
+            dados[chave] = f'"{dados[chave]}"'.strip('"')
+    return dados
+
+
+def medir_memoria(construir) -> int:
+    """Bytes alocados (e ainda vivos) pelo objeto retornado por `construir`"""
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    objeto = construir()
+    depois = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objeto
+    return depois - antes
+
+
+def benchmark_memoria(n_regras: int):
+    """Compara a memória de tokens e AST na representação anterior e na compacta"""
+    texto = gerar_texto_programa(n_regras)
+
+    tokens_antes = medir_memoria(lambda: [TokenDataclass(*t) for t in iter_tokens(texto)])
+    tokens_agora = medir_memoria(lambda: list(iter_tokens(texto)))
+
+    ast = AnalisadorSintatico(iter_tokens(texto)).analisar()
+    ast_antes = medir_memoria(lambda: [como_dict_legado(no) for no in ast])
+    del ast
+    ast_agora = medir_memoria(lambda: AnalisadorSintatico(iter_tokens(texto)).analisar())
+
+    print(f"📊 Memória ({n_regras:,} regras)")
+    print(f"  - Tokens: {tokens_antes / 2**20:.1f} MiB (dataclass) -> {tokens_agora / 2**20:.1f} MiB (NamedTuple)")
+    print(f"  - AST:    {ast_antes / 2**20:.1f} MiB (dicts) -> {ast_agora / 2**20:.1f} MiB (nós com __slots__)")
+    print(f"  - Redução da AST: {ast_antes / ast_agora:.1f}x")
+
+
+def benchmark_semantica_incremental(n_regras: int, n_edicoes: int = 100):
+    """Compara reanalisar o programa inteiro com aplicar só a linha editada"""
+    linhas = gerar_texto_programa(n_regras).split("\n")
+    frontend = FrontendIncremental()
+    frontend.atualizar("\n".join(linhas))
+
+    gerador = random.Random(7)
+    edicoes = []
+    for _ in range(n_edicoes):
+        posicao = gerador.randrange(100, len(linhas))
+        linhas[posicao] = f'SE SENSOR {gerador.randint(1, 100)} < {gerador.randint(0, 100)} ENTAO LIGAR "Bomba"'
+        edicoes.append("\n".join(linhas))
+
+    inicio = time.perf_counter()
+    for texto in edicoes:
+        AnalisadorSemantico().analisar(AnalisadorSintatico(iter_tokens(texto)).analisar())
+    tempo_completo = (time.perf_counter() - inicio) / n_edicoes
+
+    inicio = time.perf_counter()
+    for texto in edicoes:
+        frontend.atualizar(texto)
+    tempo_incremental = (time.perf_counter() - inicio) / n_edicoes
+
+    print(f"📊 Edição de uma linha ({n_regras:,} regras)")
+    print(f"  - Análise completa:    {tempo_completo * 1e3:.2f} ms")
+    print(f"  - Análise incremental: {tempo_incremental * 1e3:.2f} ms")
+
+
+def benchmark_agrupamento(n_sensores: int, regras_por_grupo: int, n_leituras: int = 100):
+    """Passagem completa com uma avaliação por regra e com uma por grupo (sensor, ação, alvo)"""
+    linhas = [f'INSERIR SENSOR "Sensor {i}" ID {i}' for i in range(1, n_sensores + 1)]
+    gerador = random.Random(3)
+    for i in range(1, n_sensores + 1):
+        for _ in range(regras_por_grupo):
+            linhas.append(f'SE SENSOR {i} == {gerador.randint(0, 100)} ENTAO LIGAR "Emergência {i}"')
+    ast = AnalisadorSintatico(iter_tokens("\n".join(linhas))).analisar()
+
+    maquina = MaquinaVirtual(silencioso=True)
+    with open(os.devnull, 'w', encoding='utf-8') as nulo, contextlib.redirect_stdout(nulo):
+        maquina.carregar(ast)
+    tempos = {}
+    for agrupar in (False, True):
+        regras = [arg for opcode, arg in compilar_programa(ast, agrupar) if opcode == OP_REGRA]
+        inicio = time.perf_counter()
+        for _ in range(n_leituras):
+            for regra in regras:
+                maquina.executar_regra_compilada(regra)
+        tempos[agrupar] = (len(regras), time.perf_counter() - inicio)
+        maquina.historico.clear()
+
+    print(f"📊 Regras unidas ({n_sensores:,} sensores x {regras_por_grupo} regras iguais, {n_leituras} passagens)")
+    print(f"  - Uma avaliação por regra: {tempos[False][0]:,} avaliações, {tempos[False][1]:.3f}s")
+    print(f"  - Uma avaliação por grupo: {tempos[True][0]:,} avaliações, {tempos[True][1]:.3f}s")
+
+
+def benchmark_consulta_log(n_eventos: int):
+    """Consulta de uma janela de tempo: varredura completa x busca pelo índice"""
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo = os.path.join(diretorio, "eventos.jsonl")
+        gravador = GravadorJSONL(arquivo, max_bytes=None)
+        for i in range(n_eventos):
+            gravador.registrar({'timestamp': '', 'mensagem': '', 'instante': 1_000_000 + i, 'tipo': 'comando',
+                                'dispositivo': f"Bomba {i % 10}", 'ligado': i % 2 == 0})
+        gravador.fechar()
+        inicio_janela, fim_janela = 1_000_000 + n_eventos // 2, 1_000_000 + n_eventos // 2 + 1_000
+
+        inicio = time.perf_counter()
+        with open(arquivo, 'rb') as f:
+            varredura = [e for e in map(json.loads, f) if inicio_janela <= e['ts'] <= fim_janela]
+        tempo_varredura = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        indexada = list(consultar(arquivo, inicio_janela, fim_janela))
+        tempo_indice = time.perf_counter() - inicio
+        assert indexada == varredura
+        tamanho = os.path.getsize(arquivo)
+
+    print(f"📊 Consulta de 1.000 s em {n_eventos:,} eventos ({tamanho / 2**20:.0f} MiB)")
+    print(f"  - Varredura completa: {tempo_varredura * 1e3:.1f} ms")
+    print(f"  - Pelo índice:        {tempo_indice * 1e3:.1f} ms")
+
+
+def benchmark_historico_sqlite(n_leituras: int, n_sensores: int = 50):
+    """Vazão da execução reativa gravando leituras, transições e disparos em SQLite"""
+
+    class MQTTNulo:
+        def registrar_callback(self, topico, callback):
+            pass
+
+        def publicar(self, topico, dados):
+            pass
+
+    linhas = [f'INSERIR SENSOR "Sensor {i}" ID {i}' for i in range(n_sensores)]
+    for i in range(n_sensores):
+        linhas.append(f'SE SENSOR {i} < 30 ENTAO LIGAR "Bomba {i}"')
+        linhas.append(f'SE SENSOR {i} >= 30 ENTAO DESLIGAR "Bomba {i}"')
+    ast = AnalisadorSintatico(iter_tokens("\n".join(linhas))).analisar()
+    gerador = random.Random(5)
+    entradas = [(gerador.randrange(n_sensores), gerador.randint(0, 100)) for _ in range(n_leituras)]
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        tempos = {}
+        for nome, historico in (("Sem histórico", None),
+                                ("Com HistoricoSQLite", HistoricoSQLite(os.path.join(diretorio, "h.db")))):
+            with contextlib.redirect_stdout(io.StringIO()):
+                execucao = ExecucaoReativa(ast, MQTTNulo(), historico=historico)
+                inicio = time.perf_counter()
+                for id_sensor, valor in entradas:
+                    execucao.receber_leitura(id_sensor, valor)
+                tempos[nome] = time.perf_counter() - inicio
+                if historico is not None:
+                    historico.fechar()
+                    tempos["Até o último COMMIT"] = time.perf_counter() - inicio
+        gravadas = sum(len(leituras(os.path.join(diretorio, "h.db"), i)) for i in range(n_sensores))
+        assert gravadas == n_leituras
+
+    print(f"📊 Histórico SQLite ({n_leituras:,} leituras, {n_sensores} sensores)")
+    for nome, decorrido in tempos.items():
+        print(f"  - {nome}: {decorrido:.3f}s ({n_leituras / decorrido:,.0f} leituras/s)")
+
+
+def benchmark_series(n_leituras: int):
+    """Inserção e estatísticas de janelas em uma série de leituras por segundo"""
+    gerador = random.Random(9)
+    valores = [gerador.uniform(0, 100) for _ in range(n_leituras)]
+    series = SeriesSensores()
+    inicio = time.perf_counter()
+    for instante, valor in enumerate(valores):
+        series.registrar(1, valor, instante)
+    insercao = time.perf_counter() - inicio
+
+    print(f"📊 Séries temporais ({n_leituras:,} leituras, {n_leituras / 86400:.1f} dias a 1/s)")
+    print(f"  - Inserção: {insercao / n_leituras * 1e6:.2f} µs/leitura")
+    print(f"  - Memória por sensor: {series.series[1].bytes_ocupados() / 2**20:.2f} MiB "
+          f"(lista de floats: {n_leituras * 2 * 8 / 2**20:.0f} MiB só de dados)")
+    for segundos in (600, 86400, 7 * 86400):
+        inicio = time.perf_counter()
+        resumo = series.ultimos(1, segundos)
+        decorrido = time.perf_counter() - inicio
+        print(f"  - Janela de {segundos:>7,} s (resolução {resumo['resolucao']} s): {decorrido * 1e3:.2f} ms")
+
+
+def benchmark_headless(n_leituras: int, n_sensores: int = 20):
+    """Avaliações por segundo com console, no modo silencioso e no modo headless"""
+    linhas = [f'INSERIR SENSOR "Sensor {i}" ID {i}' for i in range(n_sensores)]
+    for i in range(n_sensores):
+        linhas.append(f'SE SENSOR {i} < 30 ENTAO LIGAR "Bomba {i}"')
+        linhas.append(f'SE SENSOR {i} >= 30 ENTAO DESLIGAR "Bomba {i}"')
+    ast = AnalisadorSintatico(iter_tokens("\n".join(linhas))).analisar()
+    gerador = random.Random(13)
+    entradas = [(gerador.randrange(n_sensores), gerador.randint(0, 100)) for _ in range(n_leituras)]
+
+    modos = {
+        "Console (print)": {},
+        "Silencioso": {'silencioso': True},
+        "Headless (eventos compactos)": {'eventos_compactos': True},
+    }
+    print(f"📊 Modo headless ({n_leituras:,} leituras, 2 regras por sensor)")
+    with open(os.devnull, 'w', encoding='utf-8') as nulo:
+        for nome, opcoes in modos.items():
+            with contextlib.redirect_stdout(nulo):
+                maquina = MaquinaVirtual(**opcoes)
+                maquina.carregar(ast, simular=False)
+                avaliadas = 0
+                inicio = time.perf_counter()
+                for id_sensor, valor in entradas:
+                    maquina.atualizar_sensor(id_sensor, valor)
+                    avaliadas += maquina.executar_ciclo()
+                decorrido = time.perf_counter() - inicio
+            print(f"  - {nome}: {avaliadas / decorrido:,.0f} avaliações/s")
+
+
+def benchmark_reproducao(n_leituras: int, n_sensores: int = 10):
+    """Reprodução de uma temporada de leituras (uma a cada 10 s) no relógio virtual"""
+    linhas = [f'INSERIR SENSOR "Sensor {i}" ID {i}' for i in range(n_sensores)]
+    for i in range(n_sensores):
+        linhas.append(f'SE SENSOR {i} < 30 ENTAO LIGAR "Bomba {i}"')
+        linhas.append(f'SE SENSOR {i} >= 60 ENTAO DESLIGAR "Bomba {i}"')
+    ast = AnalisadorSintatico(iter_tokens("\n".join(linhas))).analisar()
+    gerador = random.Random(17)
+    leituras = [(i * 10.0, gerador.randrange(n_sensores), gerador.randint(0, 100)) for i in range(n_leituras)]
+
+    resultado = reproduzir(ast, leituras)
+    dias = n_leituras * 10 / 86400
+    print(f"📊 Reprodução de {n_leituras:,} leituras ({dias:.0f} dias de dados)")
+    print(f"  - {resultado.tempo_execucao:.2f}s ({n_leituras / resultado.tempo_execucao:,.0f} leituras/s)")
+    print(f"  - {sum(resultado.disparos.values()):,} disparos, "
+          f"{sum(len(linha) for linha in resultado.linhas_do_tempo.values()):,} transições")
+
+
+def benchmark_vetorizada(n_leituras: int):
+    """Horas de bomba sobre `n_leituras` leituras: laço em Python x máscaras NumPy"""
+    np = avaliacao_vetorizada.np
+    if np is None:
+        print("📊 Avaliação vetorizada: NumPy não instalado, medição ignorada")
+        return
+    ast = AnalisadorSintatico(iter_tokens(
+        'INSERIR SENSOR "Umidade" ID 1\n'
+        'SE SENSOR 1 > 10 E < 30 OU >= 90 E <= 95 ENTAO LIGAR "Bomba"\n'
+        'SE SENSOR 1 >= 60 ENTAO DESLIGAR "Bomba"')).analisar()
+    gerador = np.random.default_rng(19)
+    valores = gerador.integers(0, 101, n_leituras).astype(np.float64)
+    instantes = np.arange(n_leituras, dtype=np.float64)
+
+    inicio = time.perf_counter()
+    estados = avaliacao_vetorizada.avaliar_programa(ast, {1: valores})
+    horas = avaliacao_vetorizada.tempo_ligado(estados["Bomba"], instantes) / 3600
+    tempo_vetorizado = time.perf_counter() - inicio
+
+    # Laço em Python com avaliar_condicoes, medido em uma amostra e extrapolado
+    maquina = MaquinaVirtual(silencioso=True)
+    regras = [no for no in ast if no['tipo'] == 'regra']
+    amostra = valores[:200_000].tolist()
+    inicio = time.perf_counter()
+    ligado = False
+    for valor in amostra:
+        for regra in regras:
+            if maquina.avaliar_condicoes(valor, regra['condicoes']):
+                ligado = regra['acao'] == 'turn_on'
+    tempo_laco = (time.perf_counter() - inicio) * n_leituras / len(amostra)
+
+    print(f"📊 Avaliação de {n_leituras:,} leituras ({horas:,.0f} horas de bomba)")
+    print(f"  - avaliar_condicoes em laço: {tempo_laco:.2f}s (estimado)")
+    print(f"  - Máscaras NumPy:            {tempo_vetorizado:.2f}s ({tempo_laco / tempo_vetorizado:.0f}x)")
+
+
+def benchmark_decisoes(n_dispositivos: int, regras_por_dispositivo: int = 6, passagens: int = 20):
+    """Comandos emitidos aplicando cada regra verdadeira vs. uma decisão por dispositivo"""
+    gerador = random.Random(23)
+    linhas = ['INSERIR SENSOR "Umidade" ID 1', 'INSERIR SENSOR "Temperatura" ID 2']
+    for d in range(n_dispositivos):
+        for _ in range(regras_por_dispositivo):
+            linhas.append(f'SE SENSOR {gerador.randint(1, 2)} {gerador.choice(["<", ">"])} '
+                          f'{gerador.randint(0, 100)} ENTAO {gerador.choice(["LIGAR", "DESLIGAR"])} "Bomba {d}"')
+    ast = AnalisadorSintatico(iter_tokens("\n".join(linhas))).analisar()
+    regras = [arg for opcode, arg in compilar_programa(ast) if opcode == OP_REGRA]
+
+    print(f"📊 Decisões por ciclo ({n_dispositivos:,} dispositivos x {regras_por_dispositivo} regras, "
+          f"{passagens} passagens)")
+    for nome, coalescer in (("Regra a regra", False), ("Uma decisão por dispositivo", True)):
+        maquina = MaquinaVirtual(eventos_compactos=True, max_historico=10)
+        maquina.carregar(ast, simular=False)
+        comandos = 0
+        inicio = time.perf_counter()
+        for passagem in range(passagens):
+            maquina.sensores[1]['valor'] = (passagem * 37) % 101
+            maquina.sensores[2]['valor'] = (passagem * 53) % 101
+            if coalescer:
+                decisoes = {}
+                for regra in regras:
+                    decisao = maquina.avaliar_regra(regra)
+                    if decisao is not None:
+                        decisoes[regra.alvo] = decisao
+                comandos += len(maquina.aplicar_decisoes(decisoes))
+            else:
+                for regra in regras:
+                    antes = maquina.dispositivos.get(regra.alvo)
+                    if maquina.executar_regra_compilada(regra) and antes != regra.ligar:
+                        comandos += 1
+        decorrido = time.perf_counter() - inicio
+        print(f"  - {nome}: {comandos:,} comandos em {decorrido:.3f}s")
+
+
+if __name__ == "__main__":
+    for n in (10_000, 1_000_000):
+        benchmark_avaliacao(n)
+    benchmark_ciclos(1_000, 10)
+    for n in (1_000, 10_000):
+        benchmark_hospedeiro(n)
+    benchmark_memoria(100_000)
+    benchmark_semantica_incremental(10_000)
+    benchmark_agrupamento(1_000, 5)
+    benchmark_consulta_log(1_000_000)
+    benchmark_historico_sqlite(100_000)
+    benchmark_series(14 * 86400)
+    benchmark_headless(200_000)
+    benchmark_reproducao(1_000_000)
+    benchmark_vetorizada(10_000_000)
+    benchmark_decisoes(1_000)
@@ -0,0 +1,160 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+# Incrementar quando o formato da AST ou do resultado semântico mudar,
+# para que entradas antigas em disco deixem de ser usadas
+VERSAO_CACHE = 2
+
+
+class CacheProgramas:
+    """
+    Cache de programas já analisados (AST + resultado semântico), indexado pelo
+    hash SHA-256 do texto. Mantém um LRU em memória limitado por número de
+    entradas e pelo total de caracteres dos programas e, opcionalmente, uma
+    cópia em disco limitada em bytes. Os tamanhos e a ordem de uso dos
+    arquivos do disco ficam em um índice em memória, montado ao abrir o cache.
+
+    As entradas em disco são lidas com pickle, que executa código ao carregar
+    um arquivo adulterado: `diretorio` precisa ser confiável, gravável apenas
+    pelo usuário que executa o sistema.
+    """
+
+    def __init__(self, max_entradas: int = 128, max_caracteres: int = 10_000_000,
+                 diretorio: Optional[str] = None, max_bytes_disco: int = 256 * 1024 * 1024):
+        self.max_entradas = max_entradas
+        self.max_caracteres = max_caracteres
+        self.diretorio = diretorio
+        self.max_bytes_disco = max_bytes_disco
+        self.entradas: OrderedDict = OrderedDict()  # chave -> (tamanho, resultado)
+        self.caracteres = 0
+        self.disco: OrderedDict = OrderedDict()     # chave -> bytes, do menos para o mais usado
+        self.bytes_disco = 0
+        self.acertos = 0
+        self.falhas = 0
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+            self._indexar_disco()
+
+    @staticmethod
+    def chave(programa: str) -> str:
+        return hashlib.sha256(f"{VERSAO_CACHE}:{programa}".encode('utf-8')).hexdigest()
+
+    def obter(self, programa: str) -> Optional[Tuple]:
+        """Retorna (ast, sucesso, erros) do programa ou None se não estiver no cache"""
+        chave = self.chave(programa)
+        entrada = self.entradas.get(chave)
+        if entrada is not None:
+            self.entradas.move_to_end(chave)
+            self.acertos += 1
+            return entrada[1]
+
+        resultado = self._ler_disco(chave)
+        if resultado is not None:
+            self._guardar_memoria(chave, len(programa), resultado)
+            self.acertos += 1
+            return resultado
+
+        self.falhas += 1
+        return None
+
+    def guardar(self, programa: str, resultado: Tuple):
+        chave = self.chave(programa)
+        self._guardar_memoria(chave, len(programa), resultado)
+        self._escrever_disco(chave, resultado)
+
+    def obter_ou_analisar(self, programa: str, analisar: Callable[[str], Tuple]) -> Tuple:
+        """Retorna o resultado do cache ou chama `analisar(programa)` e guarda o resultado"""
+        resultado = self.obter(programa)
+        if resultado is None:
+            resultado = analisar(programa)
+            self.guardar(programa, resultado)
+        return resultado
+
+    def limpar(self):
+        self.entradas.clear()
+        self.caracteres = 0
+
+    def _guardar_memoria(self, chave: str, tamanho: int, resultado: Tuple):
+        anterior = self.entradas.pop(chave, None)
+        if anterior is not None:
+            self.caracteres -= anterior[0]
+        self.entradas[chave] = (tamanho, resultado)
+        self.caracteres += tamanho
+
+        # Remover as entradas menos usadas até respeitar os limites
+        while len(self.entradas) > 1 and (len(self.entradas) > self.max_entradas
+                                          or self.caracteres > self.max_caracteres):
+            _, (tamanho_removido, _) = self.entradas.popitem(last=False)
+            self.caracteres -= tamanho_removido
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, f"{chave}.pickle")
+
+    def _indexar_disco(self):
+        """Monta o índice do disco com os arquivos existentes, pela data de uso"""
+        arquivos = []
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith('.pickle'):
+                info = os.stat(os.path.join(self.diretorio, nome))
+                arquivos.append((info.st_mtime, nome[:-len('.pickle')], info.st_size))
+        for _, chave, tamanho in sorted(arquivos):
+            self._anotar_disco(chave, tamanho)
+
+    def _anotar_disco(self, chave: str, tamanho: int):
+        """Registra o arquivo da chave como o mais recentemente usado"""
+        self.bytes_disco += tamanho - self.disco.pop(chave, 0)
+        self.disco[chave] = tamanho
+
+    def _esquecer_disco(self, chave: str):
+        self.bytes_disco -= self.disco.pop(chave, 0)
+
+    def _ler_disco(self, chave: str) -> Optional[Tuple]:
+        if not self.diretorio:
+            return None
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, 'rb') as f:
+                resultado = pickle.load(f)
+                tamanho = f.tell()
+            os.utime(caminho)  # marca como usado recentemente (também para o próximo índice)
+            self._anotar_disco(chave, tamanho)
+            return resultado
+        except FileNotFoundError:
+            self._esquecer_disco(chave)
+            return None
+        except Exception as e:
+            print(f"Entrada de cache inválida ignorada ({chave[:12]}): {e}")
+            return None
+
+    def _escrever_disco(self, chave: str, resultado: Tuple):
+        if not self.diretorio:
+            return
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix='.tmp')
+        try:
+            with os.fdopen(descritor, 'wb') as f:
+                pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+                tamanho = f.tell()
+            os.replace(temporario, self._caminho(chave))
+        except Exception:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+        self._anotar_disco(chave, tamanho)
+        self._limitar_disco()
+
+    def _limitar_disco(self):
+        """
+        Remove os arquivos menos usados enquanto o total exceder max_bytes_disco.
+        Usa o índice em memória: nenhuma listagem do diretório a cada escrita.
+        """
+        while self.bytes_disco > self.max_bytes_disco and len(self.disco) > 1:
+            chave, tamanho = self.disco.popitem(last=False)
+            self.bytes_disco -= tamanho
+            try:
+                os.remove(self._caminho(chave))
+            except FileNotFoundError:
+                pass
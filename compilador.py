@@ -0,0 +1,193 @@
+import operator
+from functools import lru_cache, partial
+from typing import Callable, Dict, List, Tuple
+
+# Códigos das instruções do programa compilado
+OP_SENSOR = 0
+OP_REGRA = 1
+OP_ESPERA = 2
+
+# Faixa de valores aceita para os limites (ver AnalisadorSemantico.verificar_operador_limite).
+# Para leituras inteiras nessa faixa o resultado de cada regra vem de uma tabela pré-calculada.
+VALOR_MINIMO = 0
+VALOR_MAXIMO = 100
+
+# Comparadores com os operandos invertidos: partial(operator.gt, limite)(valor)
+# calcula `limite > valor`, ou seja, `valor < limite`, sem nenhuma chamada em Python
+COMPARADORES = {
+    '<': operator.gt,
+    '>': operator.lt,
+    '<=': operator.ge,
+    '>=': operator.le,
+    '==': operator.eq,
+}
+
+
+def _e(esquerda: Callable, direita: Callable) -> Callable:
+    return lambda valor: esquerda(valor) and direita(valor)
+
+
+def _ou(esquerda: Callable, direita: Callable) -> Callable:
+    return lambda valor: esquerda(valor) or direita(valor)
+
+
+class RegraCompilada:
+    """
+    Regra com a cadeia de condições já convertida.
+    `tabela` guarda o resultado para cada leitura inteira de 0 a 100; as demais
+    leituras (fracionárias ou fora da faixa) usam a função `condicao`.
+    """
+    __slots__ = ('sensor_id', 'condicao', 'tabela', 'ligar', 'alvo', 'linha', 'no')
+
+    def __init__(self, sensor_id: int, condicao: Callable, tabela: Tuple[bool, ...],
+                 ligar: bool, alvo: str, linha: int, no: Dict):
+        self.sensor_id = sensor_id
+        self.condicao = condicao
+        self.tabela = tabela
+        self.ligar = ligar
+        self.alvo = alvo
+        self.linha = linha
+        self.no = no
+
+    def avaliar(self, valor) -> bool:
+        if valor.__class__ is int and VALOR_MINIMO <= valor <= VALOR_MAXIMO:
+            return self.tabela[valor]
+        return self.condicao(valor)
+
+    def regras_disparadas(self, valor) -> List['RegraCompilada']:
+        """Regras originais responsáveis pelo disparo (a própria regra)"""
+        return [self]
+
+
+def _alguma(condicoes: Tuple[Callable, ...]) -> Callable:
+    return lambda valor: any(condicao(valor) for condicao in condicoes)
+
+
+class GrupoRegras(RegraCompilada):
+    """
+    Regras consecutivas com o mesmo sensor, ação e dispositivo unidas em uma
+    única avaliação: a tabela é o OU das tabelas das regras. `regras` guarda
+    as regras originais para registrar quais delas dispararam.
+    """
+    __slots__ = ('regras',)
+
+    def __init__(self, regras: List[RegraCompilada]):
+        primeira = regras[0]
+        super().__init__(
+            primeira.sensor_id,
+            _alguma(tuple(regra.condicao for regra in regras)),
+            tuple(any(resultados) for resultados in zip(*(regra.tabela for regra in regras))),
+            primeira.ligar,
+            primeira.alvo,
+            primeira.linha,
+            primeira.no
+        )
+        self.regras = regras
+
+    def regras_disparadas(self, valor) -> List[RegraCompilada]:
+        """Todas as regras do grupo verdadeiras para o valor, em ordem de programa"""
+        return [regra for regra in self.regras if regra.avaliar(valor)]
+
+
+def compilar_condicao(operador: str, limite) -> Callable:
+    """Converte uma comparação em uma função de um argumento (o valor do sensor)"""
+    try:
+        comparador = COMPARADORES[operador]
+    except KeyError:
+        raise RuntimeError(f"Erro: Operador desconhecido: {operador}")
+    return partial(comparador, limite)
+
+
+def compilar_condicoes(condicoes: List) -> Callable:
+    """
+    Converte a cadeia de condições em uma função.
+    Os operadores lógicos são aplicados da esquerda para a direita, sem
+    precedência, exatamente como em MaquinaVirtual.avaliar_condicoes.
+    """
+    operador, limite = condicoes[0]
+    avaliar = compilar_condicao(operador, limite)
+
+    for op_logico, operador, limite in condicoes[1:]:
+        proxima = compilar_condicao(operador, limite)
+        if op_logico == 'PALAVRA_AND':
+            avaliar = _e(avaliar, proxima)
+        else:  # OR
+            avaliar = _ou(avaliar, proxima)
+
+    return avaliar
+
+
+@lru_cache(maxsize=4096)
+def tabela_verdade(condicoes: Tuple[Tuple, ...]) -> Tuple[bool, ...]:
+    """
+    Pré-calcula a cadeia de condições para cada leitura inteira de 0 a 100.
+    Cadeias idênticas compartilham a mesma tabela.
+    """
+    avaliar = compilar_condicoes(list(condicoes))
+    return tuple(bool(avaliar(valor)) for valor in range(VALOR_MINIMO, VALOR_MAXIMO + 1))
+
+
+def compilar_regra(node: Dict) -> RegraCompilada:
+    """Compila um nó 'regra' da AST"""
+    condicoes = node['condicoes']
+    return RegraCompilada(
+        node['sensor_id'],
+        compilar_condicoes(condicoes),
+        tabela_verdade(tuple(condicoes)),
+        node['acao'] == 'turn_on',
+        node['alvo'],
+        node.get('linha', 0),
+        node
+    )
+
+
+def compilar_programa(ast: List[Dict], agrupar: bool = True) -> List[Tuple[int, object]]:
+    """
+    Converte a AST em uma lista plana de instruções (código, argumento).
+    As regras viram RegraCompilada; declarações e esperas mantêm o nó original.
+    Com `agrupar`, regras equivalentes consecutivas viram um GrupoRegras.
+    """
+    programa = []
+    for node in ast:
+        if node['tipo'] == 'declaracao_sensor':
+            programa.append((OP_SENSOR, node))
+        elif node['tipo'] == 'regra':
+            programa.append((OP_REGRA, compilar_regra(node)))
+        elif node['tipo'] == 'espera':
+            programa.append((OP_ESPERA, node))
+    return agrupar_regras(programa) if agrupar else programa
+
+
+def agrupar_regras(programa: List[Tuple[int, object]]) -> List[Tuple[int, object]]:
+    """
+    Une regras com o mesmo (sensor_id, ação, alvo) em um GrupoRegras, na
+    posição da primeira. Só são unidas regras que se sucedem entre as que
+    escrevem no dispositivo, sem ESPERAR nem nova declaração do sensor entre
+    elas; assim a ordem das escritas em cada dispositivo não muda e o estado
+    final é o mesmo, numa passagem completa ou na execução por ciclos.
+    """
+    resultado = []
+    # Última regra de cada dispositivo: alvo -> (posição em `resultado`, geração do sensor)
+    ultima: Dict[str, Tuple[int, int]] = {}
+    geracao: Dict[int, int] = {}
+    grupos: Dict[int, List[RegraCompilada]] = {}
+
+    for opcode, arg in programa:
+        if opcode == OP_ESPERA:
+            ultima.clear()
+        elif opcode == OP_SENSOR:
+            geracao[arg['id']] = geracao.get(arg['id'], 0) + 1
+        elif opcode == OP_REGRA:
+            atual = geracao.get(arg.sensor_id, 0)
+            posicao, geracao_anterior = ultima.get(arg.alvo, (None, None))
+            if posicao is not None and geracao_anterior == atual:
+                anterior = resultado[posicao][1]
+                if anterior.sensor_id == arg.sensor_id and anterior.ligar == arg.ligar:
+                    grupos.setdefault(posicao, [anterior]).append(arg)
+                    continue
+            ultima[arg.alvo] = (len(resultado), atual)
+        resultado.append((opcode, arg))
+
+    for posicao, regras in grupos.items():
+        resultado[posicao] = (OP_REGRA, GrupoRegras(regras))
+    return resultado
@@ -0,0 +1,11 @@
+"""
+Configuração do pytest: cada teste roda em um diretório temporário próprio,
+para que os arquivos gerados pela execução (sistema_irrigacao.log,
+estado_sistema.json) não fiquem na raiz do repositório.
+"""
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def diretorio_temporario(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
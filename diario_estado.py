@@ -0,0 +1,139 @@
+"""
+Estado do sistema (sensores e dispositivos) persistido como snapshot + diário.
+
+Cada mudança de estado é acrescentada ao diário (uma linha JSON compacta por
+mudança) em vez de regravar o estado inteiro. De tempos em tempos o diário é
+compactado: o estado completo é gravado no snapshot (estado_sistema.json, no
+mesmo formato de antes) por meio de um arquivo temporário renomeado, e o
+diário recomeça vazio. Na partida, o snapshot é lido e o diário reaplicado.
+"""
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Dict, Optional
+
+# Tipos das linhas do diário
+REGISTRO_SENSOR = 's'        # ["s", id, nome, valor]
+REGISTRO_DISPOSITIVO = 'd'   # ["d", alvo, ligado]
+
+
+def gravar_json_atomico(caminho: str, dados, **opcoes):
+    """Grava o JSON em um temporário no mesmo diretório e o renomeia sobre `caminho`"""
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, prefix=".estado-", suffix=".tmp")
+    try:
+        with os.fdopen(descritor, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False, **opcoes)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+class DiarioEstado:
+    """
+    Estado de sensores e dispositivos com diário de mudanças. As funções
+    registrar_* só gravam quando o valor muda; a cada `compactar_a_cada`
+    linhas no diário o snapshot é regravado.
+    """
+
+    def __init__(self, arquivo_snapshot: str = "estado_sistema.json",
+                 arquivo_diario: Optional[str] = None, compactar_a_cada: int = 10_000,
+                 sincronizar: bool = False):
+        self.arquivo_snapshot = arquivo_snapshot
+        self.arquivo_diario = arquivo_diario or os.path.splitext(arquivo_snapshot)[0] + ".diario"
+        self.compactar_a_cada = compactar_a_cada
+        self.sincronizar = sincronizar
+        self.sensores: Dict[int, Dict] = {}
+        self.dispositivos: Dict[str, bool] = {}
+        self.entradas = 0
+        # Há linhas escritas desde o último descarregar
+        self.pendente = False
+        self.carregar()
+        self.saida = open(self.arquivo_diario, 'a', encoding='utf-8')
+
+    def carregar(self):
+        """Partida a quente: lê o snapshot e reaplica o diário"""
+        try:
+            with open(self.arquivo_snapshot, encoding='utf-8') as f:
+                estado = json.load(f)
+            self.sensores = {int(id_sensor): sensor for id_sensor, sensor in estado.get('sensores', {}).items()}
+            self.dispositivos = dict(estado.get('dispositivos', {}))
+        except FileNotFoundError:
+            pass
+
+        self.entradas = 0
+        try:
+            with open(self.arquivo_diario, encoding='utf-8') as f:
+                for linha in f:
+                    try:
+                        registro = json.loads(linha)
+                    except ValueError:
+                        break  # última linha incompleta (queda durante a gravação)
+                    self._aplicar(registro)
+                    self.entradas += 1
+        except FileNotFoundError:
+            pass
+
+    def _aplicar(self, registro):
+        if registro[0] == REGISTRO_SENSOR:
+            _, id_sensor, nome, valor = registro
+            self.sensores[id_sensor] = {'nome': nome, 'valor': valor}
+        elif registro[0] == REGISTRO_DISPOSITIVO:
+            _, alvo, ligado = registro
+            self.dispositivos[alvo] = ligado
+
+    def _anotar(self, registro):
+        self._aplicar(registro)
+        self.saida.write(json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + "\n")
+        self.entradas += 1
+        self.pendente = True
+        if self.entradas >= self.compactar_a_cada:
+            self.compactar()
+
+    def registrar_sensor(self, id_sensor: int, nome: str, valor):
+        if self.sensores.get(id_sensor) != {'nome': nome, 'valor': valor}:
+            self._anotar([REGISTRO_SENSOR, id_sensor, nome, valor])
+
+    def registrar_dispositivo(self, alvo: str, ligado: bool):
+        if self.dispositivos.get(alvo) != ligado:
+            self._anotar([REGISTRO_DISPOSITIVO, alvo, ligado])
+
+    def valor_sensor(self, id_sensor: int):
+        """Última leitura conhecida do sensor (ou None)"""
+        return self.sensores.get(id_sensor, {}).get('valor')
+
+    def descarregar(self):
+        """
+        Garante que as mudanças registradas chegaram ao arquivo do diário (e ao
+        disco, com `sincronizar`). Sem mudanças novas, não faz nada.
+        """
+        if not self.pendente:
+            return
+        self.saida.flush()
+        if self.sincronizar:
+            os.fsync(self.saida.fileno())
+        self.pendente = False
+
+    def compactar(self):
+        """Grava o estado completo no snapshot (atômico) e esvazia o diário"""
+        self.saida.flush()
+        gravar_json_atomico(self.arquivo_snapshot, {
+            'sensores': self.sensores,
+            'dispositivos': self.dispositivos,
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }, indent=2)
+        # Se houver queda aqui, o diário antigo é reaplicado sobre o snapshot
+        # novo sem efeito: cada linha guarda o valor absoluto, não a diferença
+        self.saida.close()
+        self.saida = open(self.arquivo_diario, 'w', encoding='utf-8')
+        self.entradas = 0
+        self.pendente = False
+
+    def fechar(self):
+        self.compactar()
+        self.saida.close()
@@ -0,0 +1,169 @@
+import threading
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from atuadores import CamadaAtuadores
+from gravador_log import GravadoresMultiplos
+from irrigation_dsl import MaquinaVirtual
+
+
+def extrair_valor(dados):
+    """
+    Extrai a leitura numérica de uma mensagem MQTT já decodificada.
+    Aceita um número, {"valor": n} ou um dicionário com um único valor numérico
+    (ex.: {"umidade": 42}).
+    """
+    if isinstance(dados, dict):
+        if 'valor' in dados:
+            dados = dados['valor']
+        else:
+            numericos = [v for v in dados.values() if isinstance(v, (int, float)) and not isinstance(v, bool)]
+            if len(numericos) != 1:
+                raise ValueError(f"Mensagem sem leitura numérica: {dados}")
+            dados = numericos[0]
+
+    valor = float(dados)
+    # Leituras inteiras continuam inteiras para usar a tabela-verdade das regras
+    return int(valor) if valor.is_integer() else valor
+
+
+def comando_padrao(alvo: str, ligado: bool) -> dict:
+    """Mensagem publicada para um dispositivo por padrão"""
+    return {"estado": "ligado" if ligado else "desligado"}
+
+
+class ExecucaoReativa:
+    """
+    Executa um programa da DSL continuamente sobre leituras reais.
+    Cada sensor declarado (INSERIR SENSOR ... ID n) é associado a um tópico
+    MQTT; cada mensagem atualiza a tabela de sensores, dispara só as regras
+    daquele sensor e os comandos resultantes são publicados de volta por
+    MQTTHandler.publicar, por meio de uma CamadaAtuadores: só as mudanças de
+    estado de cada dispositivo chegam ao broker.
+    """
+
+    def __init__(self, ast: List[Dict], mqtt_handler,
+                 topicos_sensores: Optional[Dict[int, str]] = None,
+                 topicos_dispositivos: Optional[Dict[str, str]] = None,
+                 codificar_comando: Callable[[str, bool], object] = comando_padrao,
+                 ao_receber: Optional[Callable[[int, object], None]] = None,
+                 ao_comandar: Optional[Callable[[str, bool], None]] = None,
+                 gravador=None, diario=None, historico=None, series=None,
+                 eventos_compactos: bool = False, atuadores: Optional[CamadaAtuadores] = None):
+        self.mqtt_handler = mqtt_handler
+        self.topicos_sensores = topicos_sensores or {}
+        self.topicos_dispositivos = topicos_dispositivos or {}
+        self.codificar_comando = codificar_comando
+        self.ao_receber = ao_receber
+        self.ao_comandar = ao_comandar
+        # Estado comandado de cada dispositivo (pode ser compartilhado entre execuções)
+        self.atuadores = atuadores if atuadores is not None else CamadaAtuadores(mqtt_handler)
+        self.trava = threading.Lock()
+        # Destino dos eventos da máquina (ex.: GravadorLog); sem ele, o
+        # histórico em memória cresce enquanto a execução durar
+        self.gravador = gravador
+        # Estado persistido (DiarioEstado): a máquina parte do último estado conhecido
+        self.diario = diario
+        # Histórico em SQLite (HistoricoSQLite): leituras, transições e disparos
+        self.historico = historico
+        # Séries temporais em memória (SeriesSensores) para estatísticas recentes
+        self.series = series
+        # Sem saída no console; os eventos só viram texto nos gravadores
+        self.eventos_compactos = eventos_compactos
+        # Callbacks registrados no MQTTHandler (tópico -> callback)
+        self.inscricoes: Dict[str, Callable] = {}
+        self.maquina = self._nova_maquina(ast)
+
+    def _nova_maquina(self, ast: List[Dict]) -> MaquinaVirtual:
+        destinos = [destino for destino in (self.gravador, self.historico) if destino is not None]
+        gravador = destinos[0] if len(destinos) == 1 else GravadoresMultiplos(*destinos) if destinos else None
+        maquina = MaquinaVirtual(gravador=gravador, diario=self.diario, eventos_compactos=self.eventos_compactos)
+        maquina.carregar(ast, simular=False)
+        return maquina
+
+    def topico_sensor(self, id_sensor: int) -> str:
+        return self.topicos_sensores.get(id_sensor, f"sensores/{id_sensor}")
+
+    def topico_dispositivo(self, alvo: str) -> str:
+        return self.topicos_dispositivos.get(alvo, f"dispositivos/{alvo}")
+
+    def iniciar(self):
+        """
+        Associa cada sensor declarado ao seu tópico no MQTTHandler, remove os
+        tópicos de sensores que o programa atual não declara mais e publica o
+        estado inicial dos dispositivos.
+        """
+        topicos = {self.topico_sensor(id_sensor): id_sensor for id_sensor in self.maquina.sensores}
+        for topico in [t for t in self.inscricoes if t not in topicos]:
+            self.mqtt_handler.remover_callback(topico, self.inscricoes.pop(topico))
+        for topico, id_sensor in topicos.items():
+            callback = self.inscricoes[topico] = partial(self.ao_receber_mensagem, id_sensor)
+            self.mqtt_handler.registrar_callback(topico, callback)
+        # Partida a quente: o estado restaurado (DiarioEstado) é publicado uma vez,
+        # para que o relé e a renovação periódica partam do estado da máquina;
+        # dispositivos já conhecidos pela camada de atuadores são suprimidos
+        with self.trava:
+            for alvo, ligado in self.maquina.dispositivos.items():
+                publicado = self.atuadores.comandar(self.topico_dispositivo(alvo), ligado,
+                                                    self.codificar_comando(alvo, ligado))
+                if publicado and self.ao_comandar:
+                    self.ao_comandar(alvo, ligado)
+
+    def ao_receber_mensagem(self, id_sensor: int, dados):
+        try:
+            valor = extrair_valor(dados)
+        except (TypeError, ValueError) as e:
+            print(f"Leitura inválida para o sensor {id_sensor}: {e}")
+            return
+        if id_sensor not in self.maquina.sensores:
+            return  # mensagem em trânsito de um sensor removido por recarregar
+        self.receber_leitura(id_sensor, valor)
+
+    def receber_leitura(self, id_sensor: int, valor) -> Dict[str, bool]:
+        """
+        Processa uma leitura e publica os comandos que mudam o estado de algum
+        dispositivo. Retorna a decisão do ciclo (alvo -> estado final);
+        `ao_comandar` só é chamado para os publicados.
+        """
+        with self.trava:
+            if self.historico is None:
+                comandos = dict(self.maquina.processar_leitura(id_sensor, valor))
+            else:
+                comandos = self._processar_com_historico(id_sensor, valor)
+            if self.diario is not None:
+                # Cada ciclo chega ao diário antes de o comando ser publicado
+                self.diario.descarregar()
+            if self.series is not None:
+                self.series.registrar(id_sensor, valor)
+            if self.ao_receber:
+                self.ao_receber(id_sensor, valor)
+            # Publicar ainda com a trava: ciclos concorrentes (thread do MQTT e
+            # recarregar) chegam ao broker na mesma ordem em que foram decididos
+            for alvo, ligado in comandos.items():
+                publicado = self.atuadores.comandar(self.topico_dispositivo(alvo), ligado,
+                                                    self.codificar_comando(alvo, ligado))
+                if publicado and self.ao_comandar:
+                    self.ao_comandar(alvo, ligado)
+        return comandos
+
+    def _processar_com_historico(self, id_sensor: int, valor) -> Dict[str, bool]:
+        # Leituras e transições usam o relógio dos eventos (disparos): as
+        # tabelas continuam comparáveis mesmo após um ajuste do relógio de parede
+        self.historico.registrar_leitura(id_sensor, valor, self.maquina.instante_atual())
+        comandos = dict(self.maquina.processar_leitura(id_sensor, valor))
+        # Os comandos do ciclo são exatamente os dispositivos que mudaram de estado
+        instante = self.maquina.instante_atual()
+        for alvo, ligado in self.maquina.comandos_ciclo.items():
+            self.historico.registrar_transicao(alvo, ligado, instante)
+        return comandos
+
+    def recarregar(self, ast: List[Dict]):
+        """Troca o programa em execução e reaplica as últimas leituras conhecidas"""
+        with self.trava:
+            leituras = {id_sensor: sensor['valor'] for id_sensor, sensor in self.maquina.sensores.items()
+                        if sensor['valor'] is not None}
+            self.maquina = self._nova_maquina(ast)
+        self.iniciar()
+        for id_sensor, valor in leituras.items():
+            if id_sensor in self.maquina.sensores:
+                self.receber_leitura(id_sensor, valor)
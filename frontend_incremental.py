@@ -0,0 +1,191 @@
+import copy
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from irrigation_dsl import AnalisadorSintatico, ErroLexico, iter_tokens
+from semantic_analyzer import AnalisadorSemantico, ErroSemantico
+
+
+@dataclass
+class Fragmento:
+    """
+    Linhas consecutivas que contêm instruções completas (uma regra pode ocupar
+    várias linhas): os nós gerados e, se houver, o erro de sintaxe.
+    `nos` são entregues na AST e nunca mais alterados; `internos` são cópias
+    registradas no analisador semântico, cuja linha é ajustada no lugar.
+    """
+    linhas: List[str]
+    nos: List = field(default_factory=list)
+    internos: List = field(default_factory=list)
+    erro: Optional[str] = None
+    linha_erro: int = 0     # posição do erro dentro do fragmento (0 = primeira linha)
+
+    def deslocar(self, deslocamento: int):
+        """Ajusta a linha dos nós internos e troca os entregues por cópias novas"""
+        for no in self.internos:
+            no.linha += deslocamento
+        self.nos = [copy.copy(no) for no in self.internos]
+
+
+@dataclass
+class ResultadoAnalise:
+    ast: List
+    erros_sintaticos: List[Tuple[int, str]]
+    erros_semanticos: List[ErroSemantico]
+    linhas_reanalisadas: int
+
+    @property
+    def sucesso(self) -> bool:
+        return not self.erros_sintaticos and not self.erros_semanticos
+
+
+class FrontendIncremental:
+    """
+    Front-end incremental para o editor. Os nós da AST ficam guardados por
+    fragmento (linhas com instruções completas); a cada atualização só os
+    fragmentos tocados pelas linhas entre o prefixo e o sufixo inalterados do
+    texto são relexados e reanalisados. Uma instrução que continua nas linhas
+    seguintes faz o trecho crescer até ela terminar. Fragmentos do sufixo só
+    têm o número de linha ajustado, em cópias dos nós: ASTs já entregues não
+    mudam. A análise semântica recebe só os nós removidos e incluídos.
+    """
+
+    def __init__(self):
+        self.linhas: List[str] = []
+        self.fragmentos: List[Fragmento] = []
+        self.semantico = AnalisadorSemantico()
+
+    def atualizar(self, texto: str) -> ResultadoAnalise:
+        linhas = texto.split('\n')
+        anteriores = self.linhas
+        antigos = self.fragmentos
+
+        # Prefixo e sufixo comuns entre a versão anterior e a atual
+        limite = min(len(anteriores), len(linhas))
+        inicio = 0
+        while inicio < limite and anteriores[inicio] == linhas[inicio]:
+            inicio += 1
+        fim = 0
+        while fim < limite - inicio and anteriores[-1 - fim] == linhas[-1 - fim]:
+            fim += 1
+
+        # O trecho reanalisado começa e termina em limites de fragmento; um
+        # fragmento com erro logo antes dele é incluído (a edição pode completá-lo)
+        primeiro, inicio = self._fragmento_da_linha(inicio)
+        if primeiro > 0 and antigos[primeiro - 1].erro is not None:
+            primeiro -= 1
+            inicio -= len(antigos[primeiro].linhas)
+        ultimo, corte = self._fragmento_da_linha(len(anteriores) - fim, depois=True)
+        fim = len(anteriores) - corte
+
+        while True:
+            novos, incompleto = self._analisar_trecho(linhas[inicio:len(linhas) - fim], inicio + 1)
+            # Instrução que continua no sufixo: o próximo fragmento entra no trecho
+            if not incompleto or ultimo == len(antigos):
+                break
+            fim -= len(antigos[ultimo].linhas)
+            ultimo += 1
+
+        sufixo = antigos[ultimo:]
+        deslocamento = len(linhas) - len(anteriores)
+        if deslocamento:
+            for fragmento in sufixo:
+                fragmento.deslocar(deslocamento)
+
+        removidos = [no for fragmento in antigos[primeiro:ultimo] for no in fragmento.internos]
+        self.semantico.aplicar_alteracoes(removidos, [no for fragmento in novos for no in fragmento.internos])
+
+        self.linhas = linhas
+        self.fragmentos = antigos[:primeiro] + novos + sufixo
+        return self._resultado(sum(len(fragmento.linhas) for fragmento in novos))
+
+    def _fragmento_da_linha(self, indice: int, depois: bool = False) -> Tuple[int, int]:
+        """
+        Fragmento que contém a linha `indice` (contada a partir de 0) e a sua
+        primeira linha; com `depois`, o primeiro fragmento que começa nela ou depois.
+        """
+        comeco = 0
+        for posicao, fragmento in enumerate(self.fragmentos):
+            termino = comeco + len(fragmento.linhas)
+            if (comeco >= indice) if depois else (termino > indice):
+                return posicao, comeco
+            comeco = termino
+        return len(self.fragmentos), comeco
+
+    def _analisar_trecho(self, linhas: List[str], primeira: int) -> Tuple[List[Fragmento], bool]:
+        """
+        Analisa as linhas como um só texto e as divide em fragmentos. Retorna os
+        fragmentos e se o trecho terminou no meio de uma instrução.
+        """
+        if not linhas:
+            return [], False
+
+        lidas = [0, 0]  # linhas dos dois últimos tokens lidos pelo analisador
+
+        def acompanhar(tokens):
+            for token in tokens:
+                lidas[0], lidas[1] = lidas[1], token.linha
+                yield token
+
+        try:
+            analisador = AnalisadorSintatico(acompanhar(iter_tokens('\n'.join(linhas))))
+        except ErroLexico as e:  # já no primeiro token
+            return [Fragmento(linhas, erro=str(e), linha_erro=e.linha - 1)], False
+        grupos = []  # [primeira linha, última linha, nós], linhas contadas a partir de 1
+        erro = None
+        incompleto = False
+        nos = analisador.iter_nos()
+        while analisador.atual is not None:
+            comeco = analisador.atual.linha
+            try:
+                no = next(nos)
+            except SyntaxError as e:
+                erro = str(e)
+                if isinstance(e, ErroLexico):
+                    linha_erro = e.linha
+                elif analisador.atual is not None:
+                    linha_erro = analisador.atual.linha
+                else:
+                    linha_erro = lidas[1]
+                    incompleto = True
+                break
+            termino = lidas[1] if analisador.atual is None else lidas[0]
+            no.linha += primeira - 1
+            if grupos and comeco <= grupos[-1][1]:
+                grupos[-1][1] = termino
+                grupos[-1][2].append(no)
+            else:
+                grupos.append([comeco, termino, [no]])
+
+        if erro is not None:
+            # O erro fica no fragmento da instrução que falhou, até o fim do trecho
+            if not grupos or comeco > grupos[-1][1]:
+                grupos.append([comeco, len(linhas), []])
+
+        fragmentos = []
+        for posicao, (comeco, _, nos_grupo) in enumerate(grupos):
+            comeco = 1 if posicao == 0 else comeco
+            termino = grupos[posicao + 1][0] - 1 if posicao + 1 < len(grupos) else len(linhas)
+            fragmentos.append(Fragmento(linhas[comeco - 1:termino], nos_grupo,
+                                        [copy.copy(no) for no in nos_grupo]))
+        if not fragmentos:
+            fragmentos.append(Fragmento(linhas))
+        if erro is not None:
+            fragmentos[-1].erro = erro
+            fragmentos[-1].linha_erro = linha_erro - (len(linhas) - len(fragmentos[-1].linhas) + 1)
+        return fragmentos, incompleto
+
+    def _resultado(self, reanalisadas: int) -> ResultadoAnalise:
+        ast = []
+        erros_sintaticos = []
+        numero = 1
+        for fragmento in self.fragmentos:
+            if fragmento.erro is not None:
+                erros_sintaticos.append((numero + fragmento.linha_erro, fragmento.erro))
+            ast.extend(fragmento.nos)
+            numero += len(fragmento.linhas)
+
+        erros_semanticos = []
+        if not erros_sintaticos:
+            erros_semanticos = self.semantico.coletar_erros()
+        return ResultadoAnalise(ast, erros_sintaticos, erros_semanticos, reanalisadas)
@@ -0,0 +1,227 @@
+"""
+Gravação do log de eventos em segundo plano.
+
+O GravadorLog recebe os eventos da MaquinaVirtual em uma fila limitada e uma
+thread própria os grava em lotes (um write + flush por lote), então quem
+registra o evento nunca faz E/S de arquivo. O arquivo é rotacionado por
+tamanho e/ou por dia, no formato sistema_irrigacao.log.1, .2, ...
+"""
+import os
+import threading
+from collections import deque
+from datetime import date
+from typing import Dict, Optional
+
+from irrigation_dsl import EventoCompacto
+
+# O que fazer quando a fila está cheia
+POLITICA_BLOQUEAR = 'bloquear'     # quem registra espera a thread esvaziar a fila
+POLITICA_DESCARTAR = 'descartar'   # o evento mais antigo da fila é descartado
+
+
+class GravadorLog:
+    """
+    Destino de eventos com fila limitada e gravação em lotes por uma thread.
+    Contadores: `escritos`, `lotes`, `descartados` (política descartar),
+    `bloqueios` (vezes em que alguém esperou por espaço), `rotacoes` e
+    `falhas` (lotes que não puderam ser gravados).
+    """
+
+    def __init__(self, arquivo: str = "sistema_irrigacao.log", capacidade: int = 10_000,
+                 politica: str = POLITICA_BLOQUEAR, max_bytes: Optional[int] = 10 * 1024 * 1024,
+                 rotacao_diaria: bool = False, copias: int = 5, intervalo: float = 0.2,
+                 tamanho_lote: int = 1_000, sincronizar: bool = False):
+        if politica not in (POLITICA_BLOQUEAR, POLITICA_DESCARTAR):
+            raise ValueError(f"Política desconhecida: {politica}")
+        self.arquivo = arquivo
+        self.capacidade = capacidade
+        self.politica = politica
+        self.max_bytes = max_bytes
+        self.rotacao_diaria = rotacao_diaria
+        self.copias = copias
+        self.intervalo = intervalo
+        self.tamanho_lote = min(tamanho_lote, capacidade)
+        self.sincronizar = sincronizar
+
+        self.fila = deque()
+        self.condicao = threading.Condition()
+        self.ativo = True
+        self.em_gravacao = 0
+        self.descargas = 0
+
+        self.escritos = 0
+        self.lotes = 0
+        self.descartados = 0
+        self.bloqueios = 0
+        self.rotacoes = 0
+        self.falhas = 0
+
+        self._abrir()
+        # Um arquivo que já existia pertence ao dia da sua última alteração
+        if os.path.exists(self.arquivo):
+            self.dia = date.fromtimestamp(os.path.getmtime(self.arquivo))
+        else:
+            self.dia = date.today()
+        self.thread = threading.Thread(target=self._executar, name="GravadorLog", daemon=True)
+        self.thread.start()
+
+    def registrar(self, evento: Dict):
+        """
+        Enfileira um evento ({'timestamp', 'mensagem'} ou EventoCompacto); não
+        faz E/S. Eventos compactos só viram texto na thread de gravação.
+        """
+        with self.condicao:
+            if not self.ativo:
+                raise RuntimeError("O gravador de log já foi encerrado")
+            if len(self.fila) >= self.capacidade:
+                if self.politica == POLITICA_DESCARTAR:
+                    self.fila.popleft()
+                    self.descartados += 1
+                else:
+                    self.bloqueios += 1
+                    self.condicao.notify_all()
+                    self.condicao.wait_for(lambda: len(self.fila) < self.capacidade or not self.ativo)
+                    if not self.ativo:
+                        # fechar() durante a espera: a thread pode já ter esvaziado a fila
+                        raise RuntimeError("O gravador de log foi encerrado enquanto o evento esperava")
+            self.fila.append(evento)
+            if len(self.fila) >= self.tamanho_lote:
+                self.condicao.notify_all()
+
+    def formatar(self, evento: Dict) -> str:
+        """Linha gravada para um evento"""
+        return f"{evento['timestamp']} - {evento['mensagem']}\n"
+
+    def linha_formatada(self, evento: Dict, posicao: int):
+        """Chamado na thread de gravação com a posição (em bytes) de cada linha"""
+
+    def lote_gravado(self):
+        """Chamado na thread de gravação depois que um lote foi gravado"""
+
+    def descarregar(self):
+        """Espera até que todos os eventos já registrados estejam gravados"""
+        with self.condicao:
+            self.descargas += 1
+            self.condicao.notify_all()
+            self.condicao.wait_for(lambda: not self.fila and not self.em_gravacao)
+            self.descargas -= 1
+
+    def fechar(self):
+        """Grava o que estiver na fila e encerra a thread"""
+        with self.condicao:
+            if not self.ativo:
+                return
+            self.ativo = False
+            self.condicao.notify_all()
+        self.thread.join()
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self.condicao:
+            return {
+                'pendentes': len(self.fila),
+                'escritos': self.escritos,
+                'lotes': self.lotes,
+                'descartados': self.descartados,
+                'bloqueios': self.bloqueios,
+                'rotacoes': self.rotacoes,
+                'falhas': self.falhas,
+            }
+
+    def _executar(self):
+        while True:
+            with self.condicao:
+                self.condicao.wait_for(
+                    lambda: not self.ativo or self.descargas or len(self.fila) >= self.tamanho_lote,
+                    timeout=self.intervalo
+                )
+                lote = list(self.fila)
+                self.fila.clear()
+                self.em_gravacao = len(lote)
+                encerrar = not self.ativo
+                # Libera quem estava esperando espaço na fila
+                self.condicao.notify_all()
+
+            if lote:
+                self._gravar(lote)
+
+            with self.condicao:
+                self.em_gravacao = 0
+                self.condicao.notify_all()
+                if encerrar and not self.fila:
+                    break
+        self._encerrar()
+
+    def _abrir(self):
+        self.saida = open(self.arquivo, 'ab')
+        self.tamanho = self.saida.tell()
+
+    def _encerrar(self):
+        self.saida.close()
+
+    def _gravar(self, lote):
+        """Grava o lote com um único flush, rotacionando no meio dele se preciso"""
+        try:
+            if self.rotacao_diaria and date.today() != self.dia and self.tamanho > 0:
+                self._rotacionar()
+            bloco = []
+            tamanho_bloco = 0
+            for evento in lote:
+                if isinstance(evento, EventoCompacto):
+                    evento = evento.como_dict()
+                linha = self.formatar(evento).encode('utf-8')
+                ocupado = self.tamanho + tamanho_bloco
+                if self.max_bytes and ocupado > 0 and ocupado + len(linha) > self.max_bytes:
+                    self._escrever(bloco)
+                    self._rotacionar()
+                    bloco, tamanho_bloco = [], 0
+                self.linha_formatada(evento, self.tamanho + tamanho_bloco)
+                bloco.append(linha)
+                tamanho_bloco += len(linha)
+            self._escrever(bloco)
+            self.saida.flush()
+            if self.sincronizar:
+                os.fsync(self.saida.fileno())
+            self.lote_gravado()
+        except OSError as e:
+            self.falhas += 1
+            print(f"❌ Erro ao gravar o log {self.arquivo}: {e}")
+            return
+        self.escritos += len(lote)
+        self.lotes += 1
+
+    def _escrever(self, bloco):
+        dados = b"".join(bloco)
+        self.saida.write(dados)
+        self.tamanho += len(dados)
+
+    def _rotacionar(self):
+        """arquivo -> arquivo.1 -> arquivo.2 ...; a cópia mais antiga é apagada"""
+        self.saida.close()
+        self.deslocar_copias()
+        self.saida = open(self.arquivo, 'ab')
+        self.tamanho = 0
+        self.dia = date.today()
+        self.rotacoes += 1
+
+    def deslocar_copias(self, sufixo: str = ""):
+        """Renomeia arquivo<sufixo> para arquivo.1<sufixo>, deslocando as cópias anteriores"""
+        atual = f"{self.arquivo}{sufixo}"
+        if self.copias > 0:
+            for i in range(self.copias - 1, 0, -1):
+                origem = f"{self.arquivo}.{i}{sufixo}"
+                if os.path.exists(origem):
+                    os.replace(origem, f"{self.arquivo}.{i + 1}{sufixo}")
+            os.replace(atual, f"{self.arquivo}.1{sufixo}")
+        elif os.path.exists(atual):
+            os.remove(atual)
+
+
+class GravadoresMultiplos:
+    """Repassa cada evento a vários destinos (ex.: log de texto e histórico SQLite)"""
+
+    def __init__(self, *destinos):
+        self.destinos = destinos
+
+    def registrar(self, evento: Dict):
+        for destino in self.destinos:
+            destino.registrar(evento)
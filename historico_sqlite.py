@@ -0,0 +1,130 @@
+"""
+Histórico de leituras, transições e disparos de regras em SQLite.
+
+O HistoricoSQLite usa a mesma fila limitada e a mesma thread de gravação do
+GravadorLog, mas cada lote vira uma única transação de INSERTs no banco, em
+modo WAL (consultas de outras conexões não bloqueiam a gravação). Tabelas:
+  - leituras (ts, sensor_id, valor), índice (sensor_id, ts)
+  - transicoes (ts, dispositivo, ligado), índice (dispositivo, ts)
+  - disparos (ts, linha, sensor_id, valor, dispositivo, ligado), índice (dispositivo, ts)
+"""
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+from gravador_log import GravadorLog
+from irrigation_dsl import TIPO_DISPARO, EventoCompacto
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS leituras (
+    ts REAL NOT NULL, sensor_id INTEGER NOT NULL, valor REAL
+);
+CREATE INDEX IF NOT EXISTS idx_leituras_sensor_ts ON leituras (sensor_id, ts);
+CREATE TABLE IF NOT EXISTS transicoes (
+    ts REAL NOT NULL, dispositivo TEXT NOT NULL, ligado INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transicoes_dispositivo_ts ON transicoes (dispositivo, ts);
+CREATE TABLE IF NOT EXISTS disparos (
+    ts REAL NOT NULL, linha INTEGER, sensor_id INTEGER, valor REAL,
+    dispositivo TEXT NOT NULL, ligado INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_disparos_dispositivo_ts ON disparos (dispositivo, ts);
+"""
+
+INSERCOES = {
+    'leituras': "INSERT INTO leituras VALUES (?, ?, ?)",
+    'transicoes': "INSERT INTO transicoes VALUES (?, ?, ?)",
+    'disparos': "INSERT INTO disparos VALUES (?, ?, ?, ?, ?, ?)",
+}
+
+
+class HistoricoSQLite(GravadorLog):
+    """
+    Destino de eventos gravado em SQLite. Como gravador da MaquinaVirtual,
+    guarda os eventos de disparo (toda regra verdadeira, mesmo as que não
+    mudaram o estado); leituras e transições de dispositivos chegam por
+    registrar_leitura e registrar_transicao.
+    Nenhum dos três métodos faz E/S: só enfileiram.
+    """
+
+    def __init__(self, arquivo: str = "historico_irrigacao.db", **opcoes):
+        # O banco não é rotacionado
+        opcoes.update(max_bytes=None, rotacao_diaria=False)
+        super().__init__(arquivo, **opcoes)
+
+    def registrar(self, evento: Dict):
+        if isinstance(evento, EventoCompacto):
+            if evento.tipo == TIPO_DISPARO:
+                id_sensor, valor, dispositivo, ligado, linha, _ = evento.args
+                super().registrar(('disparos', (evento.instante(), linha, id_sensor, valor, dispositivo, ligado)))
+        elif evento.get('tipo') == TIPO_DISPARO:
+            super().registrar(('disparos', (
+                evento['instante'], evento.get('linha'), evento.get('sensor'), evento.get('valor'),
+                evento['dispositivo'], evento['ligado']
+            )))
+
+    def registrar_leitura(self, id_sensor: int, valor, instante: Optional[float] = None):
+        super().registrar(('leituras', (time.time() if instante is None else instante, id_sensor, valor)))
+
+    def registrar_transicao(self, dispositivo: str, ligado: bool, instante: Optional[float] = None):
+        super().registrar(('transicoes', (time.time() if instante is None else instante, dispositivo, ligado)))
+
+    def _abrir(self):
+        # A conexão é criada aqui, mas depois só a thread de gravação a usa
+        self.conexao = sqlite3.connect(self.arquivo, isolation_level=None, check_same_thread=False)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute(f"PRAGMA synchronous={'FULL' if self.sincronizar else 'NORMAL'}")
+        self.conexao.executescript(ESQUEMA)
+
+    def _encerrar(self):
+        self.conexao.close()
+
+    def _gravar(self, lote):
+        """Grava o lote inteiro em uma transação, um executemany por tabela"""
+        por_tabela: Dict[str, List[Tuple]] = {}
+        for tabela, linha in lote:
+            por_tabela.setdefault(tabela, []).append(linha)
+        try:
+            self.conexao.execute("BEGIN")
+            for tabela, linhas in por_tabela.items():
+                self.conexao.executemany(INSERCOES[tabela], linhas)
+            self.conexao.execute("COMMIT")
+        except sqlite3.Error as e:
+            if self.conexao.in_transaction:
+                self.conexao.execute("ROLLBACK")
+            self.falhas += 1
+            print(f"❌ Erro ao gravar o histórico {self.arquivo}: {e}")
+            return
+        self.escritos += len(lote)
+        self.lotes += 1
+
+
+def _consultar(arquivo: str, sql: str, parametros: Tuple) -> List[Tuple]:
+    conexao = sqlite3.connect(arquivo)
+    try:
+        return conexao.execute(sql, parametros).fetchall()
+    finally:
+        conexao.close()
+
+
+def leituras(arquivo: str, id_sensor: int, inicio: float = float('-inf'),
+             fim: float = float('inf')) -> List[Tuple[float, float]]:
+    """Leituras (ts, valor) do sensor com inicio <= ts <= fim, em ordem"""
+    return _consultar(arquivo, "SELECT ts, valor FROM leituras WHERE sensor_id = ? AND ts BETWEEN ? AND ? "
+                               "ORDER BY ts", (id_sensor, inicio, fim))
+
+
+def transicoes(arquivo: str, dispositivo: str, inicio: float = float('-inf'),
+               fim: float = float('inf')) -> List[Tuple[float, bool]]:
+    """Transições (ts, ligado) do dispositivo com inicio <= ts <= fim, em ordem"""
+    linhas = _consultar(arquivo, "SELECT ts, ligado FROM transicoes WHERE dispositivo = ? AND ts BETWEEN ? AND ? "
+                                 "ORDER BY ts", (dispositivo, inicio, fim))
+    return [(ts, bool(ligado)) for ts, ligado in linhas]
+
+
+def disparos(arquivo: str, dispositivo: str, inicio: float = float('-inf'),
+             fim: float = float('inf')) -> List[Tuple[float, int, bool]]:
+    """Disparos de regras sobre o dispositivo: (ts, linha, ligado), em ordem"""
+    linhas = _consultar(arquivo, "SELECT ts, linha, ligado FROM disparos WHERE dispositivo = ? "
+                                 "AND ts BETWEEN ? AND ? ORDER BY ts", (dispositivo, inicio, fim))
+    return [(ts, linha, bool(ligado)) for ts, linha, ligado in linhas]
@@ -0,0 +1,84 @@
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+from irrigation_dsl import MaquinaVirtual
+
+# Tópicos do barramento de eventos
+EVENTO_LEITURA = 'leitura'    # (id_sensor, valor)
+EVENTO_COMANDO = 'comando'    # (programa, alvo, ligado)
+
+
+class BarramentoEventos:
+    """Barramento de eventos síncrono compartilhado pelos programas hospedados"""
+
+    def __init__(self):
+        self.inscritos: Dict[str, List[Callable]] = defaultdict(list)
+
+    def inscrever(self, topico: str, callback: Callable):
+        self.inscritos[topico].append(callback)
+
+    def cancelar(self, topico: str, callback: Callable):
+        self.inscritos[topico].remove(callback)
+
+    def publicar(self, topico: str, *args):
+        for callback in self.inscritos.get(topico, ()):
+            callback(*args)
+
+
+class HospedeiroProgramas:
+    """
+    Executa muitos programas da DSL (um por zona de irrigação) no mesmo processo.
+    Todos compartilham uma tabela de sensores e um barramento de eventos; cada
+    leitura é encaminhada apenas aos programas que usam aquele sensor, e cada
+    programa mantém o estado dos próprios dispositivos.
+    """
+
+    def __init__(self, barramento: BarramentoEventos = None):
+        self.barramento = barramento or BarramentoEventos()
+        self.sensores: Dict[int, Dict] = {}
+        self.programas: Dict[str, MaquinaVirtual] = {}
+        # Índice de roteamento: id do sensor -> (nome, máquina) dos programas que o usam
+        self.inscritos: Dict[int, List[Tuple[str, MaquinaVirtual]]] = defaultdict(list)
+        self.leituras_processadas = 0
+        self.barramento.inscrever(EVENTO_LEITURA, self.receber_leitura)
+
+    def carregar_programa(self, nome: str, ast: List[Dict]) -> MaquinaVirtual:
+        """Compila e registra um programa; os sensores dele passam a ser roteados para ele"""
+        if nome in self.programas:
+            raise ValueError(f"Já existe um programa chamado '{nome}'")
+        maquina = MaquinaVirtual(sensores=self.sensores, eventos_compactos=True)
+        maquina.carregar(ast, simular=False)
+        self.programas[nome] = maquina
+        for id_sensor in maquina.regras_por_sensor:
+            self.inscritos[id_sensor].append((nome, maquina))
+        # Sensores que já tinham leitura na tabela compartilhada
+        if maquina.sensores_alterados:
+            self._despachar(nome, maquina)
+        return maquina
+
+    def remover_programa(self, nome: str):
+        maquina = self.programas.pop(nome)
+        for id_sensor in maquina.regras_por_sensor:
+            self.inscritos[id_sensor].remove((nome, maquina))
+            if not self.inscritos[id_sensor]:
+                del self.inscritos[id_sensor]
+
+    def receber_leitura(self, id_sensor: int, valor):
+        """Atualiza a tabela compartilhada e executa só os programas que usam o sensor"""
+        sensor = self.sensores.get(id_sensor)
+        if sensor is None:
+            return
+        sensor['valor'] = valor
+        self.leituras_processadas += 1
+        for nome, maquina in self.inscritos.get(id_sensor, ()):
+            maquina.atualizar_sensor(id_sensor, valor)
+            self._despachar(nome, maquina)
+
+    def _despachar(self, nome: str, maquina: MaquinaVirtual):
+        maquina.executar_ciclo()
+        for alvo, ligado in maquina.comandos_ciclo.items():
+            self.barramento.publicar(EVENTO_COMANDO, nome, alvo, ligado)
+
+    def estado(self, nome: str) -> Dict[str, bool]:
+        """Estado dos dispositivos de um programa"""
+        return self.programas[nome].dispositivos
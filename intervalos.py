@@ -0,0 +1,171 @@
+import heapq
+import math
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+INFINITO = math.inf
+
+
+class Intervalo(NamedTuple):
+    """Intervalo de valores reais com extremos abertos ou fechados"""
+    inicio: float
+    fechado_inicio: bool
+    fim: float
+    fechado_fim: bool
+
+
+# Um conjunto de valores é uma tupla de intervalos disjuntos em ordem crescente
+Conjunto = Tuple[Intervalo, ...]
+
+VAZIO: Conjunto = ()
+TODOS: Conjunto = (Intervalo(-INFINITO, False, INFINITO, False),)
+
+
+def conjunto_condicao(operador: str, limite) -> Conjunto:
+    """Conjunto de valores que satisfazem `valor <operador> limite`"""
+    if operador == '<':
+        return (Intervalo(-INFINITO, False, limite, False),)
+    elif operador == '<=':
+        return (Intervalo(-INFINITO, False, limite, True),)
+    elif operador == '>':
+        return (Intervalo(limite, False, INFINITO, False),)
+    elif operador == '>=':
+        return (Intervalo(limite, True, INFINITO, False),)
+    elif operador == '==':
+        return (Intervalo(limite, True, limite, True),)
+    raise ValueError(f"Operador desconhecido: {operador}")
+
+
+def conjunto_condicoes(condicoes: Sequence) -> Conjunto:
+    """
+    Conjunto de valores que satisfazem a cadeia de condições de uma regra.
+    E/OU são aplicados da esquerda para a direita, como na MaquinaVirtual.
+    """
+    operador, limite = condicoes[0]
+    conjunto = conjunto_condicao(operador, limite)
+    for op_logico, operador, limite in condicoes[1:]:
+        proximo = conjunto_condicao(operador, limite)
+        if op_logico == 'PALAVRA_AND':
+            conjunto = intersecao(conjunto, proximo)
+        else:
+            conjunto = uniao(conjunto, proximo)
+    return conjunto
+
+
+def intersecao_intervalos(a: Intervalo, b: Intervalo):
+    """Interseção de dois intervalos ou None se for vazia"""
+    if a.inicio > b.inicio:
+        inicio, fechado_inicio = a.inicio, a.fechado_inicio
+    elif b.inicio > a.inicio:
+        inicio, fechado_inicio = b.inicio, b.fechado_inicio
+    else:
+        inicio, fechado_inicio = a.inicio, a.fechado_inicio and b.fechado_inicio
+
+    if a.fim < b.fim:
+        fim, fechado_fim = a.fim, a.fechado_fim
+    elif b.fim < a.fim:
+        fim, fechado_fim = b.fim, b.fechado_fim
+    else:
+        fim, fechado_fim = a.fim, a.fechado_fim and b.fechado_fim
+
+    if inicio < fim or (inicio == fim and fechado_inicio and fechado_fim):
+        return Intervalo(inicio, fechado_inicio, fim, fechado_fim)
+    return None
+
+
+def intersecao(a: Conjunto, b: Conjunto) -> Conjunto:
+    resultado = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        comum = intersecao_intervalos(a[i], b[j])
+        if comum is not None:
+            resultado.append(comum)
+        # Avança o intervalo que termina primeiro
+        if (a[i].fim, a[i].fechado_fim) < (b[j].fim, b[j].fechado_fim):
+            i += 1
+        else:
+            j += 1
+    return tuple(resultado)
+
+
+def uniao(a: Conjunto, b: Conjunto) -> Conjunto:
+    todos = sorted(a + b, key=lambda iv: (iv.inicio, not iv.fechado_inicio))
+    resultado: List[Intervalo] = []
+    for atual in todos:
+        if resultado:
+            ultimo = resultado[-1]
+            # Sobrepostos ou encostados ([1, 5) e [5, 8]) viram um só intervalo
+            if atual.inicio < ultimo.fim or (atual.inicio == ultimo.fim and (ultimo.fechado_fim or atual.fechado_inicio)):
+                if (atual.fim, atual.fechado_fim) > (ultimo.fim, ultimo.fechado_fim):
+                    resultado[-1] = Intervalo(ultimo.inicio, ultimo.fechado_inicio, atual.fim, atual.fechado_fim)
+                continue
+        resultado.append(atual)
+    return tuple(resultado)
+
+
+def contem(externo: Conjunto, interno: Conjunto) -> bool:
+    """Verifica se todo valor de `interno` também pertence a `externo`"""
+    return intersecao(externo, interno) == interno
+
+
+def formatar_numero(valor) -> str:
+    return str(int(valor)) if float(valor).is_integer() else str(valor)
+
+
+def formatar_intervalo(intervalo: Intervalo) -> str:
+    """Descrição legível de um intervalo, ex.: '20 < valor <= 30'"""
+    inicio, fechado_inicio, fim, fechado_fim = intervalo
+    if inicio == fim:
+        return f"valor == {formatar_numero(inicio)}"
+    partes = []
+    if inicio != -INFINITO:
+        partes.append(f"{formatar_numero(inicio)} {'<=' if fechado_inicio else '<'} ")
+    partes.append("valor")
+    if fim != INFINITO:
+        partes.append(f" {'<=' if fechado_fim else '<'} {formatar_numero(fim)}")
+    if len(partes) == 1:
+        return "qualquer valor"
+    return "".join(partes)
+
+
+def formatar_conjunto(conjunto: Conjunto) -> str:
+    if not conjunto:
+        return "nenhum valor"
+    return " ou ".join(formatar_intervalo(intervalo) for intervalo in conjunto)
+
+
+def _terminou(ativo: Intervalo, novo: Intervalo) -> bool:
+    """Verifica se `ativo` termina antes do início de `novo` (sem sobreposição)"""
+    if ativo.fim != novo.inicio:
+        return ativo.fim < novo.inicio
+    return not (ativo.fechado_fim and novo.fechado_inicio)
+
+
+def sobreposicoes(grupo_a: Sequence[Conjunto], grupo_b: Sequence[Conjunto]) -> Dict[Tuple[int, int], Conjunto]:
+    """
+    Encontra os pares (i, j) em que grupo_a[i] e grupo_b[j] têm valores em comum.
+    Todos os intervalos são ordenados pelo início e varridos uma única vez,
+    mantendo um heap por grupo com os intervalos ainda abertos: O(n log n)
+    mais o número de sobreposições encontradas. Retorna {(i, j): valores em comum}.
+    """
+    eventos = []
+    for lado, grupo in enumerate((grupo_a, grupo_b)):
+        for indice, conjunto in enumerate(grupo):
+            for intervalo in conjunto:
+                eventos.append((intervalo.inicio, not intervalo.fechado_inicio, lado, indice, intervalo))
+    eventos.sort(key=lambda evento: (evento[0], evento[1]))
+
+    ativos = ([], [])
+    encontradas: Dict[Tuple[int, int], Conjunto] = {}
+    for ordem, (_, _, lado, indice, intervalo) in enumerate(eventos):
+        for heap in ativos:
+            # O heap é ordenado pelo fim: se o primeiro não terminou, nenhum terminou
+            while heap and _terminou(heap[0][3], intervalo):
+                heapq.heappop(heap)
+        for _, _, _, outro_intervalo, outro in ativos[1 - lado]:
+            comum = intersecao_intervalos(outro_intervalo, intervalo)
+            if comum is None:
+                continue
+            par = (indice, outro) if lado == 0 else (outro, indice)
+            encontradas[par] = uniao(encontradas.get(par, VAZIO), (comum,))
+        heapq.heappush(ativos[lado], (intervalo.fim, intervalo.fechado_fim, ordem, intervalo, indice))
+    return encontradas
@@ -1,13 +1,115 @@
 import re
+import asyncio
+import heapq
+from collections import Counter, deque
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
 import random
 import time
 from datetime import datetime
-import json
 import os
 from semantic_analyzer import AnalisadorSemantico
+from cache_programas import CacheProgramas
+from otimizador import otimizar_programa
+from diario_estado import gravar_json_atomico
+from compilador import compilar_programa, compilar_regra, RegraCompilada, OP_SENSOR, OP_REGRA, OP_ESPERA
 from tokens import Token
+from nos_ast import NoDeclaracaoSensor, NoRegra, NoEspera, CODIGO_OPERADOR, CODIGO_CONECTIVO
+
+# Palavras-chave da linguagem. As formas em inglês (SET, IF, THEN...) são as
+# documentadas no README e continuam aceitas como sinônimos.
+PALAVRAS_CHAVE = {
+    'INSERIR': 'PALAVRA_SET', 'SET': 'PALAVRA_SET',
+    'SENSOR': 'PALAVRA_SENSOR',
+    'ID': 'PALAVRA_ID',
+    'SE': 'PALAVRA_IF', 'IF': 'PALAVRA_IF',
+    'ENTAO': 'PALAVRA_THEN', 'THEN': 'PALAVRA_THEN',
+    'LIGAR': 'PALAVRA_TURN_ON', 'TURN_ON': 'PALAVRA_TURN_ON',
+    'DESLIGAR': 'PALAVRA_TURN_OFF', 'TURN_OFF': 'PALAVRA_TURN_OFF',
+    'ESPERAR': 'PALAVRA_WAIT', 'WAIT': 'PALAVRA_WAIT',
+    'E': 'PALAVRA_AND', 'AND': 'PALAVRA_AND',
+    'OU': 'PALAVRA_OR', 'OR': 'PALAVRA_OR',
+}
+
+# Padrões de tokens, compilados uma única vez na carga do módulo
+PADROES_TOKEN = [
+    ('TEXTO', r'"[^"\n]*"'),
+    ('TEXTO_ABERTO', r'"[^"\n]*'),
+    ('NUMERO', r'\d+'),
+    ('OPERADOR', r'[<>]=?|=='),
+    ('PALAVRA', r'[A-Za-z_]\w*'),
+    ('COMENTARIO', r'#[^\n]*'),
+    ('ESPACO', r'[ \t\r]+'),
+    ('NOVA_LINHA', r'\n'),
+    ('INVALIDO', r'.'),
+]
+REGEX_TOKEN = re.compile('|'.join(f'(?P<{nome}>{padrao})' for nome, padrao in PADROES_TOKEN))
+
+
+class ErroLexico(SyntaxError):
+    """Erro de análise léxica com a posição (linha e coluna) do problema"""
+
+    def __init__(self, mensagem: str, linha: int, coluna: int):
+        super().__init__(f"{mensagem} (linha {linha}, coluna {coluna})")
+        self.linha = linha
+        self.coluna = coluna
+
+
+def _varrer(texto: str, linha: int):
+    """Gera os tokens de um trecho de texto; retorna o número da linha seguinte"""
+    inicio_linha = 0
+    for match in REGEX_TOKEN.finditer(texto):
+        tipo_token = match.lastgroup
+        if tipo_token == 'ESPACO' or tipo_token == 'COMENTARIO':
+            continue
+        if tipo_token == 'NOVA_LINHA':
+            linha += 1
+            inicio_linha = match.end()
+            continue
+
+        valor_token = match.group()
+        coluna = match.start() - inicio_linha + 1
+        if tipo_token == 'PALAVRA':
+            tipo_token = PALAVRAS_CHAVE.get(valor_token)
+            if tipo_token is None:
+                raise ErroLexico(f"Palavra desconhecida: '{valor_token}'", linha, coluna)
+        elif tipo_token == 'TEXTO_ABERTO':
+            raise ErroLexico("Texto sem aspas de fechamento", linha, coluna)
+        elif tipo_token == 'INVALIDO':
+            raise ErroLexico(f"Caractere inesperado: {valor_token!r}", linha, coluna)
+
+        yield Token(tipo_token, valor_token, linha, coluna)
+    return linha
+
+
+def iter_tokens(fonte, tamanho_bloco: int = 1 << 16) -> Iterator[Token]:
+    """
+    Gera os tokens de um programa sob demanda.
+    `fonte` pode ser o texto do programa ou um arquivo aberto em modo texto,
+    que é lido em blocos de `tamanho_bloco` caracteres.
+    """
+    if isinstance(fonte, str):
+        yield from _varrer(fonte, 1)
+        return
+
+    linha = 1
+    resto = ''
+    while True:
+        bloco = fonte.read(tamanho_bloco)
+        if not bloco:
+            break
+        bloco = resto + bloco
+        # Nenhum token atravessa uma quebra de linha, então só as linhas
+        # completas do bloco são varridas; o restante espera o próximo bloco
+        corte = bloco.rfind('\n') + 1
+        if corte == 0:
+            resto = bloco
+            continue
+        resto = bloco[corte:]
+        linha = yield from _varrer(bloco[:corte], linha)
+    if resto:
+        yield from _varrer(resto, linha)
+
 
 class AnalisadorLexico:
     def __init__(self, texto: str):
@@ -17,68 +119,47 @@ class AnalisadorLexico:
         self.tokens = []
         
     def tokenizar(self) -> List[Token]:
-        # Padrões de tokens
-        padroes = [
-            ('PALAVRA_SET', r'INSERIR'),
-            ('PALAVRA_SENSOR', r'SENSOR'),
-            ('PALAVRA_ID', r'ID'),
-            ('PALAVRA_IF', r'SE'),
-            ('PALAVRA_THEN', r'ENTAO'),
-            ('PALAVRA_TURN_ON', r'LIGAR'),
-            ('PALAVRA_TURN_OFF', r'DESLIGAR'),
-            ('PALAVRA_WAIT', r'ESPERAR'),
-            ('PALAVRA_AND', r'E'), 
-            ('PALAVRA_OR', r'OU'),   
-            ('TEXTO', r'"[^"]*"'),
-            ('NUMERO', r'\d+'),
-            ('OPERADOR', r'[<>]=?|=='),
-            ('ESPACO', r'[ \t]+'),
-            ('NOVA_LINHA', r'\n'),
-        ]
-        
-        # Combinar padrões
-        regex_token = '|'.join(f'(?P<{nome}>{padrao})' for nome, padrao in padroes)
-        
-        for match in re.finditer(regex_token, self.texto):
-            tipo_token = match.lastgroup
-            valor_token = match.group()
-            
-            if tipo_token == 'NOVA_LINHA':
-                self.linha_atual += 1
-                continue
-            elif tipo_token == 'ESPACO':
-                continue
-                
-            self.tokens.append(Token(tipo_token, valor_token, self.linha_atual))
-            
+        self.tokens.extend(iter_tokens(self.texto))
+        if self.tokens:
+            self.linha_atual = self.tokens[-1].linha
         return self.tokens
 
 class AnalisadorSintatico:
-    def __init__(self, tokens: List[Token]):
-        self.tokens = tokens
+    def __init__(self, tokens: Iterable[Token]):
+        # Aceita tanto uma lista quanto um gerador (ex.: iter_tokens); os
+        # tokens são consumidos um a um, sem guardar a sequência inteira
+        self.tokens = iter(tokens)
+        self.atual: Optional[Token] = next(self.tokens, None)
         self.posicao = 0
         self.ast = []
         
     def analisar(self):
-        while self.posicao < len(self.tokens):
-            if self.token_atual().tipo == 'PALAVRA_SET':
-                self.ast.append(self.analisar_declaracao_sensor())
-            elif self.token_atual().tipo == 'PALAVRA_IF':
-                self.ast.append(self.analisar_regra())
-            elif self.token_atual().tipo == 'PALAVRA_WAIT':
-                self.ast.append(self.analisar_espera())
-            else:
-                raise SyntaxError(f"Token inesperado: {self.token_atual()}")
-                
+        self.ast.extend(self.iter_nos())
         return self.ast
+
+    def iter_nos(self) -> Iterator[Dict]:
+        """Gera os nós da AST à medida que os comandos são reconhecidos"""
+        while self.atual is not None:
+            if self.atual.tipo == 'PALAVRA_SET':
+                yield self.analisar_declaracao_sensor()
+            elif self.atual.tipo == 'PALAVRA_IF':
+                yield self.analisar_regra()
+            elif self.atual.tipo == 'PALAVRA_WAIT':
+                yield self.analisar_espera()
+            else:
+                raise SyntaxError(f"Token inesperado: {self.atual}")
     
     def token_atual(self) -> Token:
-        return self.tokens[self.posicao]
+        if self.atual is None:
+            raise SyntaxError("Fim inesperado do programa")
+        return self.atual
     
     def avancar(self):
+        self.atual = next(self.tokens, None)
         self.posicao += 1
         
     def analisar_declaracao_sensor(self):
+        linha = self.token_atual().linha
         self.avancar()  # pular INSERIR
         if self.token_atual().tipo != 'PALAVRA_SENSOR':
             raise SyntaxError("Esperava palavra-chave SENSOR")
@@ -98,13 +179,10 @@ class AnalisadorSintatico:
         id_sensor = int(self.token_atual().valor)
         self.avancar()
         
-        return {
-            'tipo': 'declaracao_sensor',
-            'nome': nome_sensor,
-            'id': id_sensor
-        }
+        return NoDeclaracaoSensor(nome_sensor, id_sensor, linha)
     
     def analisar_regra(self):
+        linha = self.token_atual().linha
         self.avancar()  # pular SE
         
         if self.token_atual().tipo != 'PALAVRA_SENSOR':
@@ -127,8 +205,9 @@ class AnalisadorSintatico:
         self.avancar()
         
         # Suporte para operadores lógicos E e OU
-        condicoes = [(operador, limite)]
-        while self.posicao < len(self.tokens) and self.token_atual().tipo in ['PALAVRA_AND', 'PALAVRA_OR']:
+        # Condições codificadas como inteiros: (op, limite, conectivo, op, limite, ...)
+        codigos = [CODIGO_OPERADOR[operador], limite]
+        while self.atual is not None and self.atual.tipo in ['PALAVRA_AND', 'PALAVRA_OR']:
             operador_logico = self.token_atual().tipo
             self.avancar()
             
@@ -142,7 +221,7 @@ class AnalisadorSintatico:
             novo_limite = int(self.token_atual().valor)
             self.avancar()
             
-            condicoes.append((operador_logico, novo_operador, novo_limite))
+            codigos += (CODIGO_CONECTIVO[operador_logico], CODIGO_OPERADOR[novo_operador], novo_limite)
         
         if self.token_atual().tipo != 'PALAVRA_THEN':
             raise SyntaxError("Esperava palavra-chave ENTAO")
@@ -158,15 +237,10 @@ class AnalisadorSintatico:
         alvo = self.token_atual().valor.strip('"')
         self.avancar()
         
-        return {
-            'tipo': 'regra',
-            'sensor_id': id_sensor,
-            'condicoes': condicoes,
-            'acao': acao,
-            'alvo': alvo
-        }
+        return NoRegra(id_sensor, codigos, acao, alvo, linha)
     
     def analisar_espera(self):
+        linha = self.token_atual().linha
         self.avancar()  # pular ESPERAR
         
         if self.token_atual().tipo != 'NUMERO':
@@ -174,61 +248,325 @@ class AnalisadorSintatico:
         duracao = int(self.token_atual().valor)
         self.avancar()
         
+        return NoEspera(duracao, linha)
+
+# Tipos dos eventos registrados pela MaquinaVirtual
+TIPO_DECLARACAO = 'declaracao'
+TIPO_LEITURA = 'leitura'
+TIPO_COMANDO = 'comando'
+TIPO_DISPARO = 'disparo'
+TIPO_ESPERA = 'espera'
+
+# Texto de cada tipo de evento, montado a partir dos argumentos do evento
+def _mensagem_comando(id_sensor, valor, alvo, ligado, linha, agrupada):
+    if ligado:
+        mensagem = f"🟢 Ligando o dispositivo: {alvo}"
+    else:
+        mensagem = f"🔴 Desligando o dispositivo: {alvo}"
+    if agrupada:
+        # Grupo de regras unidas: registrar a regra original que disparou
+        mensagem += f" (regra da linha {linha})"
+    return mensagem
+
+MENSAGENS_EVENTO = {
+    TIPO_DECLARACAO: lambda id_sensor, nome: f"✅ Sensor '{nome}' (ID: {id_sensor}) declarado com sucesso",
+    TIPO_LEITURA: lambda id_sensor, valor: f"📊 Leitura do sensor {id_sensor}: {valor}%",
+    TIPO_COMANDO: _mensagem_comando,
+    TIPO_DISPARO: lambda id_sensor, valor, alvo, ligado, linha, agrupada:
+        f"⚡ Regra da linha {linha} verdadeira: {'ligar' if ligado else 'desligar'} {alvo}",
+    TIPO_ESPERA: lambda duracao: f"⏳ Aguardando {duracao} segundos...",
+}
+# Campos estruturados de cada tipo de evento, a partir dos mesmos argumentos
+CAMPOS_EVENTO = {
+    TIPO_DECLARACAO: lambda id_sensor, nome: {'sensor': id_sensor},
+    TIPO_LEITURA: lambda id_sensor, valor: {'sensor': id_sensor, 'valor': valor},
+    TIPO_COMANDO: lambda id_sensor, valor, alvo, ligado, linha, agrupada: {
+        'sensor': id_sensor, 'valor': valor, 'dispositivo': alvo, 'ligado': ligado, 'linha': linha},
+    TIPO_DISPARO: lambda id_sensor, valor, alvo, ligado, linha, agrupada: {
+        'sensor': id_sensor, 'valor': valor, 'dispositivo': alvo, 'ligado': ligado, 'linha': linha},
+    TIPO_ESPERA: lambda duracao: {'valor': duracao},
+}
+
+# Diferença entre time.time_ns() e time.monotonic_ns() na carga do módulo
+ORIGEM_RELOGIO_NS = time.time_ns() - time.monotonic_ns()
+
+
+class EventoCompacto(NamedTuple):
+    """
+    Evento do modo de eventos compactos: (monotonic_ns, tipo, argumentos).
+    O texto e o dicionário do evento só são montados quando alguém os pede.
+    """
+    instante_ns: int
+    tipo: str
+    args: tuple
+
+    def instante(self) -> float:
+        """Instante do evento em segundos desde a época (como time.time())"""
+        return (self.instante_ns + ORIGEM_RELOGIO_NS) / 1e9
+
+    def mensagem(self) -> str:
+        return MENSAGENS_EVENTO[self.tipo](*self.args)
+
+    def campos(self) -> Dict:
+        return CAMPOS_EVENTO[self.tipo](*self.args)
+
+    def como_dict(self) -> Dict:
+        """O mesmo dicionário que registrar_evento monta no modo normal"""
+        instante = self.instante()
         return {
-            'tipo': 'espera',
-            'duracao': duracao
+            'timestamp': datetime.fromtimestamp(instante).strftime("%Y-%m-%d %H:%M:%S"),
+            'mensagem': self.mensagem(),
+            'instante': instante,
+            'tipo': self.tipo,
+            **self.campos()
         }
 
+
+# Decisão de uma regra verdadeira: (regra, regra original que disparou, valor lido)
+Decisao = Tuple[RegraCompilada, RegraCompilada, object]
+
+# Marca de "nenhuma leitura avaliada ainda" para a execução por ciclos
+_SEM_LEITURA = object()
+# Valor padrão de declarar_sensor: sortear uma leitura simulada
+_SIMULAR = object()
+
 class MaquinaVirtual:
-    def __init__(self, arquivo_log=None):
-        self.sensores = {}
-        self.dispositivos = {}
+    def __init__(self, arquivo_log=None, sensores: Optional[Dict[int, Dict]] = None, silencioso: bool = False,
+                 gravador=None, max_historico: int = 1000, diario=None, eventos_compactos: bool = False,
+                 relogio=None):
+        # `sensores` permite que várias máquinas compartilhem a mesma tabela
+        self.sensores = sensores if sensores is not None else {}
+        # Com um `diario` (DiarioEstado) cada mudança de estado é acrescentada
+        # ao diário e a máquina parte do último estado conhecido
+        self.diario = diario
+        self.dispositivos = dict(diario.dispositivos) if diario is not None else {}
+        self.silencioso = silencioso
         self.arquivo_log = arquivo_log or "sistema_irrigacao.log"
-        self.historico = []
+        # Com um `gravador` (ex.: GravadorLog) os eventos são gravados em segundo
+        # plano e o histórico em memória guarda só os `max_historico` mais recentes
+        self.gravador = gravador
+        # Modo headless: sem console, eventos guardados como EventoCompacto
+        # (sem texto nem data formatada) e histórico sempre limitado
+        self.eventos_compactos = eventos_compactos
+        if eventos_compactos:
+            self.silencioso = True
+        limitado = gravador is not None or eventos_compactos
+        self.historico = deque(maxlen=max_historico) if limitado else []
+        # Relógio usado nos eventos e nas esperas: o módulo time ou um relógio
+        # virtual com time(), sleep() e monotonic_ns() (ver reproducao.py)
+        self.relogio = relogio if relogio is not None else time
+        self.segundo_formatado = None
+        self.timestamp_formatado = ""
+        # Execução por ciclos: índice sensor -> regras (em ordem de programa),
+        # último valor avaliado de cada sensor, sensores alterados desde então
+        # e, por dispositivo, as regras cuja última avaliação foi verdadeira
+        self.regras_por_sensor: Dict[int, List] = {}
+        self.ultimos_valores: Dict[int, object] = {}
+        self.sensores_alterados = set()
+        self.regras_ativas: Dict[str, Dict[int, Decisao]] = {}
+        # Último ciclo: estado final decidido para cada dispositivo com regra
+        # verdadeira e, desses, os que mudaram de estado (os comandos emitidos)
+        self.decisoes_ciclo: Dict[str, bool] = {}
+        self.comandos_ciclo: Dict[str, bool] = {}
+        # Quantas vezes cada regra (linha) foi verdadeira
+        self.disparos = Counter()
         
     def executar(self, ast):
-        for node in ast:
-            if node['tipo'] == 'declaracao_sensor':
-                self.declarar_sensor(node)
-            elif node['tipo'] == 'regra':
-                self.executar_regra(node)
-            elif node['tipo'] == 'espera':
-                self.executar_espera(node)
-        
-        # Salvar histórico ao final da execução
+        for duracao in self.passos(ast):
+            self.relogio.sleep(duracao)
         self.salvar_historico()
+
+    async def executar_async(self, ast, salvar: bool = True):
+        """
+        Executa o programa dentro de um laço asyncio: cada ESPERAR vira um
+        temporizador aguardado, liberando o laço para outros programas. O
+        histórico é salvo em uma thread, sem bloquear o laço.
+        """
+        for duracao in self.passos(ast):
+            await asyncio.sleep(duracao)
+        if salvar:
+            await asyncio.get_running_loop().run_in_executor(None, self.salvar_historico)
+
+    def passos(self, ast) -> Iterator[int]:
+        """
+        Executa o programa em ordem e gera a duração de cada espera; quem
+        consome o gerador decide como aguardar (time.sleep ou asyncio.sleep)
+        e quando salvar o histórico. As regras entre duas esperas formam um ciclo: vale a última regra
+        verdadeira de cada dispositivo e só os que mudam são comandados.
+        """
+        decisoes: Dict[str, Decisao] = {}
+        for opcode, arg in compilar_programa(ast):
+            if opcode == OP_REGRA:
+                decisao = self.avaliar_regra(arg)
+                if decisao is not None:
+                    decisoes[arg.alvo] = decisao
+            elif opcode == OP_SENSOR:
+                self.declarar_sensor(arg)
+            elif opcode == OP_ESPERA:
+                self.aplicar_decisoes(decisoes)
+                decisoes = {}
+                yield self.anunciar_espera(arg)
+        self.aplicar_decisoes(decisoes)
                 
-    def declarar_sensor(self, node):
+    def carregar(self, ast, simular: bool = True):
+        """
+        Compila o programa para execução por ciclos: declara os sensores e
+        monta o índice de dependências sensor -> regras. Esperas são ignoradas.
+        Com `simular=False` os sensores começam sem leitura e só são avaliados
+        quando uma leitura real chega por atualizar_sensor; sensores que já
+        existem na tabela (compartilhada) mantêm o valor atual.
+        """
+        self.regras_por_sensor = {}
+        self.regras_ativas = {}
+        for indice, (opcode, arg) in enumerate(compilar_programa(ast)):
+            if opcode == OP_REGRA:
+                self.regras_por_sensor.setdefault(arg.sensor_id, []).append((indice, arg))
+            elif opcode == OP_SENSOR:
+                id_sensor = arg['id']
+                self.ultimos_valores.pop(id_sensor, None)
+                if simular:
+                    self.declarar_sensor(arg)
+                    self.sensores_alterados.add(id_sensor)
+                elif id_sensor not in self.sensores:
+                    # Sem leitura até chegar uma real, salvo a última conhecida no diário
+                    valor = self.diario.valor_sensor(id_sensor) if self.diario is not None else None
+                    self.declarar_sensor(arg, valor)
+                    if valor is not None:
+                        self.sensores_alterados.add(id_sensor)
+                elif self.sensores[id_sensor]['valor'] is not None:
+                    # Tabela compartilhada que já tem leitura para este sensor
+                    self.sensores_alterados.add(id_sensor)
+
+    def atualizar_sensor(self, id_sensor: int, valor):
+        """Registra uma nova leitura; o sensor só é reavaliado se o valor mudou"""
+        if id_sensor not in self.sensores:
+            raise RuntimeError(f"Erro: Sensor {id_sensor} não encontrado")
+        self.sensores[id_sensor]['valor'] = valor
+        self.anotar_sensor(id_sensor)
+        if self.ultimos_valores.get(id_sensor, _SEM_LEITURA) != valor:
+            self.sensores_alterados.add(id_sensor)
+        else:
+            self.sensores_alterados.discard(id_sensor)
+
+    def executar_ciclo(self, leituras: Optional[Dict[int, object]] = None) -> int:
+        """
+        Executa um ciclo reavaliando apenas as regras dos sensores cuja leitura
+        mudou desde o último ciclo. O estado final de cada dispositivo é o da
+        última regra verdadeira na ordem do programa, como numa passagem
+        completa, e é decidido antes de qualquer comando: cada dispositivo que
+        muda de estado recebe um único comando. Retorna o número de regras avaliadas.
+        """
+        for id_sensor, valor in (leituras or {}).items():
+            self.atualizar_sensor(id_sensor, valor)
+
+        alterados = self.sensores_alterados
+        self.sensores_alterados = set()
+        listas = [self.regras_por_sensor[s] for s in alterados if s in self.regras_por_sensor]
+        for id_sensor in alterados:
+            self.ultimos_valores[id_sensor] = self.sensores[id_sensor]['valor']
+
+        if len(listas) == 1:
+            afetadas = listas[0]
+        else:
+            afetadas = heapq.merge(*listas, key=lambda item: item[0])
+
+        avaliadas = 0
+        tocados = set()
+        for indice, regra in afetadas:
+            ativas = self.regras_ativas.setdefault(regra.alvo, {})
+            decisao = self.avaliar_regra(regra)
+            if decisao is not None:
+                ativas[indice] = decisao
+                tocados.add(regra.alvo)
+            elif ativas.pop(indice, None) is not None:
+                tocados.add(regra.alvo)
+            avaliadas += 1
+
+        # Regras de outros sensores que continuam verdadeiras e vêm depois no
+        # programa prevalecem, exatamente como numa reavaliação completa
+        decisoes = {}
+        for alvo in tocados:
+            ativas = self.regras_ativas[alvo]
+            if ativas:
+                decisoes[alvo] = ativas[max(ativas)]
+        self.decisoes_ciclo = {alvo: regra.ligar for alvo, (regra, _, _) in decisoes.items()}
+        self.comandos_ciclo = self.aplicar_decisoes(decisoes)
+        return avaliadas
+
+    def processar_leitura(self, id_sensor: int, valor) -> Dict[str, bool]:
+        """
+        Aplica uma leitura e executa as regras do sensor imediatamente.
+        Retorna a decisão do ciclo (alvo -> estado final), inclusive para os
+        dispositivos que já estavam nesse estado (ver comandos_ciclo).
+        """
+        self.atualizar_sensor(id_sensor, valor)
+        self.executar_ciclo()
+        return self.decisoes_ciclo
+
+    def declarar_sensor(self, node, valor=_SIMULAR):
         id_sensor = node['id']
         self.sensores[id_sensor] = {
             'nome': node['nome'],
-            'valor': random.randint(0, 100)  # Simular leitura do sensor
+            'valor': random.randint(0, 100) if valor is _SIMULAR else valor  # Simular leitura do sensor
         }
-        mensagem = f"✅ Sensor '{node['nome']}' (ID: {id_sensor}) declarado com sucesso"
-        print(mensagem)
-        self.registrar_evento(mensagem)
+        self.anotar_sensor(id_sensor)
+        self.notificar(TIPO_DECLARACAO, id_sensor, node['nome'])
         
+    def anotar_sensor(self, id_sensor: int):
+        if self.diario is not None:
+            sensor = self.sensores[id_sensor]
+            self.diario.registrar_sensor(id_sensor, sensor['nome'], sensor['valor'])
+
+    def definir_dispositivo(self, alvo: str, ligado: bool):
+        self.dispositivos[alvo] = ligado
+        if self.diario is not None:
+            self.diario.registrar_dispositivo(alvo, ligado)
+
     def executar_regra(self, node):
-        id_sensor = node['sensor_id']
+        self.executar_regra_compilada(compilar_regra(node))
+
+    def executar_regra_compilada(self, regra: RegraCompilada):
+        """Avalia a regra e, se for verdadeira, aplica sozinha a sua decisão"""
+        decisao = self.avaliar_regra(regra)
+        if decisao is None:
+            return False
+        self.aplicar_decisoes({regra.alvo: decisao})
+        return True
+
+    def avaliar_regra(self, regra: RegraCompilada) -> Optional[Decisao]:
+        """Decisão da regra com a leitura atual do sensor, sem aplicá-la"""
+        id_sensor = regra.sensor_id
         if id_sensor not in self.sensores:
             raise RuntimeError(f"Erro: Sensor {id_sensor} não encontrado")
             
         valor_sensor = self.sensores[id_sensor]['valor']
-        mensagem = f"📊 Leitura do sensor {id_sensor}: {valor_sensor}%"
-        print(mensagem)
-        self.registrar_evento(mensagem)
+        self.notificar(TIPO_LEITURA, id_sensor, valor_sensor)
         
-        condicao_satisfeita = self.avaliar_condicoes(valor_sensor, node['condicoes'])
-        
-        if condicao_satisfeita:
-            if node['acao'] == 'turn_on':
-                mensagem = f"🟢 Ligando o dispositivo: {node['alvo']}"
-                self.dispositivos[node['alvo']] = True
-            else:
-                mensagem = f"🔴 Desligando o dispositivo: {node['alvo']}"
-                self.dispositivos[node['alvo']] = False
-            print(mensagem)
-            self.registrar_evento(mensagem)
+        if regra.avaliar(valor_sensor):
+            disparadas = regra.regras_disparadas(valor_sensor)
+            # Todo disparo é registrado (inclusive cada membro verdadeiro de um
+            # grupo); só a decisão final do ciclo vira comando
+            for origem in disparadas:
+                self.disparos[origem.linha] += 1
+                self.notificar(TIPO_DISPARO, id_sensor, valor_sensor, regra.alvo, regra.ligar,
+                               origem.linha, origem is not regra)
+            return regra, disparadas[0], valor_sensor
+        return None
+
+    def aplicar_decisoes(self, decisoes: Dict[str, Decisao]) -> Dict[str, bool]:
+        """
+        Aplica o estado final decidido para cada dispositivo: um comando (e um
+        evento) por dispositivo que muda de estado. Retorna os comandados.
+        """
+        comandos = {}
+        for alvo, (regra, origem, valor_sensor) in decisoes.items():
+            if self.dispositivos.get(alvo) == regra.ligar:
+                continue
+            self.definir_dispositivo(alvo, regra.ligar)
+            self.notificar(TIPO_COMANDO, regra.sensor_id, valor_sensor, alvo, regra.ligar,
+                           origem.linha, origem is not regra)
+            comandos[alvo] = regra.ligar
+        return comandos
                 
     def avaliar_condicoes(self, valor, condicoes):
         resultado = self.avaliar_condicao(valor, condicoes[0][0], condicoes[0][1])
@@ -259,23 +597,79 @@ class MaquinaVirtual:
             raise RuntimeError(f"Erro: Operador desconhecido: {operador}")
             
     def executar_espera(self, node):
+        self.relogio.sleep(self.anunciar_espera(node))
+
+    def anunciar_espera(self, node) -> int:
         duracao = node['duracao']
-        mensagem = f"⏳ Aguardando {duracao} segundos..."
-        print(mensagem)
-        self.registrar_evento(mensagem)
-        time.sleep(duracao)
+        self.notificar(TIPO_ESPERA, duracao)
+        return duracao
+
+    def instante_atual(self) -> float:
+        """
+        Instante (segundos desde a época) no mesmo relógio que carimba os
+        eventos da máquina: time() ou, com eventos compactos, monotonic_ns().
+        """
+        if self.eventos_compactos:
+            return (self.relogio.monotonic_ns() + ORIGEM_RELOGIO_NS) / 1e9
+        return self.relogio.time()
+
+    def notificar(self, tipo: str, *args):
+        """
+        Evento de um dos tipos TIPO_*. No modo de eventos compactos só guarda a
+        tupla (sem montar texto); no modo normal equivale a emitir.
+        """
+        if self.eventos_compactos:
+            evento = EventoCompacto(self.relogio.monotonic_ns(), tipo, args)
+            self.historico.append(evento)
+            if self.gravador is not None:
+                self.gravador.registrar(evento)
+            return
+        self.emitir(MENSAGENS_EVENTO[tipo](*args), tipo, **CAMPOS_EVENTO[tipo](*args))
+        
+    def emitir(self, mensagem, tipo: Optional[str] = None, **dados):
+        """Exibe a mensagem no console (exceto no modo silencioso) e a registra"""
+        if not self.silencioso:
+            print(mensagem)
+        self.registrar_evento(mensagem, tipo, **dados)
+
+    def registrar_evento(self, mensagem, tipo: Optional[str] = None, **dados):
+        """
+        Registra o evento no histórico e no gravador. Além do texto, o evento
+        guarda o instante (time.time()), o tipo (TIPO_*) e os campos
+        estruturados (sensor, valor, dispositivo, ligado, linha).
+        """
+        instante = self.relogio.time()
+        segundo = int(instante)
+        if segundo != self.segundo_formatado:
+            # A data só muda de texto uma vez por segundo
+            self.segundo_formatado = segundo
+            self.timestamp_formatado = datetime.fromtimestamp(segundo).strftime("%Y-%m-%d %H:%M:%S")
+        evento = {
+            'timestamp': self.timestamp_formatado,
+            'mensagem': mensagem,
+            'instante': instante,
+            'tipo': tipo,
+            **dados
+        }
+        self.historico.append(evento)
+        if self.gravador is not None:
+            self.gravador.registrar(evento)
         
-    def registrar_evento(self, mensagem):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.historico.append({
-            'timestamp': timestamp,
-            'mensagem': mensagem
-        })
+    def salvar_historico(self, salvar_estado: bool = True):
+        # Com gravador, os eventos já foram gravados em segundo plano
+        if self.gravador is None:
+            with open(self.arquivo_log, 'a', encoding='utf-8') as f:
+                for evento in self.historico:
+                    if isinstance(evento, EventoCompacto):
+                        evento = evento.como_dict()
+                    f.write(f"{evento['timestamp']} - {evento['mensagem']}\n")
         
-    def salvar_historico(self):
-        with open(self.arquivo_log, 'a', encoding='utf-8') as f:
-            for evento in self.historico:
-                f.write(f"{evento['timestamp']} - {evento['mensagem']}\n")
+        # Com diário, as mudanças já foram acrescentadas a ele
+        if self.diario is not None:
+            self.diario.descarregar()
+            return
+        if not salvar_estado:
+            return
         
         # Salvar estado atual em JSON
         estado = {
@@ -283,26 +677,82 @@ class MaquinaVirtual:
             'dispositivos': self.dispositivos,
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
-        with open('estado_sistema.json', 'w', encoding='utf-8') as f:
-            json.dump(estado, f, ensure_ascii=False, indent=2)
+        gravar_json_atomico('estado_sistema.json', estado, indent=2)
+
+async def executar_programas_async(asts: List[List[Dict]]) -> List:
+    """
+    Executa vários programas intercalados em um único laço asyncio, cada um
+    com sua própria MaquinaVirtual e mantendo a ordem sequencial de cada um.
+    Retorna, para cada programa, a máquina usada ou a exceção que o encerrou.
+    Os históricos são acrescentados ao log depois que todos terminam, em uma
+    thread e um programa por vez; estado_sistema.json não é gravado (o estado
+    de cada programa está na sua máquina).
+    """
+    maquinas = [MaquinaVirtual() for _ in asts]
+    resultados = await asyncio.gather(
+        *(maquina.executar_async(ast, salvar=False) for maquina, ast in zip(maquinas, asts)),
+        return_exceptions=True
+    )
+    resultados = [erro if isinstance(erro, BaseException) else maquina
+                  for maquina, erro in zip(maquinas, resultados)]
+    concluidas = [maquina for maquina in resultados if isinstance(maquina, MaquinaVirtual)]
+    await asyncio.get_running_loop().run_in_executor(None, _salvar_historicos, concluidas)
+    return resultados
+
+def _salvar_historicos(maquinas: List[MaquinaVirtual]):
+    for maquina in maquinas:
+        maquina.salvar_historico(salvar_estado=False)
+
+def executar_programas(asts: List[List[Dict]]) -> List:
+    """Versão síncrona de executar_programas_async"""
+    return asyncio.run(executar_programas_async(asts))
+
+# Cache compartilhado de programas analisados. Para manter também uma cópia em
+# disco, substitua por CacheProgramas(diretorio=...).
+CACHE_PROGRAMAS = CacheProgramas()
+
+def analisar_programa(programa) -> Tuple[List[Dict], bool, List]:
+    """
+    Executa as análises léxica, sintática e semântica sem executar o programa.
+    Retorna (ast, sucesso, erros_semanticos); erros léxicos e sintáticos
+    são levantados como SyntaxError. Textos já analisados vêm do cache.
+    """
+    if isinstance(programa, str):
+        return CACHE_PROGRAMAS.obter_ou_analisar(programa, _analisar_programa)
+    return _analisar_programa(programa)
+
+def _analisar_programa(programa) -> Tuple[List[Dict], bool, List]:
+    ast = AnalisadorSintatico(iter_tokens(programa)).analisar()
+    sucesso, erros = AnalisadorSemantico().analisar(ast)
+    return ast, sucesso, erros
 
 def executar_sistema_irrigacao(programa: str):
     print("🌱 Iniciando Sistema de Irrigação")
     print("--------------------------------------------------\n")
     
-    print("📝 Realizando Análise Léxica...")
-    analisador_lexico = AnalisadorLexico(programa)
-    tokens = analisador_lexico.tokenizar()
-    
-    print("🔍 Analisando programa...")
-    analisador_sintatico = AnalisadorSintatico(tokens)
-    ast = analisador_sintatico.analisar()
-    
-    # Adicionar análise semântica
-    print("🔎 Realizando Análise Semântica...")
-    analisador_semantico = AnalisadorSemantico()
-    sucesso, erros = analisador_semantico.analisar(ast)
+    # Programas já analisados vêm direto do cache, sem repetir o front-end
+    resultado = CACHE_PROGRAMAS.obter(programa)
+    if resultado is not None:
+        print("⚡ Programa já analisado, usando o resultado em cache")
+        ast, sucesso, erros = resultado
+    else:
+        print("📝 Realizando Análise Léxica...")
+        tokens = iter_tokens(programa)
+        
+        print("🔍 Analisando programa...")
+        analisador_sintatico = AnalisadorSintatico(tokens)
+        ast = analisador_sintatico.analisar()
+        
+        # Adicionar análise semântica
+        print("🔎 Realizando Análise Semântica...")
+        analisador_semantico = AnalisadorSemantico()
+        sucesso, erros = analisador_semantico.analisar(ast)
+        CACHE_PROGRAMAS.guardar(programa, (ast, sucesso, erros))
     
+    executar_programa_analisado(ast, sucesso, erros)
+
+def executar_programa_analisado(ast, sucesso: bool, erros: List):
+    """Reporta os erros semânticos ou executa um programa já analisado"""
     if not sucesso:
         print("\n❌ Erros encontrados na análise semântica:")
         for erro in erros:
@@ -311,6 +761,12 @@ def executar_sistema_irrigacao(programa: str):
     
     print("✅ Análise semântica concluída com sucesso")
     
+    ast, alteracoes = otimizar_programa(ast)
+    if alteracoes:
+        print(f"\n🧹 Otimização: {len(alteracoes)} alteração(ões)")
+        for alteracao in alteracoes:
+            print(f"  - Linha {alteracao.linha}: {alteracao.mensagem}")
+    
     print("\n▶️ Executando programa...")
     maquina = MaquinaVirtual()
     try:
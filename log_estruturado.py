@@ -0,0 +1,188 @@
+"""
+Log de eventos estruturado em JSONL, com índice de tempo para consultas.
+
+Cada evento da MaquinaVirtual vira uma linha JSON com `ts` (segundos desde a
+época, nunca decrescente dentro do arquivo), `tipo` e os campos estruturados
+(sensor, valor, dispositivo, ligado, linha). Ao lado do log fica um índice
+esparso (<arquivo>.idx) com uma linha "ts posição" a cada `passo_indice`
+bytes; as consultas fazem busca binária no índice e leem só o trecho do log
+que interessa. Cópias rotacionadas (<arquivo>.1, .2, ..., cada uma com o seu
+índice) também são consultadas, da mais antiga para a atual.
+"""
+import bisect
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from gravador_log import GravadorLog
+from irrigation_dsl import TIPO_COMANDO
+
+SUFIXO_INDICE = ".idx"
+
+# Campos do evento da MaquinaVirtual que não vão para o JSONL
+CAMPOS_OMITIDOS = ('timestamp', 'instante', 'mensagem')
+
+
+class GravadorJSONL(GravadorLog):
+    """
+    GravadorLog que grava cada evento como uma linha JSON e mantém o índice
+    esparso de tempo. Eventos sem tipo levam também a mensagem de texto.
+    """
+
+    def __init__(self, arquivo: str = "sistema_irrigacao.jsonl", passo_indice: int = 64 * 1024, **opcoes):
+        self.passo_indice = passo_indice
+        self.ultimo_ts = 0.0
+        self.ultima_indexada: Optional[int] = None
+        if os.path.exists(arquivo) and os.path.getsize(arquivo):
+            # Continuação de um arquivo existente: o próximo índice vem após um passo
+            self.ultima_indexada = os.path.getsize(arquivo)
+        # O índice é esparso: o último instante gravado vem do fim do segmento
+        # mais recente com eventos (o atual ou, logo após uma rotação, a cópia)
+        for caminho in reversed(segmentos(arquivo)):
+            if os.path.exists(caminho) and os.path.getsize(caminho):
+                self.ultimo_ts = ultimo_instante(caminho)
+                break
+        self.indice = open(arquivo + SUFIXO_INDICE, 'a', encoding='utf-8')
+        super().__init__(arquivo, **opcoes)
+
+    def formatar(self, evento: Dict) -> str:
+        # Relógio de parede, mas nunca voltando no tempo: o arquivo fica ordenado
+        self.ultimo_ts = max(round(evento.get('instante') or time.time(), 6), self.ultimo_ts)
+        registro = {'ts': self.ultimo_ts}
+        registro.update((chave, valor) for chave, valor in evento.items()
+                        if chave not in CAMPOS_OMITIDOS and valor is not None)
+        if evento.get('tipo') is None:
+            registro['mensagem'] = evento['mensagem']
+        return json.dumps(registro, ensure_ascii=False) + "\n"
+
+    def linha_formatada(self, evento: Dict, posicao: int):
+        if self.ultima_indexada is None or posicao - self.ultima_indexada >= self.passo_indice:
+            self.indice.write(f"{self.ultimo_ts!r} {posicao}\n")
+            self.ultima_indexada = posicao
+
+    def lote_gravado(self):
+        # O índice só é gravado depois dos dados a que se refere
+        self.indice.flush()
+
+    def _rotacionar(self):
+        self.indice.close()
+        super()._rotacionar()
+        self.deslocar_copias(SUFIXO_INDICE)
+        self.indice = open(self.arquivo + SUFIXO_INDICE, 'a', encoding='utf-8')
+        self.ultima_indexada = None
+
+    def _encerrar(self):
+        super()._encerrar()
+        self.indice.close()
+
+
+def carregar_indice(arquivo: str) -> Tuple[List[float], List[int]]:
+    """Lê o índice esparso: listas paralelas de instantes e posições"""
+    instantes, posicoes = [], []
+    try:
+        with open(arquivo + SUFIXO_INDICE, encoding='utf-8') as f:
+            for linha in f:
+                partes = linha.split()
+                if len(partes) == 2:
+                    instantes.append(float(partes[0]))
+                    posicoes.append(int(partes[1]))
+    except FileNotFoundError:
+        pass
+    return instantes, posicoes
+
+
+def ultimo_instante(arquivo: str, bloco: int = 4096) -> float:
+    """
+    `ts` do último evento completo do arquivo (0.0 se não houver), lendo o
+    arquivo de trás para frente em blocos; uma última linha cortada é ignorada.
+    """
+    with open(arquivo, 'rb') as f:
+        fim = f.seek(0, os.SEEK_END)
+        resto = b''
+        while fim > 0:
+            inicio = max(0, fim - bloco)
+            f.seek(inicio)
+            linhas = (f.read(fim - inicio) + resto).split(b'\n')
+            fim = inicio
+            # A primeira linha do bloco pode continuar antes dele
+            resto = linhas.pop(0) if fim else b''
+            for linha in reversed(linhas):
+                try:
+                    return float(json.loads(linha)['ts'])
+                except (ValueError, KeyError, TypeError):
+                    continue
+    return 0.0
+
+
+def segmentos(arquivo: str) -> List[str]:
+    """O arquivo e as suas cópias rotacionadas, da mais antiga para a atual"""
+    copias = []
+    while os.path.exists(f"{arquivo}.{len(copias) + 1}"):
+        copias.append(f"{arquivo}.{len(copias) + 1}")
+    return copias[::-1] + [arquivo]
+
+
+def consultar(arquivo: str, inicio: float = float('-inf'), fim: float = float('inf'),
+              tipo: Optional[str] = None, **filtros) -> Iterator[Dict]:
+    """
+    Eventos com inicio <= ts <= fim, em ordem, incluindo as cópias
+    rotacionadas. Segmentos inteiros fora do intervalo são pulados; em cada
+    segmento a leitura começa na última entrada do índice anterior a `inicio`
+    e para no primeiro evento após `fim`.
+    Filtros opcionais: tipo e qualquer campo, ex.: dispositivo="Bomba 2".
+    """
+    caminhos = segmentos(arquivo)
+    indices = [carregar_indice(caminho) for caminho in caminhos]
+    for i, caminho in enumerate(caminhos):
+        instantes, posicoes = indices[i]
+        if instantes and instantes[0] > fim:
+            break
+        # Os instantes não decrescem entre segmentos: se o seguinte já começa
+        # antes de `inicio`, nada deste segmento entra na consulta
+        seguinte = indices[i + 1][0] if i + 1 < len(indices) else None
+        if seguinte and seguinte[0] < inicio:
+            continue
+        yield from _consultar_segmento(caminho, instantes, posicoes, inicio, fim, tipo, filtros)
+
+
+def _consultar_segmento(caminho: str, instantes: List[float], posicoes: List[int], inicio: float,
+                        fim: float, tipo: Optional[str], filtros: Dict) -> Iterator[Dict]:
+    entrada = bisect.bisect_left(instantes, inicio) - 1
+    posicao = posicoes[entrada] if entrada >= 0 else 0
+
+    with open(caminho, 'rb') as f:
+        f.seek(posicao)
+        for linha in f:
+            try:
+                evento = json.loads(linha)
+            except ValueError:
+                continue  # linha incompleta (gravação interrompida)
+            if evento['ts'] < inicio:
+                continue
+            if evento['ts'] > fim:
+                break
+            if tipo is not None and evento.get('tipo') != tipo:
+                continue
+            if all(evento.get(chave) == valor for chave, valor in filtros.items()):
+                yield evento
+
+
+def periodos_ligado(arquivo: str, dispositivo: str, inicio: float = float('-inf'),
+                    fim: float = float('inf')) -> List[Tuple[float, Optional[float]]]:
+    """
+    Períodos (ligado_em, desligado_em) do dispositivo no intervalo, a partir
+    dos eventos de comando. Um período ainda aberto termina em None.
+    """
+    periodos = []
+    ligado_em = None
+    for evento in consultar(arquivo, inicio, fim, tipo=TIPO_COMANDO, dispositivo=dispositivo):
+        if evento['ligado'] and ligado_em is None:
+            ligado_em = evento['ts']
+        elif not evento['ligado'] and ligado_em is not None:
+            periodos.append((ligado_em, evento['ts']))
+            ligado_em = None
+    if ligado_em is not None:
+        periodos.append((ligado_em, None))
+    return periodos
+
@@ -1,6 +1,6 @@
 import paho.mqtt.client as mqtt
 import json
-from typing import Callable, Dict
+from typing import Callable, Dict, Optional
 import time
 
 class MQTTHandler:
@@ -30,6 +30,9 @@ class MQTTHandler:
             self.client.subscribe("bomba1")
             self.client.subscribe("bomba2")
             self.client.subscribe("bomba3")
+            # Tópicos registrados dinamicamente (ex.: sensores de um programa DSL)
+            for topico in list(self.callbacks):
+                self.client.subscribe(topico)
         else:
             print(f"Falha na conexão com o broker MQTT. Código: {rc}")
     
@@ -77,11 +80,23 @@ class MQTTHandler:
     def registrar_callback(self, topico: str, callback: Callable):
         """Registra uma função de callback para um tópico específico"""
         self.callbacks[topico] = callback
-    
-    def publicar(self, topico: str, dados: dict):
-        """Publica dados em um tópico específico"""
+        if self.client.is_connected():
+            self.client.subscribe(topico)
+    
+    def remover_callback(self, topico: str, callback: Optional[Callable] = None):
+        """Remove o callback do tópico (só se ainda for `callback`, quando informado)"""
+        if callback is not None and self.callbacks.get(topico) is not callback:
+            return
+        if self.callbacks.pop(topico, None) is not None and self.client.is_connected():
+            self.client.unsubscribe(topico)
+    
+    def publicar(self, topico: str, dados):
+        """
+        Publica dados em um tópico específico: dicionários vão em JSON, textos
+        (ex.: os comandos "01"/"00" dos relés das bombas) vão como estão
+        """
         try:
-            payload = json.dumps(dados)
+            payload = dados if isinstance(dados, (str, bytes)) else json.dumps(dados)
             self.client.publish(topico, payload)
         except Exception as e:
             print(f"Erro ao publicar mensagem: {e}")
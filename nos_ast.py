@@ -0,0 +1,125 @@
+import sys
+from typing import Dict, List, Sequence, Tuple
+
+# Operadores de comparação e conectivos lógicos são guardados como inteiros
+# pequenos (índices nestas tuplas), que o Python compartilha entre todos os nós
+OPERADORES = ('<', '>', '<=', '>=', '==')
+CONECTIVOS = ('PALAVRA_AND', 'PALAVRA_OR')
+CODIGO_OPERADOR = {operador: codigo for codigo, operador in enumerate(OPERADORES)}
+CODIGO_CONECTIVO = {conectivo: codigo for codigo, conectivo in enumerate(CONECTIVOS)}
+CONECTIVO_E = CODIGO_CONECTIVO['PALAVRA_AND']
+CONECTIVO_OU = CODIGO_CONECTIVO['PALAVRA_OR']
+
+
+class No:
+    """
+    Base dos nós da AST. Os nós usam __slots__ (sem __dict__ por objeto), mas
+    continuam acessíveis como dicionários: node['tipo'], node.get('linha', 0).
+    """
+    __slots__ = ()
+    tipo = None
+    campos: Tuple[str, ...] = ()
+
+    def __getitem__(self, chave: str):
+        if chave == 'tipo' or chave in self.campos:
+            return getattr(self, chave)
+        raise KeyError(chave)
+
+    def get(self, chave: str, padrao=None):
+        try:
+            return self[chave]
+        except KeyError:
+            return padrao
+
+    def __contains__(self, chave: str) -> bool:
+        return chave == 'tipo' or chave in self.campos
+
+    def keys(self):
+        return ('tipo',) + self.campos
+
+    def para_dict(self) -> Dict:
+        return {chave: self[chave] for chave in self.keys()}
+
+    def __eq__(self, outro):
+        if isinstance(outro, (No, dict)):
+            return self.para_dict() == (outro.para_dict() if isinstance(outro, No) else outro)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.para_dict()!r})"
+
+    def __getstate__(self):
+        return tuple(getattr(self, campo) for campo in self.__slots__)
+
+    def __setstate__(self, estado):
+        for campo, valor in zip(self.__slots__, estado):
+            setattr(self, campo, valor)
+
+
+class NoDeclaracaoSensor(No):
+    __slots__ = ('nome', 'id', 'linha')
+    tipo = 'declaracao_sensor'
+    campos = ('nome', 'id', 'linha')
+
+    def __init__(self, nome: str, id: int, linha: int = 0):
+        self.nome = sys.intern(nome)
+        self.id = id
+        self.linha = linha
+
+
+class NoRegra(No):
+    """
+    Regra com a cadeia de condições codificada em uma única tupla plana de
+    inteiros: (op, limite, conectivo, op, limite, ...). A propriedade
+    `condicoes` reconstrói o formato original [(op, limite), (conectivo, op, limite), ...].
+    """
+    __slots__ = ('sensor_id', 'codigos', 'acao', 'alvo', 'linha')
+    tipo = 'regra'
+    campos = ('sensor_id', 'condicoes', 'acao', 'alvo', 'linha')
+
+    def __init__(self, sensor_id: int, codigos: Sequence[int], acao: str, alvo: str, linha: int = 0):
+        self.sensor_id = sensor_id
+        self.codigos = tuple(codigos)
+        self.acao = sys.intern(acao)
+        self.alvo = sys.intern(alvo)
+        self.linha = linha
+
+    @classmethod
+    def de_condicoes(cls, sensor_id: int, condicoes: List, acao: str, alvo: str, linha: int = 0) -> 'NoRegra':
+        return cls(sensor_id, codificar_condicoes(condicoes), acao, alvo, linha)
+
+    @property
+    def condicoes(self) -> List[Tuple]:
+        return decodificar_condicoes(self.codigos)
+
+
+class NoEspera(No):
+    __slots__ = ('duracao', 'linha')
+    tipo = 'espera'
+    campos = ('duracao', 'linha')
+
+    def __init__(self, duracao: int, linha: int = 0):
+        self.duracao = duracao
+        self.linha = linha
+
+
+def codificar_condicoes(condicoes: List) -> Tuple[int, ...]:
+    """Converte [(op, limite), (conectivo, op, limite), ...] para a tupla plana de códigos"""
+    try:
+        operador, limite = condicoes[0]
+        codigos = [CODIGO_OPERADOR[operador], limite]
+        for conectivo, operador, limite in condicoes[1:]:
+            codigos += (CODIGO_CONECTIVO[conectivo], CODIGO_OPERADOR[operador], limite)
+    except KeyError as e:
+        raise ValueError(f"Operador desconhecido: {e.args[0]}")
+    return tuple(codigos)
+
+
+def decodificar_condicoes(codigos: Sequence[int]) -> List[Tuple]:
+    """Inverso de codificar_condicoes"""
+    condicoes = [(OPERADORES[codigos[0]], codigos[1])]
+    for i in range(2, len(codigos), 3):
+        condicoes.append((CONECTIVOS[codigos[i]], OPERADORES[codigos[i + 1]], codigos[i + 2]))
+    return condicoes
@@ -0,0 +1,116 @@
+"""
+Otimização do programa entre a análise semântica e a execução.
+
+Cada cadeia de condições é convertida no conjunto de valores que a satisfaz
+(ver intervalos.py), o que permite:
+  - reescrever a cadeia na menor forma equivalente;
+  - remover regras que nunca disparam (conjunto vazio);
+  - remover regras redundantes: mesma ação, mesmo sensor e mesmo dispositivo
+    de uma regra anterior que já cobre todos os seus valores, sem nenhuma
+    outra regra sobre o dispositivo (nem nova declaração do sensor) entre as duas.
+O estado final dos dispositivos é o mesmo do programa original, tanto numa
+passagem completa quanto na execução por ciclos.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from intervalos import INFINITO, Conjunto, conjunto_condicoes, contem, formatar_conjunto
+from nos_ast import NoRegra
+
+
+@dataclass
+class AlteracaoOtimizacao:
+    linha: int
+    mensagem: str
+    tipo: str  # REGRA_IMPOSSIVEL, REGRA_REDUNDANTE ou CONDICOES_SIMPLIFICADAS
+
+
+def condicoes_do_conjunto(conjunto: Conjunto) -> List[Tuple]:
+    """
+    Menor cadeia de condições (avaliada da esquerda para a direita) que aceita
+    exatamente o conjunto. Os intervalos, em ordem crescente, viram
+    `>= a1 E <= b1 OU >= a2 E <= b2 ...`: cada OU acrescenta [a, +inf) e o E
+    seguinte corta só esse trecho, pois os intervalos anteriores terminam antes de a.
+    """
+    if not conjunto:
+        # Nenhum valor
+        return [('<', 0), ('PALAVRA_AND', '>', 0)]
+    termos = []
+    for intervalo in conjunto:
+        inicio, fechado_inicio, fim, fechado_fim = intervalo
+        if inicio == fim:
+            termos.append(('==', inicio))
+            continue
+        if inicio != -INFINITO:
+            termos.append(('>=' if fechado_inicio else '>', inicio))
+        if fim != INFINITO:
+            termos.append(('<=' if fechado_fim else '<', fim))
+    if not termos:
+        # Qualquer valor
+        return [('>=', 0), ('PALAVRA_OR', '<', 0)]
+
+    condicoes = [termos[0]]
+    for operador, limite in termos[1:]:
+        # Um limite inferior começa um novo intervalo (OU); um superior fecha o atual (E)
+        conectivo = 'PALAVRA_OR' if operador in ('>', '>=', '==') else 'PALAVRA_AND'
+        condicoes.append((conectivo, operador, limite))
+    return condicoes
+
+
+def otimizar_programa(ast: List) -> Tuple[List, List[AlteracaoOtimizacao]]:
+    """
+    Retorna a AST otimizada e a lista do que foi removido ou simplificado.
+    Os nós originais não são modificados (podem estar no cache de programas).
+    """
+    otimizada = []
+    alteracoes: List[AlteracaoOtimizacao] = []
+    # Última regra mantida de cada dispositivo: (nó, conjunto, geração do sensor)
+    ultima_por_alvo: Dict[str, Tuple] = {}
+    # Cada nova declaração de um sensor muda a leitura usada pelas regras seguintes
+    geracao_sensor: Dict[int, int] = {}
+
+    for node in ast:
+        if node['tipo'] == 'declaracao_sensor':
+            geracao_sensor[node['id']] = geracao_sensor.get(node['id'], 0) + 1
+        if node['tipo'] != 'regra':
+            otimizada.append(node)
+            continue
+
+        linha = node.get('linha', 0)
+        try:
+            conjunto = conjunto_condicoes(node['condicoes'])
+        except (ValueError, TypeError):
+            otimizada.append(node)
+            continue
+
+        if not conjunto:
+            alteracoes.append(AlteracaoOtimizacao(
+                linha, f"Regra removida: as condições nunca são verdadeiras ({node['alvo']})",
+                "REGRA_IMPOSSIVEL"))
+            continue
+
+        geracao = geracao_sensor.get(node['sensor_id'], 0)
+        anterior = ultima_por_alvo.get(node['alvo'])
+        if anterior is not None:
+            regra_anterior, conjunto_anterior, geracao_anterior = anterior
+            if (regra_anterior['sensor_id'] == node['sensor_id'] and geracao_anterior == geracao
+                    and regra_anterior['acao'] == node['acao'] and contem(conjunto_anterior, conjunto)):
+                alteracoes.append(AlteracaoOtimizacao(
+                    linha, f"Regra removida: já coberta pela regra da linha {regra_anterior.get('linha', 0)} "
+                           f"({node['alvo']}, {formatar_conjunto(conjunto)})",
+                    "REGRA_REDUNDANTE"))
+                continue
+
+        condicoes = node['condicoes']
+        simplificadas = condicoes_do_conjunto(conjunto)
+        if len(simplificadas) < len(condicoes):
+            node = NoRegra.de_condicoes(node['sensor_id'], simplificadas, node['acao'], node['alvo'], linha)
+            alteracoes.append(AlteracaoOtimizacao(
+                linha, f"Condições simplificadas de {len(condicoes)} para {len(simplificadas)} "
+                       f"termo(s): {formatar_conjunto(conjunto)}",
+                "CONDICOES_SIMPLIFICADAS"))
+
+        otimizada.append(node)
+        ultima_por_alvo[node['alvo']] = (node, conjunto, geracao)
+
+    return otimizada, alteracoes
@@ -0,0 +1,223 @@
+"""
+Reprodução determinística de leituras gravadas (backtesting).
+
+Um fluxo de leituras (ts, sensor_id, valor) vindo de CSV, JSONL ou do banco
+do HistoricoSQLite é aplicado às regras compiladas de um programa, em
+ordem, sobre um relógio virtual: nada espera de verdade, então a reprodução
+roda tão rápido quanto a CPU permitir. O resultado traz a linha do tempo de
+cada dispositivo, o tempo total ligado e quantas vezes cada regra disparou.
+
+Uso:
+    python reproducao.py programa.txt leituras.csv [--comparar novo.txt] [--saida relatorio.json]
+"""
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from execucao_reativa import extrair_valor
+from irrigation_dsl import MaquinaVirtual, ORIGEM_RELOGIO_NS, analisar_programa
+
+Leitura = Tuple[float, int, object]
+
+
+class RelogioVirtual:
+    """
+    Relógio com a interface usada pela MaquinaVirtual (time, sleep e
+    monotonic_ns). `sleep` só avança o relógio, sem esperar.
+    """
+
+    def __init__(self, inicio: float = 0.0):
+        self.agora = inicio
+
+    def time(self) -> float:
+        return self.agora
+
+    def sleep(self, segundos: float):
+        self.agora += segundos
+
+    def monotonic_ns(self) -> int:
+        # Para que EventoCompacto.instante() devolva o instante virtual
+        return int(self.agora * 1e9) - ORIGEM_RELOGIO_NS
+
+    def avancar_para(self, instante: float):
+        if instante < self.agora:
+            raise ValueError(f"Leitura fora de ordem: {instante} é anterior a {self.agora}")
+        self.agora = instante
+
+
+def _campo(registro: Dict, *nomes):
+    for nome in nomes:
+        if nome in registro:
+            return registro[nome]
+    raise ValueError(f"Leitura sem o campo '{nomes[0]}': {registro}")
+
+
+def _leitura(registro: Dict) -> Leitura:
+    return (float(_campo(registro, 'ts', 'instante')),
+            int(_campo(registro, 'sensor_id', 'sensor')),
+            extrair_valor(_campo(registro, 'valor', 'value')))
+
+
+def ler_leituras(caminho: str) -> Iterator[Leitura]:
+    """
+    Leituras gravadas em ordem de tempo. O formato vem da extensão: .csv (com
+    cabeçalho ts,sensor_id,valor), .jsonl (um objeto por linha, mesmos campos;
+    `value` e `sensor` também são aceitos) ou .db (tabela `leituras` do HistoricoSQLite).
+    """
+    if caminho.endswith(('.db', '.sqlite')):
+        conexao = sqlite3.connect(caminho)
+        try:
+            for ts, id_sensor, valor in conexao.execute("SELECT ts, sensor_id, valor FROM leituras ORDER BY ts"):
+                yield ts, id_sensor, extrair_valor(valor)
+        finally:
+            conexao.close()
+    elif caminho.endswith('.csv'):
+        with open(caminho, newline='', encoding='utf-8') as f:
+            for registro in csv.DictReader(f):
+                yield _leitura(registro)
+    else:
+        with open(caminho, encoding='utf-8') as f:
+            for linha in f:
+                if linha.strip():
+                    yield _leitura(json.loads(linha))
+
+
+@dataclass
+class ResultadoReproducao:
+    leituras: int
+    ignoradas: int                                      # leituras de sensores fora do programa
+    inicio: Optional[float]
+    fim: Optional[float]
+    linhas_do_tempo: Dict[str, List[Tuple[float, bool]]]  # dispositivo -> [(ts, ligado)]
+    tempo_ligado: Dict[str, float]                      # dispositivo -> segundos ligado
+    disparos: Dict[int, int]                            # linha da regra -> disparos
+    tempo_execucao: float
+
+    def para_dict(self) -> Dict:
+        return asdict(self)
+
+
+def reproduzir(ast: List[Dict], leituras: Iterable[Leitura]) -> ResultadoReproducao:
+    """
+    Aplica as leituras às regras do programa na ordem gravada, como a execução
+    reativa faria (ESPERAR é ignorado, como em MaquinaVirtual.carregar).
+    """
+    relogio = RelogioVirtual()
+    maquina = MaquinaVirtual(eventos_compactos=True, relogio=relogio)
+    maquina.carregar(ast, simular=False)
+    sensores = maquina.sensores
+
+    linhas_do_tempo: Dict[str, List[Tuple[float, bool]]] = {}
+    inicio = None
+    aplicadas = ignoradas = 0
+    comeco = time.perf_counter()
+    for ts, id_sensor, valor in leituras:
+        if inicio is None:
+            inicio = relogio.agora = ts
+        relogio.avancar_para(ts)
+        if id_sensor not in sensores:
+            ignoradas += 1
+            continue
+        maquina.atualizar_sensor(id_sensor, valor)
+        maquina.executar_ciclo()
+        aplicadas += 1
+        for alvo, ligado in maquina.comandos_ciclo.items():
+            linhas_do_tempo.setdefault(alvo, []).append((ts, ligado))
+    fim = relogio.agora if inicio is not None else None
+
+    return ResultadoReproducao(
+        leituras=aplicadas,
+        ignoradas=ignoradas,
+        inicio=inicio,
+        fim=fim,
+        linhas_do_tempo=linhas_do_tempo,
+        tempo_ligado={alvo: tempo_ligado(linha, fim) for alvo, linha in linhas_do_tempo.items()},
+        disparos=dict(sorted(maquina.disparos.items())),
+        tempo_execucao=time.perf_counter() - comeco,
+    )
+
+
+def tempo_ligado(linha_do_tempo: List[Tuple[float, bool]], fim: float) -> float:
+    """Soma dos períodos ligados; um período ainda aberto termina em `fim`"""
+    total = 0.0
+    ligado_em = None
+    for ts, ligado in linha_do_tempo:
+        if ligado and ligado_em is None:
+            ligado_em = ts
+        elif not ligado and ligado_em is not None:
+            total += ts - ligado_em
+            ligado_em = None
+    if ligado_em is not None:
+        total += fim - ligado_em
+    return total
+
+
+def comparar(atual: ResultadoReproducao, novo: ResultadoReproducao) -> Dict[str, Dict]:
+    """Diferença por dispositivo entre duas reproduções das mesmas leituras"""
+    diferencas = {}
+    for alvo in sorted(set(atual.linhas_do_tempo) | set(novo.linhas_do_tempo)):
+        antes, depois = atual.tempo_ligado.get(alvo, 0.0), novo.tempo_ligado.get(alvo, 0.0)
+        diferencas[alvo] = {
+            'tempo_ligado': (antes, depois),
+            'diferenca': depois - antes,
+            'acionamentos': (sum(1 for _, ligado in atual.linhas_do_tempo.get(alvo, []) if ligado),
+                             sum(1 for _, ligado in novo.linhas_do_tempo.get(alvo, []) if ligado)),
+        }
+    return diferencas
+
+
+def _carregar_programa(caminho: str) -> List[Dict]:
+    with open(caminho, encoding='utf-8') as f:
+        ast, sucesso, erros = analisar_programa(f.read())
+    if not sucesso:
+        detalhes = "\n".join(f"  - Linha {erro.linha}: {erro.mensagem}" for erro in erros)
+        raise ValueError(f"{caminho} tem erros semânticos:\n{detalhes}")
+    return ast
+
+
+def mostrar_resultado(nome: str, resultado: ResultadoReproducao):
+    print(f"📼 {nome}: {resultado.leituras:,} leituras em {resultado.tempo_execucao:.3f}s", file=sys.stderr)
+    for alvo, segundos in resultado.tempo_ligado.items():
+        acionamentos = sum(1 for _, ligado in resultado.linhas_do_tempo[alvo] if ligado)
+        print(f"  - {alvo}: {segundos / 3600:.2f} h ligado, {acionamentos} acionamento(s)", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reproduz leituras gravadas sobre um programa da DSL")
+    parser.add_argument('programa', help="arquivo do programa")
+    parser.add_argument('leituras', help="leituras gravadas (.csv, .jsonl ou .db do HistoricoSQLite)")
+    parser.add_argument('--comparar', help="outro programa reproduzido com as mesmas leituras")
+    parser.add_argument('--saida', help="arquivo do relatório JSON (padrão: saída padrão)")
+    args = parser.parse_args(argv)
+
+    try:
+        programas = {args.programa: _carregar_programa(args.programa)}
+        if args.comparar:
+            programas[args.comparar] = _carregar_programa(args.comparar)
+        resultados = {nome: reproduzir(ast, ler_leituras(args.leituras)) for nome, ast in programas.items()}
+    except (SyntaxError, ValueError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    for nome, resultado in resultados.items():
+        mostrar_resultado(nome, resultado)
+    relatorio = {nome: resultado.para_dict() for nome, resultado in resultados.items()}
+    if args.comparar:
+        relatorio['comparacao'] = comparar(resultados[args.programa], resultados[args.comparar])
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(relatorio, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,11 @@
 from typing import List, Dict, Set, Tuple, Optional
 from dataclasses import dataclass
 from tokens import Token
+from nos_ast import CODIGO_OPERADOR
+from intervalos import conjunto_condicoes, formatar_conjunto, sobreposicoes
+
+# Limite do tempo total de espera de um programa, em segundos (1 hora)
+TEMPO_MAXIMO = 3600
 
 @dataclass
 class ErroSemantico:
@@ -9,236 +14,356 @@ class ErroSemantico:
     tipo: str
 
 class AnalisadorSemantico:
+    """
+    Análise semântica de um programa. Além de analisar(ast), aceita mudanças
+    pontuais com adicionar_no/remover_no: cada uma reavalia só as regras do
+    sensor afetado, o conjunto de conflitos do dispositivo afetado e o total
+    de espera, e coletar_erros monta a lista atual de erros.
+
+    Os erros guardam o nó de origem e a linha é lida na coleta, então nós cuja
+    linha mudou (linhas inseridas acima deles) não precisam ser reavaliados.
+
+    A interface anterior (verificar_*, sensores_declarados, regras...) continua
+    disponível sobre esse mesmo estado: os métodos verificar_* incluem o nó e
+    acrescentam os erros dele em self.erros, como antes.
+    """
+
     def __init__(self):
-        self.sensores_declarados: Dict[int, Dict] = {}
-        self.dispositivos_utilizados: Set[str] = set()
         self.erros: List[ErroSemantico] = []
-        self.regras: List[Dict] = []
         self.tempo_total: int = 0
+        self.ordem: Dict[int, int] = {}                        # id(nó) -> ordem de inserção
+        self.declaracoes: Dict[int, List] = {}                 # sensor -> declarações em ordem
+        self.declarados: Dict[int, Dict] = {}                  # sensor -> declaração válida
+        self.regras_sensor: Dict[int, List] = {}               # sensor -> regras em ordem
+        self.regras_grupo: Dict[Tuple[int, str], List] = {}    # (sensor, dispositivo) -> regras
+        self.erros_locais: Dict[int, List[Tuple[str, str]]] = {}   # id(regra) -> erros da regra
+        self.erros_espera: Dict[int, List[Tuple[object, str, str]]] = {}
+        self.erros_sensor: Dict[int, List[Tuple[object, str, str]]] = {}
+        self.nao_utilizados: Dict[int, str] = {}               # sensor -> nome
+        self.conflitos: Dict[Tuple[int, str], List[Tuple]] = {}
+        self.contador = 0
 
     def analisar(self, ast: List[Dict]) -> Tuple[bool, List[ErroSemantico]]:
         """
         Realiza a análise semântica completa do AST.
         Retorna uma tupla (sucesso, lista_de_erros)
         """
-        # Primeira passagem: coletar declarações e verificar estrutura básica
-        for node in ast:
-            if node['tipo'] == 'declaracao_sensor':
-                self.verificar_declaracao_sensor(node)
-            elif node['tipo'] == 'regra':
-                self.verificar_regra(node)
-                self.regras.append(node)
-            elif node['tipo'] == 'espera':
-                self.verificar_espera(node)
-
-        # Segunda passagem: verificações de contexto e consistência
-        self.verificar_consistencia_global()
-        
+        self.aplicar_alteracoes([], ast)
+        self.erros = self.coletar_erros()
         return len(self.erros) == 0, self.erros
 
-    def verificar_declaracao_sensor(self, node: Dict):
-        """Verifica a declaração de um sensor"""
-        id_sensor = node['id']
-        nome_sensor = node['nome']
-
-        # Verificar ID único
-        if id_sensor in self.sensores_declarados:
-            self.adicionar_erro(
-                node.get('linha', 0),
-                f"O sensor com ID {id_sensor} já foi declarado anteriormente",
-                "ID_DUPLICADO"
-            )
-            return
-
-        # Verificar nome válido
-        if not nome_sensor or len(nome_sensor.strip()) == 0:
-            self.adicionar_erro(
-                node.get('linha', 0),
-                "O nome do sensor não pode estar vazio",
-                "NOME_INVALIDO"
-            )
-            return
-
-        # Verificar ID válido
-        if id_sensor <= 0:
-            self.adicionar_erro(
-                node.get('linha', 0),
-                f"O ID do sensor deve ser um número positivo, recebido: {id_sensor}",
-                "ID_INVALIDO"
-            )
-            return
-
-        self.sensores_declarados[id_sensor] = {
-            'nome': nome_sensor,
-            'regras': []
-        }
-
-    def verificar_regra(self, node: Dict):
-        """Verifica uma regra de controle"""
-        sensor_id = node['sensor_id']
-        condicoes = node['condicoes']
-        acao = node['acao']
-        alvo = node['alvo']
-
-        # Verificar se o sensor existe
-        if sensor_id not in self.sensores_declarados:
-            self.adicionar_erro(
-                node.get('linha', 0),
-                f"O sensor {sensor_id} não foi declarado antes de ser usado",
-                "SENSOR_NAO_DECLARADO"
-            )
-            return
+    def chave(self, node) -> Tuple[int, int]:
+        """Posição do nó no programa: linha e, na mesma linha, ordem de inserção"""
+        return node.get('linha', 0), self.ordem[id(node)]
 
-        # Verificar condições
-        self.verificar_condicoes(condicoes, node.get('linha', 0))
+    def adicionar_no(self, node):
+        """Inclui um nó (declaração, regra ou espera) e reavalia o que depende dele"""
+        self.aplicar_alteracoes([], [node])
 
-        # Verificar ação e alvo
-        if acao not in ['turn_on', 'turn_off']:
-            self.adicionar_erro(
-                node.get('linha', 0),
-                f"Ação inválida: {acao}. Use 'turn_on' ou 'turn_off'",
-                "ACAO_INVALIDA"
-            )
+    def remover_no(self, node):
+        """Retira um nó incluído anteriormente e reavalia o que dependia dele"""
+        self.aplicar_alteracoes([node], [])
 
-        if not alvo or len(alvo.strip()) == 0:
-            self.adicionar_erro(
-                node.get('linha', 0),
-                "O nome do dispositivo não pode estar vazio",
-                "ALVO_INVALIDO"
-            )
-
-        self.dispositivos_utilizados.add(alvo)
-        self.sensores_declarados[sensor_id]['regras'].append(node)
+    def aplicar_alteracoes(self, removidos: List, adicionados: List):
+        """
+        Aplica um lote de remoções e inclusões de nós. Cada sensor e cada par
+        (sensor, dispositivo) afetado é reavaliado uma única vez no final.
+        """
+        sensores: Set[int] = set()
+        grupos: Set[Tuple[int, str]] = set()
 
-    def verificar_condicoes(self, condicoes: List, linha: int):
-        """Verifica as condições de uma regra"""
+        for node in removidos:
+            if node['tipo'] == 'declaracao_sensor':
+                self._retirar(self.declaracoes, node['id'], node)
+                sensores.add(node['id'])
+            elif node['tipo'] == 'regra':
+                grupo = (node['sensor_id'], node['alvo'])
+                self._retirar(self.regras_sensor, node['sensor_id'], node)
+                self._retirar(self.regras_grupo, grupo, node)
+                sensores.add(node['sensor_id'])
+                grupos.add(grupo)
+            elif node['tipo'] == 'espera':
+                self.erros_espera.pop(id(node), None)
+                self.tempo_total -= node['duracao']
+            self.erros_locais.pop(id(node), None)
+            del self.ordem[id(node)]
+
+        for node in adicionados:
+            self.ordem[id(node)] = self.contador
+            self.contador += 1
+            if node['tipo'] == 'declaracao_sensor':
+                self._inserir(self.declaracoes.setdefault(node['id'], []), node)
+                sensores.add(node['id'])
+            elif node['tipo'] == 'regra':
+                grupo = (node['sensor_id'], node['alvo'])
+                self.erros_locais[id(node)] = self.erros_regra(node)
+                self._inserir(self.regras_sensor.setdefault(node['sensor_id'], []), node)
+                self.regras_grupo.setdefault(grupo, []).append(node)
+                sensores.add(node['sensor_id'])
+                grupos.add(grupo)
+            elif node['tipo'] == 'espera':
+                erros = self.erros_espera_no(node)
+                if erros:
+                    self.erros_espera[id(node)] = [(node, mensagem, tipo) for mensagem, tipo in erros]
+                self.tempo_total += node['duracao']
+
+        for sensor_id in sensores:
+            self.reavaliar_sensor(sensor_id)
+        for grupo in grupos:
+            self.reavaliar_conflitos(grupo)
+
+    def _inserir(self, lista: List, node):
+        """Insere o nó mantendo a lista em ordem de posição (em geral, no fim)"""
+        posicao = len(lista)
+        chave = self.chave(node)
+        while posicao > 0 and self.chave(lista[posicao - 1]) > chave:
+            posicao -= 1
+        lista.insert(posicao, node)
+
+    @staticmethod
+    def _retirar(indice: Dict, chave, node):
+        """Remove o nó (pela identidade) da lista indice[chave]"""
+        lista = indice[chave]
+        del lista[next(i for i, outro in enumerate(lista) if outro is node)]
+        if not lista:
+            del indice[chave]
+
+    def reavaliar_sensor(self, sensor_id: int):
+        """
+        Refaz os erros que dependem das declarações do sensor: ID duplicado,
+        regras que usam o sensor antes da declaração e sensor sem regras.
+        """
+        erros = []
+        declarado = None
+        for node in self.declaracoes.get(sensor_id, []):
+            if declarado is not None:
+                erros.append((node, f"O sensor com ID {sensor_id} já foi declarado anteriormente", "ID_DUPLICADO"))
+            elif not node['nome'] or len(node['nome'].strip()) == 0:
+                erros.append((node, "O nome do sensor não pode estar vazio", "NOME_INVALIDO"))
+            elif sensor_id <= 0:
+                erros.append((node, f"O ID do sensor deve ser um número positivo, recebido: {sensor_id}", "ID_INVALIDO"))
+            else:
+                declarado = node
+
+        utilizado = False
+        for node in self.regras_sensor.get(sensor_id, []):
+            if declarado is None or self.chave(node) < self.chave(declarado):
+                erros.append((node, f"O sensor {sensor_id} não foi declarado antes de ser usado", "SENSOR_NAO_DECLARADO"))
+            else:
+                utilizado = True
+                erros.extend((node, mensagem, tipo) for mensagem, tipo in self.erros_locais[id(node)])
+
+        self.erros_sensor[sensor_id] = erros
+        if not erros:
+            del self.erros_sensor[sensor_id]
+        if declarado is not None:
+            self.declarados[sensor_id] = declarado
+        else:
+            self.declarados.pop(sensor_id, None)
+        if declarado is not None and not utilizado:
+            self.nao_utilizados[sensor_id] = declarado['nome']
+        else:
+            self.nao_utilizados.pop(sensor_id, None)
+
+    def erros_regra(self, node: Dict) -> List[Tuple[str, str]]:
+        """Erros de condições, ação e alvo de uma regra de controle"""
+        erros = self.erros_condicoes(node['condicoes'])
+
+        if node['acao'] not in ['turn_on', 'turn_off']:
+            erros.append((f"Ação inválida: {node['acao']}. Use 'turn_on' ou 'turn_off'", "ACAO_INVALIDA"))
+
+        if not node['alvo'] or len(node['alvo'].strip()) == 0:
+            erros.append(("O nome do dispositivo não pode estar vazio", "ALVO_INVALIDO"))
+
+        return erros
+
+    def erros_condicoes(self, condicoes: List) -> List[Tuple[str, str]]:
+        """Erros das condições de uma regra"""
         if not condicoes:
-            self.adicionar_erro(
-                linha,
-                "A regra deve ter pelo menos uma condição",
-                "CONDICAO_VAZIA"
-            )
-            return
+            return [("A regra deve ter pelo menos uma condição", "CONDICAO_VAZIA")]
 
         # Verificar primeira condição
         operador, limite = condicoes[0]
-        self.verificar_operador_limite(operador, limite, linha)
+        erros = self.erros_operador_limite(operador, limite)
 
         # Verificar condições adicionais
         for i in range(1, len(condicoes)):
             op_logico, operador, limite = condicoes[i]
-            
+
             if op_logico not in ['PALAVRA_AND', 'PALAVRA_OR']:
-                self.adicionar_erro(
-                    linha,
-                    f"Operador lógico inválido: {op_logico}. Use 'AND' ou 'OR'",
-                    "OPERADOR_LOGICO_INVALIDO"
-                )
+                erros.append((f"Operador lógico inválido: {op_logico}. Use 'AND' ou 'OR'", "OPERADOR_LOGICO_INVALIDO"))
 
-            self.verificar_operador_limite(operador, limite, linha)
+            erros.extend(self.erros_operador_limite(operador, limite))
+        return erros
 
-    def verificar_operador_limite(self, operador: str, limite: int, linha: int):
-        """Verifica um operador e seu limite"""
+    def erros_operador_limite(self, operador: str, limite: int) -> List[Tuple[str, str]]:
+        """Erros de um operador e seu limite"""
+        erros = []
         if operador not in ['<', '>', '<=', '>=', '==']:
-            self.adicionar_erro(
-                linha,
-                f"Operador inválido: {operador}. Use '<', '>', '<=', '>=' ou '=='",
-                "OPERADOR_INVALIDO"
-            )
+            erros.append((f"Operador inválido: {operador}. Use '<', '>', '<=', '>=' ou '=='", "OPERADOR_INVALIDO"))
 
         if not isinstance(limite, (int, float)) or limite < 0 or limite > 100:
-            self.adicionar_erro(
-                linha,
-                f"O limite deve ser um número entre 0 e 100, recebido: {limite}",
-                "LIMITE_INVALIDO"
-            )
+            erros.append((f"O limite deve ser um número entre 0 e 100, recebido: {limite}", "LIMITE_INVALIDO"))
+        return erros
 
-    def verificar_espera(self, node: Dict):
-        """Verifica um comando de espera"""
+    def erros_espera_no(self, node: Dict) -> List[Tuple[str, str]]:
+        """Erros de um comando de espera"""
         duracao = node['duracao']
 
         if not isinstance(duracao, (int, float)) or duracao <= 0:
-            self.adicionar_erro(
-                node.get('linha', 0),
-                f"A duração deve ser um número positivo, recebido: {duracao}",
-                "DURACAO_INVALIDA"
-            )
-
-        self.tempo_total += duracao
+            return [(f"A duração deve ser um número positivo, recebido: {duracao}", "DURACAO_INVALIDA")]
+        return []
 
-    def verificar_consistencia_global(self):
-        """Realiza verificações de consistência global"""
-        # Verificar regras conflitantes
-        self.verificar_regras_conflitantes()
+    def reavaliar_conflitos(self, grupo: Tuple[int, str]):
+        """
+        Verifica se regras de ligar e desligar o mesmo dispositivo, sobre o
+        mesmo sensor, valem ao mesmo tempo para algum valor. Cada cadeia de
+        condições vira um conjunto de intervalos e as sobreposições saem de
+        uma varredura ordenada em O(n log n), em vez de comparar todos os pares.
+        """
+        regras_ligar, regras_desligar = [], []
+        for regra in self.regras_grupo.get(grupo, []):
+            if regra['acao'] not in ('turn_on', 'turn_off') or not self.condicoes_validas(regra['condicoes']):
+                continue
+            (regras_ligar if regra['acao'] == 'turn_on' else regras_desligar).append(regra)
+
+        self.conflitos.pop(grupo, None)
+        if not regras_ligar or not regras_desligar:
+            return
+        encontradas = sobreposicoes(
+            [conjunto_condicoes(r['condicoes']) for r in regras_ligar],
+            [conjunto_condicoes(r['condicoes']) for r in regras_desligar]
+        )
+        if encontradas:
+            self.conflitos[grupo] = [(regras_ligar[i], regras_desligar[j], valores)
+                                     for (i, j), valores in encontradas.items()]
+
+    def condicoes_validas(self, condicoes: List) -> bool:
+        """Verifica se a cadeia de condições pode ser convertida em intervalos"""
+        if not condicoes:
+            return False
+        operadores = [condicoes[0][0]] + [c[1] for c in condicoes[1:]]
+        limites = [condicoes[0][1]] + [c[2] for c in condicoes[1:]]
+        return (all(op in CODIGO_OPERADOR for op in operadores)
+                and all(isinstance(limite, (int, float)) for limite in limites))
 
-        # Verificar tempo total
-        if self.tempo_total > 3600:  # 1 hora
-            self.adicionar_erro(
+    def coletar_erros(self) -> List[ErroSemantico]:
+        """
+        Monta a lista de erros do estado atual: erros dos nós em ordem de
+        posição, depois conflitos, tempo total e sensores não utilizados.
+        O custo depende do número de erros, não do tamanho do programa.
+        """
+        pendentes = [erro for erros in self.erros_sensor.values() for erro in erros]
+        pendentes += [erro for erros in self.erros_espera.values() for erro in erros]
+        pendentes.sort(key=lambda erro: self.chave(erro[0]))
+        erros = [ErroSemantico(node.get('linha', 0), mensagem, tipo) for node, mensagem, tipo in pendentes]
+        return erros + self.erros_globais()
+
+    def erros_conflitos(self) -> List[ErroSemantico]:
+        """Regras de ligar e desligar o mesmo dispositivo que valem ao mesmo tempo"""
+        conflitos = []
+        for (sensor_id, dispositivo), pares in self.conflitos.items():
+            for regra_ligar, regra_desligar, valores in pares:
+                linha_ligar = regra_ligar.get('linha', 0)
+                linha_desligar = regra_desligar.get('linha', 0)
+                conflitos.append(ErroSemantico(
+                    max(linha_ligar, linha_desligar),
+                    f"O dispositivo '{dispositivo}' é ligado (linha {linha_ligar}) e desligado "
+                    f"(linha {linha_desligar}) pelo sensor {sensor_id} quando {formatar_conjunto(valores)}",
+                    "REGRAS_CONFLITANTES"
+                ))
+        return sorted(conflitos, key=lambda erro: erro.linha)
+
+    def erros_globais(self) -> List[ErroSemantico]:
+        """Erros que não pertencem a um nó: conflitos, tempo total e sensores não utilizados"""
+        erros = self.erros_conflitos()
+        if self.tempo_total > TEMPO_MAXIMO:
+            erros.append(ErroSemantico(
                 0,
                 f"O tempo total de espera ({self.tempo_total}s) excede o limite de 1 hora",
                 "TEMPO_EXCESSIVO"
-            )
+            ))
+
+        for sensor_id, nome in self.nao_utilizados.items():
+            erros.append(ErroSemantico(
+                0,
+                f"O sensor {sensor_id} ({nome}) não é usado em nenhuma regra",
+                "SENSOR_NAO_UTILIZADO"
+            ))
+        return erros
+
+    # Interface anterior à análise incremental, mantida sobre o mesmo estado
+
+    @property
+    def sensores_declarados(self) -> Dict[int, Dict]:
+        """Sensor -> nome e regras que o usam depois da declaração"""
+        return {
+            sensor_id: {
+                'nome': declarado['nome'],
+                'regras': [regra for regra in self.regras_sensor.get(sensor_id, [])
+                           if self.chave(regra) > self.chave(declarado)]
+            }
+            for sensor_id, declarado in self.declarados.items()
+        }
+
+    @property
+    def dispositivos_utilizados(self) -> Set[str]:
+        """Dispositivos comandados por regras de sensores declarados"""
+        return {regra['alvo'] for sensor in self.sensores_declarados.values() for regra in sensor['regras']}
+
+    @property
+    def regras(self) -> List[Dict]:
+        """Todas as regras, em ordem de programa"""
+        return sorted((regra for regras in self.regras_sensor.values() for regra in regras), key=self.chave)
+
+    def _verificar_no(self, node: Dict):
+        """Inclui o nó e acrescenta em self.erros os erros que pertencem a ele"""
+        self.adicionar_no(node)
+        pendentes = self.erros_espera.get(id(node), [])
+        if node['tipo'] == 'declaracao_sensor':
+            pendentes = self.erros_sensor.get(node['id'], [])
+        elif node['tipo'] == 'regra':
+            pendentes = self.erros_sensor.get(node['sensor_id'], [])
+        for origem, mensagem, tipo in pendentes:
+            if origem is node:
+                self.adicionar_erro(node.get('linha', 0), mensagem, tipo)
 
-        # Verificar dispositivos não utilizados
-        for sensor_id, sensor in self.sensores_declarados.items():
-            if not sensor['regras']:
-                self.adicionar_erro(
-                    0,
-                    f"O sensor {sensor_id} ({sensor['nome']}) não é usado em nenhuma regra",
-                    "SENSOR_NAO_UTILIZADO"
-                )
+    def verificar_declaracao_sensor(self, node: Dict):
+        """Verifica a declaração de um sensor"""
+        self._verificar_no(node)
+
+    def verificar_regra(self, node: Dict):
+        """Verifica uma regra de controle"""
+        self._verificar_no(node)
+
+    def verificar_espera(self, node: Dict):
+        """Verifica um comando de espera"""
+        self._verificar_no(node)
+
+    def verificar_condicoes(self, condicoes: List, linha: int):
+        """Verifica as condições de uma regra"""
+        for mensagem, tipo in self.erros_condicoes(condicoes):
+            self.adicionar_erro(linha, mensagem, tipo)
+
+    def verificar_operador_limite(self, operador: str, limite: int, linha: int):
+        """Verifica um operador e seu limite"""
+        for mensagem, tipo in self.erros_operador_limite(operador, limite):
+            self.adicionar_erro(linha, mensagem, tipo)
+
+    def verificar_consistencia_global(self):
+        """Realiza verificações de consistência global"""
+        self.erros.extend(self.erros_globais())
 
     def verificar_regras_conflitantes(self):
         """Verifica se existem regras conflitantes para o mesmo dispositivo"""
-        regras_por_dispositivo: Dict[str, List[Dict]] = {}
-
-        for regra in self.regras:
-            alvo = regra['alvo']
-            if alvo not in regras_por_dispositivo:
-                regras_por_dispositivo[alvo] = []
-            regras_por_dispositivo[alvo].append(regra)
-
-        for dispositivo, regras in regras_por_dispositivo.items():
-            if len(regras) > 1:
-                # Agrupar regras por ação (ligar/desligar)
-                regras_ligar = [r for r in regras if r['acao'] == 'turn_on']
-                regras_desligar = [r for r in regras if r['acao'] == 'turn_off']
-                
-                # Verificar se as condições são complementares
-                for regra_ligar in regras_ligar:
-                    for regra_desligar in regras_desligar:
-                        # Se for o mesmo sensor
-                        if regra_ligar['sensor_id'] == regra_desligar['sensor_id']:
-                            # Verificar se as condições são complementares
-                            cond_ligar = regra_ligar['condicoes'][0]
-                            cond_desligar = regra_desligar['condicoes'][0]
-                            
-                            # Se não forem complementares, reportar erro
-                            if not self.sao_condicoes_complementares(cond_ligar, cond_desligar):
-                                self.adicionar_erro(
-                                    0,
-                                    f"O dispositivo '{dispositivo}' tem regras com condições não complementares",
-                                    "REGRAS_CONFLITANTES"
-                                )
+        self.erros.extend(self.erros_conflitos())
 
     def sao_condicoes_complementares(self, cond1, cond2):
         """Verifica se duas condições são complementares"""
         op1, val1 = cond1
         op2, val2 = cond2
-        
-        # Verificar se os valores são iguais
-        if val1 != val2:
-            return False
-            
-        # Verificar se os operadores são complementares
-        pares_complementares = [
-            ('<', '>='),
-            ('>', '<='),
-            ('<=', '>'),
-            ('>=', '<')
-        ]
-        
-        return (op1, op2) in pares_complementares
+        pares_complementares = [('<', '>='), ('>', '<='), ('<=', '>'), ('>=', '<')]
+        return val1 == val2 and (op1, op2) in pares_complementares
 
     def adicionar_erro(self, linha: int, mensagem: str, tipo: str):
         """Adiciona um erro à lista de erros"""
@@ -252,4 +377,4 @@ class AnalisadorSemantico:
         resumo = "❌ Análise semântica encontrou os seguintes erros:\n"
         for erro in self.erros:
             resumo += f"  - Linha {erro.linha}: {erro.mensagem} ({erro.tipo})\n"
-        return resumo 
\ No newline at end of file
+        return resumo
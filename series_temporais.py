@@ -0,0 +1,217 @@
+"""
+Séries temporais de leituras por sensor, em memória limitada.
+
+Cada sensor tem um anel de capacidade fixa com os instantes e valores brutos
+(array('d'): 16 bytes por leitura, inserção O(1)) e anéis de resolução menor
+com agregados por faixa de tempo (mínimo, máximo, soma e contagem). Assim uma
+hora de leituras por segundo fica completa e semanas ou meses ficam
+disponíveis em médias por minuto e por hora, sempre com memória fixa.
+
+As estatísticas de uma janela usam o anel mais fino que ainda cobre o início
+da janela. Com NumPy instalado os cálculos são vetorizados sobre os próprios
+arrays (sem cópia); sem ele, são feitos em Python puro.
+"""
+import bisect
+import math
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional
+    np = None
+
+# (largura da faixa em segundos, capacidade); largura 0 = leituras brutas
+RESOLUCOES_PADRAO = ((0, 3600), (60, 7 * 24 * 60), (3600, 366 * 24))
+
+PERCENTIS_PADRAO = (50, 90, 99)
+
+
+class Anel:
+    """Colunas array('d') de mesma capacidade usadas como buffer circular"""
+
+    def __init__(self, capacidade: int, colunas: Sequence[str]):
+        self.capacidade = capacidade
+        self.colunas = {nome: array('d', bytes(8 * capacidade)) for nome in colunas}
+        self.ts = self.colunas['ts']
+        self.proximo = 0
+        self.tamanho = 0
+
+    def adicionar(self, *valores: float):
+        posicao = self.proximo
+        for coluna, valor in zip(self.colunas.values(), valores):
+            coluna[posicao] = valor
+        self.proximo = (posicao + 1) % self.capacidade
+        if self.tamanho < self.capacidade:
+            self.tamanho += 1
+
+    def cobre(self, inicio: float) -> bool:
+        """Se nada a partir de `inicio` já foi sobrescrito"""
+        return self.tamanho < self.capacidade or inicio >= self.ts[self.proximo]
+
+    def trechos(self, inicio: float, fim: float) -> List[Tuple[int, int]]:
+        """Faixas de posições [a, b) com inicio <= ts <= fim, em ordem de tempo"""
+        if self.tamanho < self.capacidade:
+            partes = [(0, self.tamanho)]
+        else:
+            partes = [(self.proximo, self.capacidade), (0, self.proximo)]
+        trechos = []
+        for a, b in partes:
+            # Dentro de cada parte os instantes são crescentes: busca binária
+            a = bisect.bisect_left(self.ts, inicio, a, b)
+            b = bisect.bisect_right(self.ts, fim, a, b)
+            if a < b:
+                trechos.append((a, b))
+        return trechos
+
+    def coluna(self, nome: str, trechos: List[Tuple[int, int]]):
+        """Valores da coluna nos trechos (visões NumPy sem cópia, se disponível)"""
+        dados = self.colunas[nome]
+        if np is not None:
+            visao = np.frombuffer(dados, dtype=np.float64)
+            partes = [visao[a:b] for a, b in trechos]
+            return partes[0] if len(partes) == 1 else np.concatenate(partes) if partes else visao[:0]
+        if len(trechos) == 1:
+            a, b = trechos[0]
+            return dados[a:b]
+        return array('d', [v for a, b in trechos for v in dados[a:b]])
+
+
+def percentil(ordenados: Sequence[float], p: float) -> float:
+    """Percentil com interpolação linear (mesmo critério do numpy.percentile)"""
+    posicao = (len(ordenados) - 1) * p / 100
+    abaixo = math.floor(posicao)
+    acima = min(abaixo + 1, len(ordenados) - 1)
+    return ordenados[abaixo] + (ordenados[acima] - ordenados[abaixo]) * (posicao - abaixo)
+
+
+def resumir(valores, minimos=None, maximos=None, somas=None, contagens=None,
+            percentis: Sequence[float] = PERCENTIS_PADRAO) -> Dict[str, float]:
+    """
+    Estatísticas de um conjunto de valores. Para faixas agregadas, `valores`
+    são as médias das faixas e mínimo, máximo e média vêm dos agregados.
+    """
+    if minimos is None:
+        minimos = maximos = valores
+    if np is not None:
+        contagem = int(contagens.sum()) if contagens is not None else len(valores)
+        media = float(somas.sum() / contagem) if somas is not None else float(valores.mean())
+        resumo = {'contagem': contagem, 'minimo': float(minimos.min()),
+                  'maximo': float(maximos.max()), 'media': media}
+        calculados = np.percentile(valores, percentis) if percentis else []
+        for p, valor in zip(percentis, calculados):
+            resumo[f'p{p:g}'] = float(valor)
+        return resumo
+
+    contagem = int(math.fsum(contagens)) if contagens is not None else len(valores)
+    media = math.fsum(somas) / contagem if somas is not None else math.fsum(valores) / contagem
+    resumo = {'contagem': contagem, 'minimo': min(minimos), 'maximo': max(maximos), 'media': media}
+    ordenados = sorted(valores)
+    for p in percentis:
+        resumo[f'p{p:g}'] = percentil(ordenados, p)
+    return resumo
+
+
+class SerieSensor:
+    """Anel bruto e anéis agregados de um sensor"""
+
+    def __init__(self, resolucoes: Sequence[Tuple[int, int]] = RESOLUCOES_PADRAO):
+        largura_bruta, capacidade_bruta = resolucoes[0]
+        if largura_bruta != 0:
+            raise ValueError("A primeira resolução deve ser a das leituras brutas (largura 0)")
+        self.bruto = Anel(capacidade_bruta, ('ts', 'valor'))
+        self.niveis = [(largura, Anel(capacidade, ('ts', 'minimo', 'maximo', 'soma', 'contagem')))
+                       for largura, capacidade in resolucoes[1:]]
+        # Faixa ainda aberta de cada nível: [início, mínimo, máximo, soma, contagem]
+        self.abertas: List[Optional[list]] = [None] * len(self.niveis)
+        self.ultimo_ts = -math.inf
+
+    def adicionar(self, instante: float, valor: float):
+        # Os anéis dependem de instantes crescentes: um relógio que volta é ignorado
+        instante = max(instante, self.ultimo_ts)
+        self.ultimo_ts = instante
+        self.bruto.adicionar(instante, valor)
+        for i, (largura, anel) in enumerate(self.niveis):
+            inicio = instante - instante % largura
+            aberta = self.abertas[i]
+            if aberta is not None and aberta[0] == inicio:
+                if valor < aberta[1]:
+                    aberta[1] = valor
+                if valor > aberta[2]:
+                    aberta[2] = valor
+                aberta[3] += valor
+                aberta[4] += 1
+                continue
+            if aberta is not None:
+                anel.adicionar(*aberta)
+            self.abertas[i] = [inicio, valor, valor, valor, 1]
+
+    def estatisticas(self, inicio: float = -math.inf, fim: float = math.inf,
+                     percentis: Sequence[float] = PERCENTIS_PADRAO) -> Optional[Dict[str, float]]:
+        """
+        Estatísticas das leituras com inicio <= ts <= fim, ou None se não houver.
+        Em níveis agregados os percentis são aproximados pelas médias das faixas;
+        o resultado informa a `resolucao` usada (0 = leituras brutas).
+        """
+        if self.bruto.cobre(inicio) or not self.niveis:
+            trechos = self.bruto.trechos(inicio, fim)
+            if not trechos:
+                return None
+            resumo = resumir(self.bruto.coluna('valor', trechos), percentis=percentis)
+            resumo['resolucao'] = 0
+            return resumo
+
+        # Nível mais fino que ainda guarda o início da janela (ou o mais grosso)
+        for i, (largura, anel) in enumerate(self.niveis):
+            if anel.cobre(inicio):
+                break
+        # Entram as faixas que contêm algum instante da janela
+        primeira = inicio - inicio % largura if math.isfinite(inicio) else inicio
+        trechos = anel.trechos(primeira, fim)
+        colunas = [anel.coluna(nome, trechos) for nome in ('minimo', 'maximo', 'soma', 'contagem')]
+        aberta = self.abertas[i]
+        if aberta is not None and primeira <= aberta[0] <= fim:
+            # A faixa ainda aberta não está no anel
+            if np is not None:
+                colunas = [np.append(coluna, valor) for coluna, valor in zip(colunas, aberta[1:])]
+            else:
+                colunas = [array('d', coluna) + array('d', [valor]) for coluna, valor in zip(colunas, aberta[1:])]
+        minimos, maximos, somas, contagens = colunas
+        if not len(contagens):
+            return None
+        medias = somas / contagens if np is not None else [s / c for s, c in zip(somas, contagens)]
+        resumo = resumir(medias, minimos, maximos, somas, contagens, percentis)
+        resumo['resolucao'] = largura
+        return resumo
+
+    def bytes_ocupados(self) -> int:
+        aneis = [self.bruto] + [anel for _, anel in self.niveis]
+        return sum(coluna.itemsize * len(coluna) for anel in aneis for coluna in anel.colunas.values())
+
+
+class SeriesSensores:
+    """Séries de todos os sensores, criadas na primeira leitura de cada um"""
+
+    def __init__(self, resolucoes: Sequence[Tuple[int, int]] = RESOLUCOES_PADRAO):
+        self.resolucoes = resolucoes
+        self.series: Dict[int, SerieSensor] = {}
+
+    def registrar(self, id_sensor: int, valor: float, instante: Optional[float] = None):
+        serie = self.series.get(id_sensor)
+        if serie is None:
+            serie = self.series[id_sensor] = SerieSensor(self.resolucoes)
+        serie.adicionar(time.time() if instante is None else instante, valor)
+
+    def estatisticas(self, id_sensor: int, inicio: float = -math.inf, fim: float = math.inf,
+                     percentis: Sequence[float] = PERCENTIS_PADRAO) -> Optional[Dict[str, float]]:
+        serie = self.series.get(id_sensor)
+        return serie.estatisticas(inicio, fim, percentis) if serie is not None else None
+
+    def ultimos(self, id_sensor: int, segundos: float,
+                percentis: Sequence[float] = PERCENTIS_PADRAO) -> Optional[Dict[str, float]]:
+        """Estatísticas dos últimos `segundos` até a leitura mais recente"""
+        serie = self.series.get(id_sensor)
+        if serie is None:
+            return None
+        return serie.estatisticas(serie.ultimo_ts - segundos, math.inf, percentis)
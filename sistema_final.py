@@ -1,9 +1,22 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-import paho.mqtt.client as mqtt
-import json
-import time
 from datetime import datetime
+from mqtt_handler import MQTTHandler
+from irrigation_dsl import analisar_programa
+from execucao_reativa import ExecucaoReativa
+from gravador_log import GravadorLog, POLITICA_DESCARTAR
+from diario_estado import DiarioEstado
+from historico_sqlite import HistoricoSQLite
+from series_temporais import SeriesSensores
+from atuadores import CamadaAtuadores
+
+# Associação entre os sensores do programa e os tópicos MQTT
+TOPICOS_SENSORES = {1: "umidade", 2: "umidade2", 3: "temperatura"}
+TOPICOS_BOMBAS = {"Bomba 1": "bomba1", "Bomba 2": "bomba2", "Bomba 3": "bomba3"}
+# Comando enviado ao relé de cada bomba quando ela é ligada
+COMANDOS_LIGAR = {"Bomba 1": "01", "Bomba 2": "02", "Bomba 3": "03"}
+# Estado das bombas republicado após esse tempo sem comandos (segundos)
+INTERVALO_RENOVACAO = 60
 
 class SistemaIrrigacao:
     def __init__(self, root):
@@ -11,81 +24,87 @@ class SistemaIrrigacao:
         self.root.title("Sistema de Irrigação Integrado")
         self.root.geometry("1200x600")
         
-        # Valores dos sensores
-        self.umidade1 = 0
-        self.umidade2 = 0
-        self.temperatura = 0
-        
         # Thresholds (valores padrão)
         self.threshold_umidade1 = 30
         self.threshold_umidade2 = 25
         self.threshold_temperatura = 35
         
-        # Configuração MQTT
-        self.client = mqtt.Client()
-        self.broker = "localhost"  # Altere para o IP do seu broker
-        self.port = 1883
-        
-        # Configurar callbacks MQTT
-        self.client.on_connect = self.on_connect
-        self.client.on_message = self.on_message
-        
-        # Conectar ao broker
-        self.conectar_mqtt()
-        
         # Criar interface
         self.criar_interface()
         
-    def conectar_mqtt(self):
-        try:
-            self.client.connect(self.broker, self.port)
-            self.client.loop_start()
-            print("Conectado ao broker MQTT!")
-        except Exception as e:
-            print(f"Erro ao conectar ao broker MQTT: {e}")
+        # Conexão MQTT e execução do programa DSL gerado a partir das regras
+        self.mqtt_handler = MQTTHandler()
+        # Eventos da máquina gravados em segundo plano, com rotação diária
+        self.gravador = GravadorLog("sistema_irrigacao.log", politica=POLITICA_DESCARTAR, rotacao_diaria=True)
+        # Estado das bombas e últimas leituras preservados entre execuções
+        self.diario = DiarioEstado("estado_sistema.json")
+        # Leituras, transições das bombas e disparos de regras para consulta posterior
+        self.historico = HistoricoSQLite("historico_irrigacao.db", politica=POLITICA_DESCARTAR)
+        # Leituras recentes em memória para as médias exibidas na interface
+        self.series = SeriesSensores()
+        # Só as mudanças de estado das bombas são publicadas no broker
+        self.atuadores = CamadaAtuadores(self.mqtt_handler, intervalo_renovacao=INTERVALO_RENOVACAO)
+        self.execucao = ExecucaoReativa(
+            self.compilar_regras(),
+            self.mqtt_handler,
+            topicos_sensores=TOPICOS_SENSORES,
+            topicos_dispositivos=TOPICOS_BOMBAS,
+            codificar_comando=self.codificar_comando,
+            ao_receber=self.ao_receber_leitura,
+            ao_comandar=self.ao_comandar_bomba,
+            gravador=self.gravador,
+            diario=self.diario,
+            historico=self.historico,
+            series=self.series,
+            eventos_compactos=True,
+            atuadores=self.atuadores
+        )
+        self.execucao.iniciar()
+        self.root.after(INTERVALO_RENOVACAO * 1000, self.renovar_bombas)
     
-    def on_connect(self, client, userdata, flags, rc):
-        if rc == 0:
-            print("Conectado ao broker MQTT!")
-            # Inscrever nos tópicos
-            self.client.subscribe("umidade")
-            self.client.subscribe("umidade2")
-            self.client.subscribe("temperatura")
-        else:
-            print(f"Falha na conexão com o broker MQTT. Código: {rc}")
+    def gerar_programa(self) -> str:
+        """Gera o programa DSL equivalente às regras configuradas"""
+        return f"""INSERIR SENSOR "Umidade Solo 1" ID 1
+INSERIR SENSOR "Umidade Solo 2" ID 2
+INSERIR SENSOR "Temperatura" ID 3
+SE SENSOR 1 < {self.threshold_umidade1} ENTAO LIGAR "Bomba 1"
+SE SENSOR 1 >= {self.threshold_umidade1} ENTAO DESLIGAR "Bomba 1"
+SE SENSOR 2 < {self.threshold_umidade2} ENTAO LIGAR "Bomba 2"
+SE SENSOR 2 >= {self.threshold_umidade2} ENTAO DESLIGAR "Bomba 2"
+SE SENSOR 3 > {self.threshold_temperatura} ENTAO LIGAR "Bomba 3"
+SE SENSOR 3 <= {self.threshold_temperatura} ENTAO DESLIGAR "Bomba 3"
+"""
     
-    def on_message(self, client, userdata, msg):
-        try:
-            # Decodificar a mensagem JSON
-            payload = msg.payload.decode()
-            topic = msg.topic
-            dados = json.loads(payload)
-            
-            # Extrair o valor do JSON
-            if topic == "umidade":
-                valor = float(dados["umidade"])
-                self.umidade1 = valor
-                self.umidade1_label.config(text=f"Umidade Solo 1: {valor:.1f}%")
-                self.verificar_condicao_bomba1()
-            
-            elif topic == "umidade2":
-                valor = float(dados["umidade"])
-                self.umidade2 = valor
-                self.umidade2_label.config(text=f"Umidade Solo 2: {valor:.1f}%")
-                self.verificar_condicao_bomba2()
-            
-            elif topic == "temperatura":
-                valor = float(dados["temperatura"])
-                self.temperatura = valor
-                self.temperatura_label.config(text=f"Temperatura: {valor:.1f}°C")
-                self.verificar_condicao_bomba3()
-            
-            # Registrar no log
-            self.log(f"Recebido {topic}: {valor:.1f}")
-            
-        except Exception as e:
-            print(f"Erro ao processar mensagem do tópico {topic}: {e}")
-            print(f"Payload recebido: {payload}")
+    def compilar_regras(self):
+        ast, sucesso, erros = analisar_programa(self.gerar_programa())
+        if not sucesso:
+            raise ValueError("; ".join(erro.mensagem for erro in erros))
+        return ast
+    
+    def codificar_comando(self, alvo, ligado):
+        # Os relés esperam o texto puro ("01"/"00"), como teste_bombas.py e simulador_irrigacao.py
+        return COMANDOS_LIGAR[alvo] if ligado else "00"
+    
+    def ao_receber_leitura(self, id_sensor, valor):
+        media = self.series.ultimos(id_sensor, 3600)['media']
+        if id_sensor == 1:
+            self.umidade1_label.config(text=f"Umidade Solo 1: {valor:.1f}% (média 1h: {media:.1f}%)")
+        elif id_sensor == 2:
+            self.umidade2_label.config(text=f"Umidade Solo 2: {valor:.1f}% (média 1h: {media:.1f}%)")
+        elif id_sensor == 3:
+            self.temperatura_label.config(text=f"Temperatura: {valor:.1f}°C (média 1h: {media:.1f}°C)")
+        self.log(f"Recebido {TOPICOS_SENSORES[id_sensor]}: {valor:.1f}")
+    
+    def ao_comandar_bomba(self, alvo, ligado):
+        estado = "Ligada" if ligado else "Desligada"
+        bomba = TOPICOS_BOMBAS[alvo][-1]
+        getattr(self, f"bomba{bomba}_label").config(text=f"{alvo}: {estado}")
+        self.log(f"{'⚠️' if ligado else '✅'} {alvo}: {estado}")
+    
+    def renovar_bombas(self):
+        """Republica periodicamente o estado das bombas sem comando recente"""
+        self.atuadores.renovar()
+        self.root.after(INTERVALO_RENOVACAO * 1000, self.renovar_bombas)
     
     def criar_interface(self):
         # Frame principal
@@ -172,21 +191,21 @@ class SistemaIrrigacao:
         """Atualiza os thresholds com os valores inseridos pelo usuário"""
         try:
             # Validar e atualizar Umidade 1
-            novo_u1 = float(self.umidade1_entry.get())
+            novo_u1 = int(self.umidade1_entry.get())
             if 0 <= novo_u1 <= 100:
                 self.threshold_umidade1 = novo_u1
             else:
                 raise ValueError("Umidade deve estar entre 0 e 100%")
             
             # Validar e atualizar Umidade 2
-            novo_u2 = float(self.umidade2_entry.get())
+            novo_u2 = int(self.umidade2_entry.get())
             if 0 <= novo_u2 <= 100:
                 self.threshold_umidade2 = novo_u2
             else:
                 raise ValueError("Umidade deve estar entre 0 e 100%")
             
             # Validar e atualizar Temperatura
-            novo_t = float(self.temperatura_entry.get())
+            novo_t = int(self.temperatura_entry.get())
             if 0 <= novo_t <= 60:
                 self.threshold_temperatura = novo_t
             else:
@@ -203,58 +222,19 @@ class SistemaIrrigacao:
             self.log(f"   Umidade 2: {self.threshold_umidade2}%")
             self.log(f"   Temperatura: {self.threshold_temperatura}°C")
             
-            # Verificar condições atuais com as novas regras
-            self.verificar_condicao_bomba1()
-            self.verificar_condicao_bomba2()
-            self.verificar_condicao_bomba3()
+            # Recompilar o programa e verificar as condições atuais com as novas regras
+            self.execucao.recarregar(self.compilar_regras())
             
         except ValueError as e:
             messagebox.showerror("Erro", f"Valor inválido: {str(e)}")
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao atualizar regras: {str(e)}")
     
-    def verificar_condicao_bomba1(self):
-        if self.umidade1 < self.threshold_umidade1:
-            self.enviar_comando_bomba("1", "ligar")
-            self.log(f"⚠️ Umidade Solo 1 baixa ({self.umidade1:.1f}%) -> Ligando Bomba 1")
-        else:
-            self.enviar_comando_bomba("1", "desligar")
-            self.log(f"✅ Umidade Solo 1 ok ({self.umidade1:.1f}%) -> Desligando Bomba 1")
-    
-    def verificar_condicao_bomba2(self):
-        if self.umidade2 < self.threshold_umidade2:
-            self.enviar_comando_bomba("2", "ligar")
-            self.log(f"⚠️ Umidade Solo 2 baixa ({self.umidade2:.1f}%) -> Ligando Bomba 2")
-        else:
-            self.enviar_comando_bomba("2", "desligar")
-            self.log(f"✅ Umidade Solo 2 ok ({self.umidade2:.1f}%) -> Desligando Bomba 2")
-    
-    def verificar_condicao_bomba3(self):
-        if self.temperatura > self.threshold_temperatura:
-            self.enviar_comando_bomba("3", "ligar")
-            self.log(f"⚠️ Temperatura alta ({self.temperatura:.1f}°C) -> Ligando Bomba 3")
-        else:
-            self.enviar_comando_bomba("3", "desligar")
-            self.log(f"✅ Temperatura ok ({self.temperatura:.1f}°C) -> Desligando Bomba 3")
-    
-    def enviar_comando_bomba(self, bomba, acao):
-        comando = "01" if acao == "ligar" else "00"
-        if bomba == "2":
-            comando = "02" if acao == "ligar" else "00"
-        elif bomba == "3":
-            comando = "03" if acao == "ligar" else "00"
-        
-        topico = f"bomba{bomba}"
-        self.client.publish(topico, comando)
-        
-        # Atualizar label da bomba
-        label = getattr(self, f"bomba{bomba}_label")
-        estado = "Ligada" if acao == "ligar" else "Desligada"
-        label.config(text=f"Bomba {bomba}: {estado}")
-    
     def __del__(self):
-        self.client.loop_stop()
-        self.client.disconnect()
+        self.mqtt_handler.desconectar()
+        self.gravador.fechar()
+        self.diario.fechar()
+        self.historico.fechar()
 
 def main():
     root = tk.Tk()
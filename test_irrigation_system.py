@@ -1,6 +1,34 @@
 import sys
 import os
-from irrigation_dsl import executar_sistema_irrigacao
+import io
+import json
+import random
+import time
+import tempfile
+import threading
+import pickle
+import sqlite3
+from irrigation_dsl import executar_sistema_irrigacao, iter_tokens, AnalisadorSintatico, ErroLexico, MaquinaVirtual, executar_programas, analisar_programa, EventoCompacto, TIPO_COMANDO, TIPO_DISPARO
+from compilador import compilar_condicoes, compilar_regra, compilar_programa, OP_REGRA
+from execucao_reativa import ExecucaoReativa, extrair_valor, comando_padrao
+from cache_programas import CacheProgramas
+from nos_ast import NoRegra
+from frontend_incremental import FrontendIncremental
+from hospedeiro import HospedeiroProgramas, EVENTO_LEITURA, EVENTO_COMANDO
+from semantic_analyzer import AnalisadorSemantico
+from intervalos import conjunto_condicao, conjunto_condicoes, intersecao, sobreposicoes
+from gravador_log import GravadorLog, POLITICA_DESCARTAR
+from log_estruturado import GravadorJSONL, carregar_indice, consultar, periodos_ligado, segmentos
+from diario_estado import DiarioEstado
+from historico_sqlite import HistoricoSQLite, leituras, transicoes, disparos
+from series_temporais import SeriesSensores
+from reproducao import RelogioVirtual, reproduzir, ler_leituras, main as reproducao_main
+from avaliacao_vetorizada import np, avaliar_regras, avaliar_programa, alinhar_leituras, preencher_adiante, tempo_ligado
+from atuadores import CamadaAtuadores
+from otimizador import otimizar_programa, condicoes_do_conjunto
+from verificar_programas import check, main as verificar_main
+
+DIRETORIO_TESTES = os.path.dirname(os.path.abspath(__file__))
 
 def test_programa_basico():
     print("\n🧪 Teste 1: Programa Básico")
@@ -50,7 +78,7 @@ def test_regras_complexas():
 def test_arquivo():
     print("\n🧪 Teste 5: Lendo do Arquivo")
     try:
-        with open('example_program.txt', 'r') as file:
+        with open(os.path.join(DIRETORIO_TESTES, 'example_program.txt'), 'r') as file:
             programa = file.read()
         executar_sistema_irrigacao(programa)
     except FileNotFoundError:
@@ -85,17 +113,1241 @@ def test_logs_e_estado():
     else:
         print("❌ Arquivo de estado não encontrado")
 
+def test_lexico_em_blocos():
+    print("\n🧪 Teste 7: Análise Léxica em Blocos")
+    programa = """# Comentário
+INSERIR SENSOR "Umidade" ID 1
+SE SENSOR 1 < 30 E > 10 ENTAO LIGAR "Bomba"
+ESPERAR 2
+SE SENSOR 1 > 80 OU >= 75 ENTAO DESLIGAR "Bomba"
+"""
+    tokens = list(iter_tokens(programa))
+    assert list(iter_tokens(io.StringIO(programa), tamanho_bloco=5)) == tokens
+    assert (tokens[0].tipo, tokens[0].linha, tokens[0].coluna) == ('PALAVRA_SET', 2, 1)
+    assert [t.tipo for t in tokens if t.linha == 5][5] == 'PALAVRA_OR'
+
+    ast = AnalisadorSintatico(iter_tokens(io.StringIO(programa), tamanho_bloco=5)).analisar()
+    assert [no['tipo'] for no in ast] == ['declaracao_sensor', 'regra', 'espera', 'regra']
+    assert ast[3]['condicoes'] == [('>', 80), ('PALAVRA_OR', '>=', 75)]
+    assert ast[3]['linha'] == 5
+
+def test_lexico_caractere_invalido():
+    print("\n🧪 Teste 8: Caractere Inválido")
+    try:
+        list(iter_tokens('INSERIR SENSOR "Umidade" ID 1\nSE SENSOR 1 ! 30'))
+    except ErroLexico as e:
+        assert (e.linha, e.coluna) == (2, 13)
+        print(f"✅ Erro capturado como esperado: {e}")
+    else:
+        assert False, "Caractere inválido não foi reportado"
+
+def test_regras_compiladas():
+    print("\n🧪 Teste 9: Regras Compiladas x Interpretadas")
+    maquina = MaquinaVirtual()
+    cadeias = [
+        [('<', 30)],
+        [('==', 50)],
+        [('>', 10), ('PALAVRA_AND', '<', 30)],
+        [('>', 80), ('PALAVRA_OR', '>=', 75)],
+        [('>', 10), ('PALAVRA_AND', '<', 30), ('PALAVRA_OR', '>=', 90), ('PALAVRA_AND', '<=', 95)],
+    ]
+    for condicoes in cadeias:
+        avaliar = compilar_condicoes(condicoes)
+        for valor in range(-5, 106):
+            assert avaliar(valor) == maquina.avaliar_condicoes(valor, condicoes), (condicoes, valor)
+
+def test_tabela_verdade():
+    print("\n🧪 Teste 10: Tabela-Verdade 0–100")
+    maquina = MaquinaVirtual()
+    condicoes = [('>', 10), ('PALAVRA_AND', '<', 30), ('PALAVRA_OR', '==', 100)]
+    regra = compilar_regra({'tipo': 'regra', 'sensor_id': 1, 'condicoes': condicoes, 'acao': 'turn_on', 'alvo': 'Bomba'})
+    assert len(regra.tabela) == 101
+    # Leituras inteiras na faixa usam a tabela; fracionárias e fora da faixa usam a função
+    for valor in list(range(-5, 106)) + [10.5, 29.9, 30.0, 100.0, -0.5, 250]:
+        assert regra.avaliar(valor) == maquina.avaliar_condicoes(valor, condicoes), valor
+
+def test_ciclos_por_alteracao():
+    print("\n🧪 Teste 11: Ciclos Reavaliando Só Sensores Alterados")
+    programa = """
+    INSERIR SENSOR "Umidade 1" ID 1
+    INSERIR SENSOR "Umidade 2" ID 2
+    INSERIR SENSOR "Temperatura" ID 3
+    SE SENSOR 1 < 30 ENTAO LIGAR "Bomba"
+    SE SENSOR 2 < 20 OU > 90 ENTAO DESLIGAR "Bomba"
+    SE SENSOR 1 > 70 ENTAO DESLIGAR "Bomba"
+    SE SENSOR 3 > 35 ENTAO LIGAR "Ventilador"
+    SE SENSOR 3 <= 35 E > 10 ENTAO DESLIGAR "Ventilador"
+    SE SENSOR 2 == 50 ENTAO LIGAR "Ventilador"
+    """
+    ast = AnalisadorSintatico(iter_tokens(programa)).analisar()
+    regras = [no for no in ast if no['tipo'] == 'regra']
+    maquina = MaquinaVirtual()
+    maquina.carregar(ast)
+    valores = {id_sensor: sensor['valor'] for id_sensor, sensor in maquina.sensores.items()}
+    assert maquina.executar_ciclo() == len(regras)
+
+    gerador = random.Random(7)
+    referencia = dict(maquina.dispositivos)
+    for _ in range(300):
+        leituras = dict(valores)
+        id_sensor = gerador.choice([1, 2, 3])
+        leituras[id_sensor] = gerador.choice([valores[id_sensor], gerador.randint(0, 100), 50])
+        alterados = {s for s in leituras if leituras[s] != valores[s]}
+        valores = leituras
+
+        avaliadas = maquina.executar_ciclo(leituras)
+        assert avaliadas == sum(1 for r in regras if r['sensor_id'] in alterados)
+
+        # Referência: passagem completa por todas as regras
+        for regra in regras:
+            if maquina.avaliar_condicoes(valores[regra['sensor_id']], regra['condicoes']):
+                referencia[regra['alvo']] = regra['acao'] == 'turn_on'
+        assert maquina.dispositivos == referencia
+
+def aguardar(condicao, limite: float = 5.0) -> bool:
+    """Espera a condição ficar verdadeira por até `limite` segundos"""
+    prazo = time.monotonic() + limite
+    while not condicao():
+        if time.monotonic() > prazo:
+            return False
+        time.sleep(0.001)
+    return True
+
+class MQTTFalso:
+    """Substituto do MQTTHandler que guarda callbacks e publicações"""
+    def __init__(self):
+        self.callbacks = {}
+        self.publicados = []
+
+    def registrar_callback(self, topico, callback):
+        self.callbacks[topico] = callback
+
+    def remover_callback(self, topico, callback=None):
+        if callback is None or self.callbacks.get(topico) is callback:
+            self.callbacks.pop(topico, None)
+
+    def publicar(self, topico, dados):
+        self.publicados.append((topico, dados))
+
+def test_execucao_reativa():
+    print("\n🧪 Teste 12: Execução Reativa via MQTT")
+    programa = """
+    INSERIR SENSOR "Umidade" ID 1
+    INSERIR SENSOR "Temperatura" ID 2
+    SE SENSOR 1 < 30 ENTAO LIGAR "Bomba"
+    SE SENSOR 1 >= 30 ENTAO DESLIGAR "Bomba"
+    SE SENSOR 2 > 35 ENTAO LIGAR "Ventilador"
+    """
+    ast = AnalisadorSintatico(iter_tokens(programa)).analisar()
+    mqtt = MQTTFalso()
+    execucao = ExecucaoReativa(ast, mqtt, topicos_sensores={1: "umidade"})
+    execucao.iniciar()
+    assert set(mqtt.callbacks) == {"umidade", "sensores/2"}
+
+    # Nenhuma regra roda antes de chegar uma leitura real
+    assert mqtt.publicados == []
+
+    mqtt.callbacks["umidade"]({"valor": 20, "unidade": "%"})
+    assert mqtt.publicados == [("dispositivos/Bomba", {"estado": "ligado"})]
+
+    mqtt.callbacks["sensores/2"]({"temperatura": 40.0})
+    assert mqtt.publicados[-1] == ("dispositivos/Ventilador", {"estado": "ligado"})
+    assert execucao.maquina.sensores[2]['valor'] == 40
+
+    mqtt.callbacks["umidade"]({"valor": 55})
+    assert mqtt.publicados[-1] == ("dispositivos/Bomba", {"estado": "desligado"})
+    assert extrair_valor(29.5) == 29.5
+
+    # Quando a regra que decidia deixa de valer e uma regra anterior de outro
+    # sensor volta a decidir, a mudança de estado também é publicada
+    ast = AnalisadorSintatico(iter_tokens(
+        'INSERIR SENSOR "Umidade" ID 1\nINSERIR SENSOR "Temperatura" ID 2\n'
+        'SE SENSOR 1 < 50 ENTAO LIGAR "Bomba"\nSE SENSOR 2 > 30 ENTAO DESLIGAR "Bomba"')).analisar()
+    mqtt = MQTTFalso()
+    execucao = ExecucaoReativa(ast, mqtt, eventos_compactos=True)
+    for id_sensor, valor in ((1, 10), (2, 40), (2, 20)):
+        execucao.receber_leitura(id_sensor, valor)
+    assert [dados["estado"] for _, dados in mqtt.publicados] == ["ligado", "desligado", "ligado"]
+    assert execucao.maquina.dispositivos == {"Bomba": True}
+
+    # Recarregar sem o sensor 2 remove o tópico dele; uma mensagem em trânsito é ignorada
+    execucao.iniciar()
+    callback_antigo = mqtt.callbacks["sensores/2"]
+    execucao.recarregar(AnalisadorSintatico(iter_tokens(
+        'INSERIR SENSOR "Umidade" ID 1\nSE SENSOR 1 < 50 ENTAO LIGAR "Bomba"')).analisar())
+    assert set(mqtt.callbacks) == {"sensores/1"}
+    callback_antigo({"valor": 50})
+
+def test_programas_async():
+    print("\n🧪 Teste 13: Vários Programas em um Laço asyncio")
+    programas = []
+    for i in range(1, 21):
+        programas.append(AnalisadorSintatico(iter_tokens(f"""
+        INSERIR SENSOR "Umidade {i}" ID {i}
+        SE SENSOR {i} <= 100 ENTAO LIGAR "Bomba {i}"
+        ESPERAR 1
+        SE SENSOR {i} >= 0 ENTAO DESLIGAR "Bomba {i}"
+        """)).analisar())
+    programas.append([{'tipo': 'regra', 'sensor_id': 99, 'condicoes': [('<', 1)], 'acao': 'turn_on', 'alvo': 'X'}])
+
+    inicio = time.perf_counter()
+    resultados = executar_programas(programas)
+    decorrido = time.perf_counter() - inicio
+
+    # As esperas de todos os programas correm em paralelo
+    assert decorrido < 2, decorrido
+    for i, maquina in enumerate(resultados[:-1], 1):
+        assert maquina.dispositivos == {f"Bomba {i}": False}
+    # Um programa com erro não interrompe os demais
+    assert isinstance(resultados[-1], RuntimeError)
+
+    # Os históricos vão para o log depois de todos, sem gravar um estado compartilhado
+    anterior = os.getcwd()
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        try:
+            executar_programas(programas[:3])
+            with open("sistema_irrigacao.log", encoding='utf-8') as f:
+                linhas = f.read().splitlines()
+            assert not os.path.exists("estado_sistema.json")
+        finally:
+            os.chdir(anterior)
+    for i in range(1, 4):
+        assert sum(f"Umidade {i}'" in linha for linha in linhas) == 1
+
+def test_hospedeiro_programas():
+    print("\n🧪 Teste 14: Vários Programas no Mesmo Processo")
+    def programa(id_sensor, limite):
+        return AnalisadorSintatico(iter_tokens(f"""
+        INSERIR SENSOR "Umidade {id_sensor}" ID {id_sensor}
+        SE SENSOR {id_sensor} < {limite} ENTAO LIGAR "Bomba"
+        SE SENSOR {id_sensor} >= {limite} ENTAO DESLIGAR "Bomba"
+        """)).analisar()
+
+    hospedeiro = HospedeiroProgramas()
+    comandos = []
+    hospedeiro.barramento.inscrever(EVENTO_COMANDO, lambda *args: comandos.append(args))
+    hospedeiro.carregar_programa("Zona A", programa(1, 30))
+    hospedeiro.carregar_programa("Zona B", programa(2, 30))
+    hospedeiro.carregar_programa("Zona C", programa(1, 50))
+
+    # A leitura do sensor 1 só chega às zonas A e C
+    hospedeiro.barramento.publicar(EVENTO_LEITURA, 1, 40)
+    assert comandos == [("Zona A", "Bomba", False), ("Zona C", "Bomba", True)]
+    assert hospedeiro.estado("Zona B") == {}
+
+    # Cada programa tem seu próprio "Bomba"
+    hospedeiro.barramento.publicar(EVENTO_LEITURA, 2, 10)
+    assert hospedeiro.estado("Zona A") == {"Bomba": False}
+    assert hospedeiro.estado("Zona B") == {"Bomba": True}
+
+    # Um programa carregado depois avalia a leitura já presente na tabela
+    hospedeiro.carregar_programa("Zona D", programa(1, 45))
+    assert comandos[-1] == ("Zona D", "Bomba", True)
+
+    hospedeiro.remover_programa("Zona C")
+    comandos.clear()
+    # Só os dispositivos que mudam de estado são comandados ("Zona A" já estava desligada)
+    hospedeiro.barramento.publicar(EVENTO_LEITURA, 1, 60)
+    assert comandos == [("Zona D", "Bomba", False)]
+
+def test_cache_programas():
+    print("\n🧪 Teste 15: Cache de Programas Analisados")
+    programas = [f'INSERIR SENSOR "U" ID 1\nSE SENSOR 1 < {i} ENTAO LIGAR "Bomba"' for i in range(5)]
+    analises = []
+    def analisar(programa):
+        analises.append(programa)
+        # Passar um arquivo evita o cache global de analisar_programa
+        return analisar_programa(io.StringIO(programa))
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        cache = CacheProgramas(max_entradas=3, diretorio=diretorio)
+        for programa in programas:
+            cache.obter_ou_analisar(programa, analisar)
+        assert len(cache.entradas) == 3 and len(analises) == 5
+
+        ast, sucesso, erros = cache.obter_ou_analisar(programas[4], analisar)
+        assert sucesso and ast[1]['condicoes'] == [('<', 4)]
+        assert len(analises) == 5
+
+        # Fora da memória, mas ainda no disco: nenhum reprocessamento
+        novo = CacheProgramas(diretorio=diretorio)
+        assert novo.obter(programas[0])[0] == cache.obter_ou_analisar(programas[0], analisar)[0]
+        assert len(analises) == 5
+        assert CacheProgramas().obter(programas[0]) is None
+
+        # Limite do disco pelo índice em memória: sai o arquivo menos usado
+        tamanho = max(novo.disco.values())
+        assert novo.bytes_disco == sum(os.path.getsize(os.path.join(diretorio, n)) for n in os.listdir(diretorio))
+        limitado = CacheProgramas(diretorio=diretorio, max_bytes_disco=3 * tamanho)
+        limitado.obter(programas[0])
+        programa_novo = 'INSERIR SENSOR "U" ID 1\nSE SENSOR 1 < 99 ENTAO LIGAR "Bomba"'
+        limitado.guardar(programa_novo, analisar(programa_novo))
+        restantes = {nome[:-len('.pickle')] for nome in os.listdir(diretorio)}
+        assert restantes == set(limitado.disco) and len(restantes) <= 3
+        assert CacheProgramas.chave(programas[0]) in restantes and CacheProgramas.chave(programa_novo) in restantes
+
+def test_nos_compactos():
+    print("\n🧪 Teste 16: Nós Compactos da AST")
+    ast = AnalisadorSintatico(iter_tokens('INSERIR SENSOR "U" ID 1\nSE SENSOR 1 > 10 E <= 40 OU == 90 ENTAO LIGAR "Bomba"')).analisar()
+    regra = ast[1]
+    assert not hasattr(regra, '__dict__')
+    assert regra['tipo'] == 'regra' and regra.get('linha', 0) == 2
+    assert regra['condicoes'] == [('>', 10), ('PALAVRA_AND', '<=', 40), ('PALAVRA_OR', '==', 90)]
+    assert all(isinstance(codigo, int) for codigo in regra.codigos)
+    assert regra == {'tipo': 'regra', 'sensor_id': 1, 'condicoes': regra['condicoes'],
+                     'acao': 'turn_on', 'alvo': 'Bomba', 'linha': 2}
+    assert regra.get('inexistente') is None
+    try:
+        regra['inexistente']
+        assert False, "Chave inexistente deveria levantar KeyError"
+    except KeyError:
+        pass
+    assert pickle.loads(pickle.dumps(ast)) == ast
+    assert NoRegra.de_condicoes(1, regra['condicoes'], 'turn_on', 'Bomba', 2) == regra
+
+def test_frontend_incremental():
+    print("\n🧪 Teste 17: Reanálise Incremental do Editor")
+    linhas = ['INSERIR SENSOR "Umidade" ID 1', '# Regras']
+    linhas += [f'SE SENSOR 1 < {i} ENTAO LIGAR "Bomba {i}"' for i in range(50)]
+    frontend = FrontendIncremental()
+
+    def conferir(resultado, linhas):
+        completo = AnalisadorSintatico(iter_tokens("\n".join(linhas))).analisar()
+        assert resultado.ast == completo
+
+    resultado = frontend.atualizar("\n".join(linhas))
+    assert resultado.linhas_reanalisadas == len(linhas)
+    conferir(resultado, linhas)
+
+    # Edição de uma linha no meio
+    linhas[20] = 'SE SENSOR 1 > 99 ENTAO DESLIGAR "Bomba 18"'
+    resultado = frontend.atualizar("\n".join(linhas))
+    assert resultado.linhas_reanalisadas == 1
+    conferir(resultado, linhas)
+
+    # Linha inserida no início: o restante só tem o número de linha ajustado
+    linhas.insert(0, '# Cabeçalho')
+    resultado = frontend.atualizar("\n".join(linhas))
+    assert resultado.linhas_reanalisadas == 1
+    conferir(resultado, linhas)
+    assert resultado.ast[-1]['linha'] == len(linhas)
+
+    # Erro de sintaxe localizado na linha editada
+    linhas[10] = 'SE SENSOR 1 < ENTAO LIGAR "Bomba"'
+    resultado = frontend.atualizar("\n".join(linhas))
+    assert [linha for linha, _ in resultado.erros_sintaticos] == [11]
+    assert not resultado.sucesso
+
+    del linhas[10]
+    resultado = frontend.atualizar("\n".join(linhas))
+    assert resultado.linhas_reanalisadas == 0 and resultado.sucesso
+    conferir(resultado, linhas)
+
+    # Regra em várias linhas: mesmo resultado que analisar o programa inteiro
+    entregue = resultado.ast
+    linhas[5:6] = ['SE SENSOR 1 < 30', 'E > 5 ENTAO', 'LIGAR "Bomba"']
+    resultado = frontend.atualizar("\n".join(linhas))
+    ast, _, erros = analisar_programa("\n".join(linhas))
+    assert resultado.ast == ast and resultado.erros_semanticos == erros
+    # Os nós da AST entregue antes não tiveram a linha alterada
+    assert entregue[-1]['linha'] == len(linhas) - 2
+
+    # Uma regra que passa a continuar na linha seguinte (antes uma instrução própria)
+    linhas[5:8] = ['SE SENSOR 1 < 30 ENTAO', 'DESLIGAR "Bomba"', 'LIGAR "Bomba 7"']
+    resultado = frontend.atualizar("\n".join(linhas))
+    assert [linha for linha, _ in resultado.erros_sintaticos] == [8]
+    linhas[5:7] = ['SE SENSOR 1 < 30 ENTAO DESLIGAR "Bomba"', 'SE SENSOR 1 > 60 ENTAO']
+    resultado = frontend.atualizar("\n".join(linhas))
+    ast, _, erros = analisar_programa("\n".join(linhas))
+    assert resultado.ast == ast and resultado.erros_semanticos == erros
+
+    # Edições aleatórias com instruções quebradas em várias linhas
+    aleatorio = random.Random(11)
+
+    def instrucao():
+        if aleatorio.random() < 0.01:
+            return ['SE SENSOR']  # incompleta
+        palavras = aleatorio.choice([
+            f'INSERIR SENSOR "S" ID {aleatorio.randint(1, 3)}',
+            f'SE SENSOR {aleatorio.randint(1, 3)} < {aleatorio.randint(0, 100)} E > {aleatorio.randint(0, 100)} '
+            f'ENTAO {aleatorio.choice(["LIGAR", "DESLIGAR"])} "Bomba"',
+            f'ESPERAR {aleatorio.randint(1, 10)}', '# Comentário']).split(' ')
+        cortes = sorted(aleatorio.sample(range(1, len(palavras)), aleatorio.randint(0, len(palavras) - 1) // 3))
+        return [' '.join(palavras[a:b]) for a, b in zip([0] + cortes, cortes + [len(palavras)])]
+
+    def resumo(erros):
+        return sorted((e.linha, e.tipo, e.mensagem) for e in erros)
+
+    instrucoes = [instrucao() for _ in range(10)]
+    frontend = FrontendIncremental()
+    for _ in range(300):
+        texto = "\n".join(linha for linhas_instrucao in instrucoes for linha in linhas_instrucao)
+        resultado = frontend.atualizar(texto)
+        try:
+            ast, _, erros = analisar_programa(texto)
+        except SyntaxError:
+            assert resultado.erros_sintaticos
+        else:
+            assert resultado.ast == ast and resumo(resultado.erros_semanticos) == resumo(erros)
+        posicao = aleatorio.randrange(len(instrucoes))
+        operacao = aleatorio.random()
+        if operacao < 0.3:
+            instrucoes[posicao] = instrucao()
+        elif operacao < 0.7 or len(instrucoes) < 5:
+            instrucoes.insert(posicao, instrucao())
+        else:
+            del instrucoes[posicao]
+
+def test_regras_conflitantes():
+    print("\n🧪 Teste 18: Detecção de Regras Conflitantes por Intervalos")
+
+    def conflitos(programa):
+        analisador = AnalisadorSemantico()
+        analisador.analisar(AnalisadorSintatico(iter_tokens(programa)).analisar())
+        return [e for e in analisador.erros if e.tipo == "REGRAS_CONFLITANTES"]
+
+    # Faixas sobrepostas: 20 < valor < 30 liga e desliga ao mesmo tempo
+    erros = conflitos("""
+    INSERIR SENSOR "Umidade" ID 1
+    SE SENSOR 1 < 30 ENTAO LIGAR "Bomba"
+    SE SENSOR 1 > 20 ENTAO DESLIGAR "Bomba"
+    """)
+    assert len(erros) == 1 and erros[0].linha == 4
+    assert "20 < valor < 30" in erros[0].mensagem
+
+    # Faixas complementares não conflitam, mesmo com limites diferentes do primeiro termo
+    assert not conflitos("""
+    INSERIR SENSOR "Umidade" ID 1
+    SE SENSOR 1 < 30 ENTAO LIGAR "Bomba"
+    SE SENSOR 1 >= 30 ENTAO DESLIGAR "Bomba"
+    SE SENSOR 1 < 10 OU > 90 ENTAO LIGAR "Alarme"
+    SE SENSOR 1 >= 10 E <= 90 ENTAO DESLIGAR "Alarme"
+    """)
+
+    # Conflito que só aparece na segunda parte da cadeia de condições
+    erros = conflitos("""
+    INSERIR SENSOR "Umidade" ID 1
+    SE SENSOR 1 < 10 OU > 80 ENTAO LIGAR "Bomba"
+    SE SENSOR 1 >= 10 E <= 85 ENTAO DESLIGAR "Bomba"
+    """)
+    assert len(erros) == 1 and "80 < valor <= 85" in erros[0].mensagem
+
+    # Varredura equivale à comparação de todos os pares
+    aleatorio = random.Random(11)
+    operadores = ['<', '<=', '>', '>=', '==']
+    grupo_a = [conjunto_condicao(aleatorio.choice(operadores), aleatorio.randint(0, 100)) for _ in range(40)]
+    grupo_b = [conjunto_condicao(aleatorio.choice(operadores), aleatorio.randint(0, 100)) for _ in range(40)]
+    esperado = {(i, j): intersecao(a, b) for i, a in enumerate(grupo_a)
+                for j, b in enumerate(grupo_b) if intersecao(a, b)}
+    assert sobreposicoes(grupo_a, grupo_b) == esperado
+
+def test_verificacao_em_lote():
+    print("\n🧪 Teste 19: Validação em Lote de Programas")
+    programas = {
+        'valido.txt': 'INSERIR SENSOR "Umidade" ID 1\nSE SENSOR 1 < 30 ENTAO LIGAR "Bomba"',
+        'semantico.txt': 'SE SENSOR 2 < 30 ENTAO LIGAR "Bomba"',
+        'sintatico.txt': 'INSERIR SENSOR "Umidade" ID\n',
+    }
+    with tempfile.TemporaryDirectory() as diretorio:
+        for nome, texto in programas.items():
+            with open(os.path.join(diretorio, nome), 'w', encoding='utf-8') as f:
+                f.write(texto)
+
+        concluidos = []
+        relatorio = check([diretorio], processos=2, ao_concluir=concluidos.append)
+        assert len(concluidos) == 3
+        assert (relatorio['arquivos'], relatorio['validos'], relatorio['invalidos']) == (3, 1, 2)
+
+        por_nome = {os.path.basename(r['arquivo']): r for r in relatorio['resultados']}
+        assert por_nome['valido.txt']['sucesso'] and por_nome['valido.txt']['erros'] == []
+        assert por_nome['semantico.txt']['erros'][0]['tipo'] == "SENSOR_NAO_DECLARADO"
+        assert por_nome['sintatico.txt']['erro_sintatico'] is not None
+        assert all('total' in r['tempos'] for r in relatorio['resultados'])
+
+        # O programa de linha de comando grava o mesmo relatório em JSON
+        saida = os.path.join(diretorio, 'relatorio.json')
+        assert verificar_main(['check', diretorio, '--processos', '1', '--silencioso', '--saida', saida]) == 1
+        with open(saida, encoding='utf-8') as f:
+            assert json.load(f)['validos'] == 1
+
+def test_semantica_incremental():
+    print("\n🧪 Teste 20: Análise Semântica Incremental")
+    declaracao, regra, espera = AnalisadorSintatico(iter_tokens(
+        'INSERIR SENSOR "Umidade" ID 1\nSE SENSOR 1 < 30 ENTAO LIGAR "Bomba"\nESPERAR 4000')).analisar()
+
+    analisador = AnalisadorSemantico()
+    analisador.adicionar_no(regra)
+    assert [e.tipo for e in analisador.coletar_erros()] == ["SENSOR_NAO_DECLARADO"]
+    analisador.adicionar_no(declaracao)
+    assert analisador.coletar_erros() == []
+    analisador.adicionar_no(espera)
+    assert [e.tipo for e in analisador.coletar_erros()] == ["TEMPO_EXCESSIVO"]
+    analisador.remover_no(espera)
+    analisador.remover_no(regra)
+    assert [e.tipo for e in analisador.coletar_erros()] == ["SENSOR_NAO_UTILIZADO"]
+
+    # Interface anterior: verificar_* acumulam em self.erros sobre o mesmo estado
+    analisador = AnalisadorSemantico()
+    analisador.verificar_regra(regra)
+    analisador.verificar_declaracao_sensor(declaracao)
+    analisador.verificar_espera(espera)
+    analisador.verificar_consistencia_global()
+    assert [e.tipo for e in analisador.erros] == ["SENSOR_NAO_DECLARADO", "TEMPO_EXCESSIVO"]
+    assert analisador.sensores_declarados == {1: {'nome': "Umidade", 'regras': [regra]}}
+    assert analisador.dispositivos_utilizados == {"Bomba"} and analisador.regras == [regra]
+    assert analisador.sao_condicoes_complementares(('<', 30), ('>=', 30))
+
+    # Edições aleatórias no editor equivalem a analisar o programa inteiro
+    aleatorio = random.Random(13)
+
+    def linha_aleatoria():
+        sorteio = aleatorio.random()
+        if sorteio < 0.2:
+            return f'INSERIR SENSOR "S" ID {aleatorio.randint(1, 3)}'
+        if sorteio < 0.3:
+            return f'ESPERAR {aleatorio.choice([0, 5, 2000])}'
+        operador = aleatorio.choice(['<', '<=', '>', '>=', '=='])
+        acao = aleatorio.choice(['LIGAR', 'DESLIGAR'])
+        return (f'SE SENSOR {aleatorio.randint(1, 3)} {operador} {aleatorio.randint(0, 120)} '
+                f'ENTAO {acao} "Bomba {aleatorio.randint(1, 2)}"')
+
+    def resumo(erros):
+        return sorted((e.linha, e.tipo, e.mensagem) for e in erros)
+
+    linhas = [linha_aleatoria() for _ in range(30)]
+    frontend = FrontendIncremental()
+    for _ in range(200):
+        posicao = aleatorio.randrange(len(linhas))
+        operacao = aleatorio.random()
+        if operacao < 0.4:
+            linhas[posicao] = linha_aleatoria()
+        elif operacao < 0.7 or len(linhas) < 5:
+            linhas.insert(posicao, linha_aleatoria())
+        else:
+            del linhas[posicao]
+        resultado = frontend.atualizar("\n".join(linhas))
+        _, completo = AnalisadorSemantico().analisar(AnalisadorSintatico(iter_tokens("\n".join(linhas))).analisar())
+        assert resumo(resultado.erros_semanticos) == resumo(completo)
+
+def test_otimizador():
+    print("\n🧪 Teste 21: Otimização de Regras")
+    ast = AnalisadorSintatico(iter_tokens("""INSERIR SENSOR "Umidade" ID 1
+SE SENSOR 1 < 10 E > 80 ENTAO LIGAR "Bomba"
+SE SENSOR 1 < 30 ENTAO LIGAR "Bomba"
+SE SENSOR 1 < 20 ENTAO LIGAR "Bomba"
+SE SENSOR 1 < 50 E < 40 ENTAO DESLIGAR "Ventilador"
+SE SENSOR 1 > 90 ENTAO DESLIGAR "Bomba"
+SE SENSOR 1 < 25 ENTAO LIGAR "Bomba"
+""")).analisar()
+    otimizada, alteracoes = otimizar_programa(ast)
+    assert [(a.linha, a.tipo) for a in alteracoes] == [
+        (2, "REGRA_IMPOSSIVEL"), (4, "REGRA_REDUNDANTE"), (5, "CONDICOES_SIMPLIFICADAS")]
+    # A regra da linha 7 fica: a da linha 6 escreve no mesmo dispositivo entre as duas
+    assert [no['linha'] for no in otimizada] == [1, 3, 5, 6, 7]
+    assert otimizada[2]['condicoes'] == [('<', 40)]
+    assert ast[4]['condicoes'] == [('<', 50), ('PALAVRA_AND', '<', 40)]
+
+    # Programas aleatórios: o estado final dos dispositivos não muda
+    aleatorio = random.Random(17)
+    operadores = ['<', '<=', '>', '>=', '==']
+
+    def estado_final(ast, leituras):
+        dispositivos = {}
+        for no in ast:
+            if no['tipo'] == 'regra':
+                regra = compilar_regra(no)
+                if regra.avaliar(leituras[regra.sensor_id]):
+                    dispositivos[regra.alvo] = regra.ligar
+        return dispositivos
+
+    for _ in range(50):
+        linhas = ['INSERIR SENSOR "A" ID 1', 'INSERIR SENSOR "B" ID 2']
+        for _ in range(15):
+            termos = f"{aleatorio.choice(operadores)} {aleatorio.randint(0, 100)}"
+            for _ in range(aleatorio.randint(0, 3)):
+                termos += f" {aleatorio.choice(['E', 'OU'])} {aleatorio.choice(operadores)} {aleatorio.randint(0, 100)}"
+            linhas.append(f'SE SENSOR {aleatorio.randint(1, 2)} {termos} ENTAO '
+                          f'{aleatorio.choice(["LIGAR", "DESLIGAR"])} "D{aleatorio.randint(1, 3)}"')
+        ast = AnalisadorSintatico(iter_tokens("\n".join(linhas))).analisar()
+        otimizada, _ = otimizar_programa(ast)
+        for _ in range(30):
+            leituras = {1: aleatorio.choice([aleatorio.randint(0, 100), aleatorio.uniform(-5, 105)]),
+                        2: aleatorio.randint(0, 100)}
+            assert estado_final(otimizada, leituras) == estado_final(ast, leituras)
+
+    # Cadeia dobrada é equivalente à original em todos os valores
+    for _ in range(200):
+        condicoes = [(aleatorio.choice(operadores), aleatorio.randint(0, 100))]
+        for _ in range(aleatorio.randint(0, 4)):
+            condicoes.append((aleatorio.choice(['PALAVRA_AND', 'PALAVRA_OR']),
+                              aleatorio.choice(operadores), aleatorio.randint(0, 100)))
+        original = compilar_condicoes(condicoes)
+        dobrada = compilar_condicoes(condicoes_do_conjunto(conjunto_condicoes(condicoes)))
+        assert all(original(v / 2) == dobrada(v / 2) for v in range(-10, 212))
+
+def test_agrupamento_regras():
+    print("\n🧪 Teste 22: Regras Unidas por Sensor, Ação e Dispositivo")
+    ast = AnalisadorSintatico(iter_tokens("""INSERIR SENSOR "Umidade" ID 1
+INSERIR SENSOR "Temperatura" ID 2
+SE SENSOR 1 < 20 ENTAO LIGAR "Bomba"
+SE SENSOR 2 > 35 ENTAO LIGAR "Ventilador"
+SE SENSOR 1 >= 90 ENTAO LIGAR "Bomba"
+SE SENSOR 1 > 50 ENTAO DESLIGAR "Bomba"
+SE SENSOR 1 == 60 ENTAO DESLIGAR "Bomba"
+ESPERAR 1
+SE SENSOR 1 == 70 ENTAO DESLIGAR "Bomba"
+""")).analisar()
+    regras = [arg for opcode, arg in compilar_programa(ast) if opcode == OP_REGRA]
+    assert [getattr(r, 'regras', None) and [m.linha for m in r.regras] for r in regras] == [[3, 5], None, [6, 7], None]
+
+    maquina = MaquinaVirtual(silencioso=True)
+    maquina.carregar(ast)
+    maquina.historico.clear()
+    assert maquina.executar_ciclo({1: 95, 2: 20}) == 4
+    assert maquina.dispositivos["Bomba"] is False
+    # As linhas 5 e 6 são verdadeiras, mas só a decisão final vira comando
+    assert maquina.disparos[5] == maquina.disparos[6] == 1
+    comandos = [evento['mensagem'] for evento in maquina.historico if evento['tipo'] == TIPO_COMANDO]
+    assert comandos == ["🔴 Desligando o dispositivo: Bomba (regra da linha 6)"]
+
+    # Regras sobrepostas do mesmo grupo: cada membro verdadeiro registra o seu disparo
+    ast = AnalisadorSintatico(iter_tokens("""INSERIR SENSOR "Umidade" ID 1
+SE SENSOR 1 < 50 ENTAO LIGAR "Bomba"
+SE SENSOR 1 < 30 ENTAO LIGAR "Bomba"
+""")).analisar()
+    maquina = MaquinaVirtual(silencioso=True)
+    maquina.carregar(ast)
+    maquina.historico.clear()
+    maquina.executar_ciclo({1: 10})
+    assert maquina.disparos[2] == maquina.disparos[3] == 1
+    assert [evento['linha'] for evento in maquina.historico if evento['tipo'] == TIPO_DISPARO] == [2, 3]
+    comandos = [evento['mensagem'] for evento in maquina.historico if evento['tipo'] == TIPO_COMANDO]
+    assert comandos == ["🟢 Ligando o dispositivo: Bomba (regra da linha 2)"]
+
+    # Programas aleatórios: mesmo estado final que a passagem regra a regra
+    aleatorio = random.Random(19)
+    for _ in range(30):
+        linhas = ['INSERIR SENSOR "A" ID 1', 'INSERIR SENSOR "B" ID 2']
+        for _ in range(20):
+            linhas.append(f'SE SENSOR {aleatorio.randint(1, 2)} {aleatorio.choice(["<", ">", "=="])} '
+                          f'{aleatorio.randint(0, 100)} ENTAO {aleatorio.choice(["LIGAR", "DESLIGAR"])} '
+                          f'"D{aleatorio.randint(1, 2)}"')
+        ast = AnalisadorSintatico(iter_tokens("\n".join(linhas))).analisar()
+        maquina = MaquinaVirtual(silencioso=True)
+        maquina.carregar(ast)
+        referencia = {}
+        for _ in range(20):
+            leituras = {1: aleatorio.randint(0, 100), 2: aleatorio.randint(0, 100)}
+            maquina.executar_ciclo(leituras)
+            for no in ast:
+                if no['tipo'] == 'regra' and maquina.avaliar_condicoes(leituras[no['sensor_id']], no['condicoes']):
+                    referencia[no['alvo']] = no['acao'] == 'turn_on'
+            assert maquina.dispositivos == referencia
+
+def test_gravador_log():
+    print("\n🧪 Teste 23: Log Gravado em Segundo Plano")
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo = os.path.join(diretorio, "eventos.log")
+
+        # Máquina com gravador: histórico em memória limitado, log completo no arquivo
+        gravador = GravadorLog(arquivo, max_bytes=2_000, copias=50, intervalo=0.01)
+        maquina = MaquinaVirtual(silencioso=True, gravador=gravador, max_historico=10)
+        for i in range(200):
+            maquina.emitir(f"Evento {i}")
+        assert len(maquina.historico) == 10
+        gravador.fechar()
+        assert gravador.escritos == 200 and gravador.rotacoes > 0
+        linhas = []
+        for nome in sorted(os.listdir(diretorio), key=lambda n: -int(n.rsplit('.', 1)[1]) if n[-1].isdigit() else 0):
+            with open(os.path.join(diretorio, nome), encoding='utf-8') as f:
+                linhas += f.read().splitlines()
+        assert [linha.split(" - ", 1)[1] for linha in linhas] == [f"Evento {i}" for i in range(200)]
+        assert all(os.path.getsize(os.path.join(diretorio, n)) <= 2_000 for n in os.listdir(diretorio))
+
+        # Fila cheia com a política de descarte: os mais antigos são descartados e contados
+        liberar = threading.Event()
+
+        class GravadorLento(GravadorLog):
+            def formatar(self, evento):
+                liberar.wait()
+                return super().formatar(evento)
+
+        gravador = GravadorLento(arquivo, capacidade=20, politica=POLITICA_DESCARTAR, max_bytes=None, intervalo=0.01)
+        gravador.registrar({'timestamp': 't', 'mensagem': 'primeiro'})
+        assert aguardar(lambda: gravador.em_gravacao)
+        for i in range(25):
+            gravador.registrar({'timestamp': 't', 'mensagem': f'{i}'})
+        assert gravador.descartados == 5
+        liberar.set()
+        gravador.fechar()
+        assert gravador.estatisticas()['escritos'] == 21
+
+        # Quem espera espaço na fila quando o gravador é fechado recebe um erro
+        liberar.clear()
+        gravador = GravadorLento(arquivo, capacidade=1, max_bytes=None, intervalo=0.01)
+        gravador.registrar({'timestamp': 't', 'mensagem': 'primeiro'})
+        assert aguardar(lambda: gravador.em_gravacao)
+        gravador.registrar({'timestamp': 't', 'mensagem': 'segundo'})
+        erros = []
+        def produzir():
+            try:
+                gravador.registrar({'timestamp': 't', 'mensagem': 'terceiro'})
+            except RuntimeError as e:
+                erros.append(e)
+        produtor = threading.Thread(target=produzir, daemon=True)
+        produtor.start()
+        assert aguardar(lambda: gravador.bloqueios)
+        fechamento = threading.Thread(target=gravador.fechar)
+        fechamento.start()
+        produtor.join(5)
+        liberar.set()
+        fechamento.join(5)
+        assert len(erros) == 1 and gravador.escritos == 2
+
+        # Rotação diária: um arquivo que já existia, de outro dia, é rotacionado
+        os.utime(arquivo, (time.time() - 2 * 86400,) * 2)
+        for nome in os.listdir(diretorio):
+            if nome != "eventos.log":
+                os.remove(os.path.join(diretorio, nome))
+        gravador = GravadorLog(arquivo, rotacao_diaria=True, max_bytes=None, intervalo=0.01)
+        gravador.registrar({'timestamp': 't', 'mensagem': 'hoje'})
+        gravador.fechar()
+        assert gravador.rotacoes == 1 and os.path.exists(arquivo + ".1")
+        with open(arquivo, encoding='utf-8') as f:
+            assert f.read() == "t - hoje\n"
+
+def test_log_jsonl_indexado():
+    print("\n🧪 Teste 24: Log JSONL com Índice de Tempo")
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo = os.path.join(diretorio, "eventos.jsonl")
+        gravador = GravadorJSONL(arquivo, passo_indice=1024, max_bytes=None, intervalo=0.01)
+        for i in range(5000):
+            # Um instante fora de ordem é ajustado para manter o arquivo ordenado
+            instante = 1000 + i * 0.1 if i != 2500 else 900
+            gravador.registrar({'timestamp': '', 'mensagem': '', 'instante': instante, 'tipo': 'comando',
+                                'dispositivo': f"Bomba {i % 3}", 'ligado': (i // 3) % 2 == 0, 'sensor': 1, 'valor': i % 100})
+        gravador.fechar()
+
+        instantes, posicoes = carregar_indice(arquivo)
+        assert len(instantes) > 100 and instantes == sorted(instantes)
+        with open(arquivo, 'rb') as f:
+            todos = [json.loads(linha) for linha in f]
+            f.seek(posicoes[50])
+            assert json.loads(f.readline())['ts'] == instantes[50]
+        assert [e['ts'] for e in todos] == sorted(e['ts'] for e in todos)
+
+        eventos = list(consultar(arquivo, 1200.0, 1250.0, dispositivo="Bomba 2"))
+        assert eventos == [e for e in todos if 1200.0 <= e['ts'] <= 1250.0 and e['dispositivo'] == "Bomba 2"]
+        assert eventos and all(e['tipo'] == 'comando' for e in eventos)
+
+        # Reinício: o último ts vem do fim do arquivo, não da última entrada do índice esparso
+        assert todos[-1]['ts'] > instantes[-1]
+        gravador = GravadorJSONL(arquivo, passo_indice=1024, max_bytes=None, intervalo=0.01)
+        assert gravador.ultimo_ts == todos[-1]['ts']
+        gravador.registrar({'timestamp': '', 'mensagem': '', 'instante': instantes[-1], 'tipo': 'comando'})
+        gravador.fechar()
+        with open(arquivo, 'rb') as f:
+            continuado = [json.loads(linha)['ts'] for linha in f]
+        assert continuado[-1] == todos[-1]['ts'] and continuado == sorted(continuado)
+
+        # Com rotação, a consulta percorre as cópias (cada uma com o seu índice)
+        rotacionado = os.path.join(diretorio, "rotacionado.jsonl")
+        gravador = GravadorJSONL(rotacionado, passo_indice=1024, max_bytes=64 * 1024, copias=20, intervalo=0.01)
+        for evento in todos:
+            gravador.registrar({'timestamp': '', 'mensagem': '', 'instante': evento['ts'], 'tipo': 'comando',
+                                'dispositivo': evento['dispositivo'], 'ligado': evento['ligado']})
+        gravador.fechar()
+        assert gravador.rotacoes > 3 and len(segmentos(rotacionado)) == gravador.rotacoes + 1
+        assert [e['ts'] for e in consultar(rotacionado)] == [e['ts'] for e in todos]
+        assert [e['ts'] for e in consultar(rotacionado, 1200.0, 1250.0, dispositivo="Bomba 2")] == \
+            [e['ts'] for e in eventos]
+
+        # Máquina gravando eventos estruturados; períodos em que a bomba ficou ligada
+        arquivo = os.path.join(diretorio, "maquina.jsonl")
+        gravador = GravadorJSONL(arquivo, intervalo=0.01)
+        maquina = MaquinaVirtual(silencioso=True, gravador=gravador)
+        maquina.carregar(AnalisadorSintatico(iter_tokens(
+            'INSERIR SENSOR "Umidade" ID 1\nSE SENSOR 1 < 30 ENTAO LIGAR "Bomba"\n'
+            'SE SENSOR 1 >= 30 ENTAO DESLIGAR "Bomba"')).analisar())
+        for valor in (50, 10, 20, 60, 5):
+            maquina.processar_leitura(1, valor)
+        gravador.fechar()
+        leituras = list(consultar(arquivo, tipo='leitura'))
+        # Cada leitura aparece uma vez por regra avaliada (duas regras no sensor)
+        assert [e['valor'] for e in leituras] == [50, 50, 10, 10, 20, 20, 60, 60, 5, 5]
+        periodos = periodos_ligado(arquivo, "Bomba")
+        assert len(periodos) == 2 and periodos[0][1] is not None and periodos[1][1] is None
+
+def test_diario_estado():
+    print("\n🧪 Teste 25: Diário de Estado com Snapshot")
+    programa = AnalisadorSintatico(iter_tokens(
+        'INSERIR SENSOR "Umidade" ID 1\nSE SENSOR 1 < 30 ENTAO LIGAR "Bomba"\n'
+        'SE SENSOR 1 >= 30 ENTAO DESLIGAR "Bomba"')).analisar()
+    with tempfile.TemporaryDirectory() as diretorio:
+        snapshot = os.path.join(diretorio, "estado.json")
+        diario = DiarioEstado(snapshot, compactar_a_cada=4)
+        maquina = MaquinaVirtual(silencioso=True, diario=diario)
+        maquina.carregar(programa, simular=False)
+        for valor in (50, 10, 10, 20, 60, 5, 70):
+            maquina.processar_leitura(1, valor)
+        maquina.salvar_historico()
+
+        # Snapshot compactado é um JSON completo no formato de estado_sistema.json
+        with open(snapshot, encoding='utf-8') as f:
+            estado = json.load(f)
+        assert set(estado) == {'sensores', 'dispositivos', 'timestamp'}
+        with open(diario.arquivo_diario, encoding='utf-8') as f:
+            linhas = f.read().splitlines()
+        assert len(linhas) < 4
+
+        # Partida a quente: snapshot + diário, ignorando uma última linha cortada
+        with open(diario.arquivo_diario, 'a', encoding='utf-8') as f:
+            f.write('["d","Bom')
+        restaurado = DiarioEstado(snapshot)
+        assert restaurado.dispositivos == maquina.dispositivos == {"Bomba": False}
+        assert restaurado.sensores == {1: {'nome': "Umidade", 'valor': 70}}
+
+        # A nova máquina parte do estado salvo e da última leitura conhecida
+        nova = MaquinaVirtual(silencioso=True, diario=restaurado)
+        nova.carregar(programa, simular=False)
+        assert nova.sensores[1]['valor'] == 70 and nova.dispositivos == {"Bomba": False}
+        assert nova.processar_leitura(1, 15) == {"Bomba": True}
+        restaurado.fechar()
+        assert DiarioEstado(snapshot).dispositivos == {"Bomba": True}
+        assert not [nome for nome in os.listdir(diretorio) if nome.endswith(".tmp")]
+
+        # Execução reativa: cada ciclo já está no arquivo, sem fechar o diário (queda)
+        reativo = DiarioEstado(snapshot)
+        execucao = ExecucaoReativa(programa, MQTTFalso(), diario=reativo, eventos_compactos=True)
+        execucao.receber_leitura(1, 80)
+        assert DiarioEstado(snapshot).dispositivos == {"Bomba": False}
+        reativo.fechar()
+
+def test_historico_sqlite():
+    print("\n🧪 Teste 26: Histórico em SQLite")
+    programa = """
+    INSERIR SENSOR "Umidade" ID 1
+    SE SENSOR 1 < 30 ENTAO LIGAR "Bomba"
+    SE SENSOR 1 >= 30 ENTAO DESLIGAR "Bomba"
+    """
+    ast = AnalisadorSintatico(iter_tokens(programa)).analisar()
+    with tempfile.TemporaryDirectory() as diretorio:
+        banco = os.path.join(diretorio, "historico.db")
+        historico = HistoricoSQLite(banco, tamanho_lote=3)
+        gravador = GravadorLog(os.path.join(diretorio, "eventos.log"))
+        execucao = ExecucaoReativa(ast, MQTTFalso(), gravador=gravador, historico=historico)
+        valores = [50, 20, 10, 40, 45, 5]
+        for valor in valores:
+            execucao.receber_leitura(1, valor)
+        historico.fechar()
+        gravador.fechar()
+
+        assert [valor for _, valor in leituras(banco, 1)] == valores
+        # Só mudanças de estado viram transições; cada regra verdadeira é um disparo
+        assert [ligado for _, ligado in transicoes(banco, "Bomba")] == [False, True, False, True]
+        assert [(linha, ligado) for _, linha, ligado in disparos(banco, "Bomba")] == \
+            [(4, False), (3, True), (3, True), (4, False), (4, False), (3, True)]
+        assert historico.estatisticas()['escritos'] == 16 and historico.falhas == 0
+        instantes = [ts for ts, _ in leituras(banco, 1)]
+        assert len(leituras(banco, 1, instantes[1], instantes[3])) == 3
+
+        conexao = sqlite3.connect(banco)
+        assert conexao.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        indices = {nome for (nome,) in conexao.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_leituras_sensor_ts", "idx_transicoes_dispositivo_ts"} <= indices
+        conexao.close()
+
+        # O log de texto continua recebendo todos os eventos
+        with open(os.path.join(diretorio, "eventos.log"), encoding='utf-8') as f:
+            assert "Ligando o dispositivo: Bomba" in f.read()
+
+        # Leituras, transições e disparos carimbados pelo mesmo relógio (o da máquina)
+        banco = os.path.join(diretorio, "relogio.db")
+        historico = HistoricoSQLite(banco)
+        execucao = ExecucaoReativa(ast, MQTTFalso(), historico=historico, eventos_compactos=True)
+        execucao.maquina.relogio = RelogioVirtual(1000)
+        execucao.receber_leitura(1, 10)
+        historico.fechar()
+        assert leituras(banco, 1) == [(1000.0, 10.0)]
+        assert transicoes(banco, "Bomba") == [(1000.0, True)]
+        assert [ts for ts, _, _ in disparos(banco, "Bomba")] == [1000.0]
+
+def test_series_temporais():
+    print("\n🧪 Teste 27: Séries Temporais com Redução de Resolução")
+    gerador = random.Random(11)
+    valores = [gerador.randint(0, 100) for _ in range(1000)]
+    series = SeriesSensores(resolucoes=((0, 100), (10, 50), (100, 20)))
+    for instante, valor in enumerate(valores):
+        series.registrar(7, valor, instante)
+
+    # Janela dentro do anel bruto: estatísticas exatas
+    resumo = series.estatisticas(7, 950, 999, percentis=(0, 50, 90, 100))
+    janela = sorted(valores[950:])
+    assert resumo['resolucao'] == 0 and resumo['contagem'] == 50
+    assert resumo['minimo'] == resumo['p0'] == janela[0] and resumo['maximo'] == resumo['p100'] == janela[-1]
+    assert resumo['p50'] == (janela[24] + janela[25]) / 2
+    assert abs(resumo['media'] - sum(janela) / 50) < 1e-9
+    assert series.ultimos(7, 49)['contagem'] == 50
+
+    # Janelas mais antigas vêm dos níveis agregados: contagem, mínimo, máximo e média exatos
+    for inicio, resolucao in ((600, 10), (0, 100)):
+        resumo = series.estatisticas(7, inicio, 999)
+        janela = valores[inicio:]
+        assert resumo['resolucao'] == resolucao and resumo['contagem'] == len(janela)
+        assert (resumo['minimo'], resumo['maximo']) == (min(janela), max(janela))
+        assert abs(resumo['media'] - sum(janela) / len(janela)) < 1e-9
+
+    # Memória fixa, não importa quantas leituras chegam
+    serie = series.series[7]
+    ocupado = serie.bytes_ocupados()
+    for instante in range(1000, 5000):
+        series.registrar(7, 50, instante)
+    assert serie.bytes_ocupados() == ocupado
+    assert series.estatisticas(7, 4900)['minimo'] == 50 and series.estatisticas(8) is None
+
+def test_eventos_compactos():
+    print("\n🧪 Teste 28: Modo Headless com Eventos Compactos")
+    programa = AnalisadorSintatico(iter_tokens(
+        'INSERIR SENSOR "Umidade" ID 1\n'
+        'SE SENSOR 1 < 20 ENTAO LIGAR "Bomba"\nSE SENSOR 1 > 80 ENTAO LIGAR "Bomba"\n'
+        'SE SENSOR 1 >= 40 E <= 60 ENTAO DESLIGAR "Bomba"')).analisar()
+    normal = MaquinaVirtual(silencioso=True)
+    normal.carregar(programa, simular=False)
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo = os.path.join(diretorio, "eventos.log")
+        gravador = GravadorLog(arquivo)
+        headless = MaquinaVirtual(gravador=gravador, eventos_compactos=True, max_historico=100)
+        saida = io.StringIO()
+        sys.stdout, original = saida, sys.stdout
+        try:
+            headless.carregar(programa, simular=False)
+            for valor in (10, 50, 90, 30):
+                assert headless.processar_leitura(1, valor) == normal.processar_leitura(1, valor)
+        finally:
+            sys.stdout = original
+        gravador.fechar()
+        assert saida.getvalue() == ""
+
+        # Só tuplas no histórico; o texto é montado sob demanda e é o mesmo do modo normal
+        assert all(type(evento) is EventoCompacto for evento in headless.historico)
+        assert [e.mensagem() for e in headless.historico] == [e['mensagem'] for e in normal.historico]
+        assert "🟢 Ligando o dispositivo: Bomba (regra da linha 3)" in [e['mensagem'] for e in normal.historico]
+        for compacto, evento in zip(headless.historico, normal.historico):
+            dados = compacto.como_dict()
+            assert abs(dados.pop('instante') - evento.pop('instante')) < 5
+            dados.pop('timestamp'), evento.pop('timestamp')
+            assert dados == evento
+        with open(arquivo, encoding='utf-8') as f:
+            linhas = [linha.split(" - ", 1)[1] for linha in f.read().splitlines()]
+        assert linhas == [e.mensagem() for e in headless.historico]
+
+def test_reproducao_leituras():
+    print("\n🧪 Teste 29: Reprodução de Leituras com Relógio Virtual")
+    programa = (
+        'INSERIR SENSOR "Umidade" ID 1\n'
+        'SE SENSOR 1 < 30 ENTAO LIGAR "Bomba"\n'
+        'SE SENSOR 1 >= 30 ENTAO DESLIGAR "Bomba"\n'
+        'ESPERAR 3600')
+    novo = programa.replace("30", "40")
+    leituras_gravadas = [(1000, 1, 50), (1060, 1, 20), (1120, 1, 25), (1300, 1, 35), (1400, 9, 0), (1500, 1, 10)]
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivos = {nome: os.path.join(diretorio, nome) for nome in
+                    ("programa.txt", "novo.txt", "leituras.csv", "leituras.jsonl", "relatorio.json")}
+        with open(arquivos["programa.txt"], 'w', encoding='utf-8') as f:
+            f.write(programa)
+        with open(arquivos["novo.txt"], 'w', encoding='utf-8') as f:
+            f.write(novo)
+        with open(arquivos["leituras.csv"], 'w', encoding='utf-8') as f:
+            f.write("ts,sensor_id,valor\n" + "".join(f"{ts},{s},{v}\n" for ts, s, v in leituras_gravadas))
+        with open(arquivos["leituras.jsonl"], 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps({'ts': ts, 'sensor_id': s, 'value': v}) + "\n" for ts, s, v in leituras_gravadas)
+
+        ast = AnalisadorSintatico(iter_tokens(programa)).analisar()
+        inicio = time.perf_counter()
+        resultado = reproduzir(ast, ler_leituras(arquivos["leituras.csv"]))
+        assert time.perf_counter() - inicio < 1  # o ESPERAR 3600 não espera de verdade
+        assert (resultado.leituras, resultado.ignoradas) == (5, 1)
+        assert resultado.linhas_do_tempo == {"Bomba": [(1000, False), (1060, True), (1300, False), (1500, True)]}
+        assert resultado.tempo_ligado == {"Bomba": 240}
+        assert resultado.disparos == {2: 3, 3: 2}
+        # Mesmo resultado a partir do JSONL: a reprodução é determinística
+        de_jsonl = reproduzir(ast, ler_leituras(arquivos["leituras.jsonl"]))
+        assert de_jsonl.linhas_do_tempo == resultado.linhas_do_tempo and de_jsonl.disparos == resultado.disparos
+
+        assert reproducao_main([arquivos["programa.txt"], arquivos["leituras.csv"],
+                                "--comparar", arquivos["novo.txt"], "--saida", arquivos["relatorio.json"]]) == 0
+        with open(arquivos["relatorio.json"], encoding='utf-8') as f:
+            comparacao = json.load(f)['comparacao']["Bomba"]
+        assert comparacao['tempo_ligado'] == [240, 440] and comparacao['diferenca'] == 200
+
+    # Na execução completa, ESPERAR só avança o relógio virtual
+    relogio = RelogioVirtual(1000)
+    maquina = MaquinaVirtual(silencioso=True, relogio=relogio)
+    maquina.executar(AnalisadorSintatico(iter_tokens(programa)).analisar())
+    assert relogio.time() == 4600 and maquina.historico[-1]['instante'] == 1000
+
+def test_avaliacao_vetorizada():
+    print("\n🧪 Teste 30: Avaliação Vetorizada com NumPy")
+    if np is None:
+        print("⚠️ NumPy não instalado, teste ignorado")
+        if 'pytest' in sys.modules:  # sob o pytest, aparece como ignorado
+            import pytest
+            pytest.importorskip("numpy", reason="NumPy é opcional (requirements.txt)")
+        return
+    programa = AnalisadorSintatico(iter_tokens(
+        'INSERIR SENSOR "Umidade" ID 1\nINSERIR SENSOR "Temperatura" ID 2\n'
+        'SE SENSOR 1 < 30 ENTAO LIGAR "Bomba"\nSE SENSOR 1 > 90 ENTAO LIGAR "Bomba"\n'
+        'SE SENSOR 2 > 35 E < 50 OU == 70 ENTAO DESLIGAR "Bomba"\n'
+        'SE SENSOR 1 >= 60 ENTAO DESLIGAR "Bomba"\n'
+        'SE SENSOR 2 > 30 ENTAO LIGAR "Ventilador"\nESPERAR 5\n'
+        'SE SENSOR 2 <= 30 ENTAO DESLIGAR "Ventilador"')).analisar()
+    gerador = random.Random(21)
+    fluxo = [(float(i), gerador.choice((1, 2)), gerador.randint(0, 100)) for i in range(3000)]
+
+    # Cada instante é uma leitura; comparar com a reprodução pela máquina virtual
+    referencia = reproduzir(programa, fluxo)
+    instantes = np.array([ts for ts, _, _ in fluxo])
+    leituras = alinhar_leituras([s for _, s, _ in fluxo], [v for _, _, v in fluxo])
+    estados = avaliar_programa(programa, leituras)
+    assert set(estados) == set(referencia.linhas_do_tempo) == {"Bomba", "Ventilador"}
+    for alvo, linha in referencia.linhas_do_tempo.items():
+        esperado = np.zeros(len(fluxo), dtype=bool)
+        for ts, ligado in linha:
+            esperado[int(ts):] = ligado
+        assert (estados[alvo] == esperado).all(), alvo
+        assert tempo_ligado(estados[alvo], instantes) == referencia.tempo_ligado[alvo]
+
+    # NaN = sem leitura ainda: as regras do sensor não disparam e o estado inicial vale
+    estados = avaliar_programa(programa, {1: [np.nan, 10, np.nan, 70]}, estado_inicial={"Bomba": True})
+    assert estados["Bomba"].tolist() == [True, True, True, False]
+    assert preencher_adiante([np.nan, 1, np.nan, 3]).tolist()[1:] == [1, 1, 3]
+
+    # Referência em Python puro: as regras compiladas aplicadas instante a
+    # instante, em ordem de programa; sem regra verdadeira o estado se mantém
+    def referencia_python(regras, leituras, estado_inicial):
+        estado = dict(estado_inicial)
+        linhas = {regra.alvo: [] for regra in regras}
+        for instante in range(len(next(iter(leituras.values())))):
+            for regra in regras:
+                valor = leituras[regra.sensor_id][instante] if regra.sensor_id in leituras else float('nan')
+                if valor == valor and regra.avaliar(valor):  # NaN: sem leitura
+                    estado[regra.alvo] = regra.ligar
+            for alvo, linha in linhas.items():
+                linha.append(estado.get(alvo, False))
+        return linhas
+
+    for _ in range(30):
+        linhas = ['INSERIR SENSOR "A" ID 1', 'INSERIR SENSOR "B" ID 2']
+        for _ in range(gerador.randint(1, 12)):
+            condicoes = f'{gerador.choice(["<", ">", "<=", ">=", "=="])} {gerador.randint(0, 100)}'
+            if gerador.random() < 0.3:
+                condicoes += f' {gerador.choice(["E", "OU"])} {gerador.choice(["<", ">"])} {gerador.randint(0, 100)}'
+            linhas.append(f'SE SENSOR {gerador.randint(1, 3)} {condicoes} ENTAO '
+                          f'{gerador.choice(["LIGAR", "DESLIGAR"])} "D{gerador.randint(1, 2)}"')
+        ast = AnalisadorSintatico(iter_tokens("\n".join(linhas))).analisar()
+        leituras = {sensor: [gerador.choice([float('nan'), gerador.randint(0, 100), gerador.uniform(-5, 105)])
+                             for _ in range(200)] for sensor in (1, 2)}
+        estado_inicial = {"D1": gerador.random() < 0.5}
+        for agrupar in (True, False):
+            regras = [arg for opcode, arg in compilar_programa(ast, agrupar) if opcode == OP_REGRA]
+            estados = avaliar_regras(regras, leituras, estado_inicial)
+            esperado = referencia_python(regras, leituras, estado_inicial)
+            assert {alvo: estado.tolist() for alvo, estado in estados.items()} == esperado
+
+def test_camada_atuadores():
+    print("\n🧪 Teste 31: Comandos Publicados só nas Transições")
+    programa = AnalisadorSintatico(iter_tokens(
+        'INSERIR SENSOR "Umidade" ID 1\n'
+        'SE SENSOR 1 < 30 ENTAO LIGAR "Bomba"\nSE SENSOR 1 >= 30 ENTAO DESLIGAR "Bomba"')).analisar()
+    mqtt = MQTTFalso()
+    relogio = RelogioVirtual()
+    atuadores = CamadaAtuadores(mqtt, intervalo_renovacao=60, relogio=relogio)
+    comandados = []
+    execucao = ExecucaoReativa(programa, mqtt, atuadores=atuadores,
+                               ao_comandar=lambda alvo, ligado: comandados.append(ligado))
+    for valor in (20, 10, 25, 5, 50, 60, 70, 15):
+        relogio.sleep(1)
+        execucao.receber_leitura(1, valor)
+    assert mqtt.publicados == [("dispositivos/Bomba", {"estado": estado}) for estado in
+                               ("ligado", "desligado", "ligado")]
+    assert comandados == [True, False, True]
+    assert atuadores.estatisticas() == {'publicados': 3, 'renovacoes': 0, 'suprimidos': 5}
+
+    # Renovação: o mesmo estado é republicado depois do intervalo
+    relogio.sleep(30)
+    assert atuadores.renovar() == 0
+    execucao.receber_leitura(1, 12)
+    assert len(mqtt.publicados) == 3
+    relogio.sleep(30)
+    assert atuadores.renovar() == 1 and mqtt.publicados[-1] == ("dispositivos/Bomba", {"estado": "ligado"})
+    relogio.sleep(60)
+    execucao.receber_leitura(1, 8)
+    assert len(mqtt.publicados) == 5 and atuadores.renovacoes == 2
+
+    # Partida a quente: o estado restaurado pelo diário é publicado em iniciar()
+    # e passa a ser renovado, mesmo sem nenhuma leitura nova
+    with tempfile.TemporaryDirectory() as diretorio:
+        snapshot = os.path.join(diretorio, "estado.json")
+        diario = DiarioEstado(snapshot)
+        diario.registrar_dispositivo("Bomba", True)
+        diario.fechar()
+        mqtt_reinicio = MQTTFalso()
+        atuadores_reinicio = CamadaAtuadores(mqtt_reinicio, intervalo_renovacao=60, relogio=relogio)
+        restaurada = ExecucaoReativa(programa, mqtt_reinicio, diario=DiarioEstado(snapshot),
+                                     atuadores=atuadores_reinicio, eventos_compactos=True)
+        restaurada.iniciar()
+        assert mqtt_reinicio.publicados == [("dispositivos/Bomba", {"estado": "ligado"})]
+        assert atuadores_reinicio.estado("dispositivos/Bomba") is True
+        relogio.sleep(60)
+        assert atuadores_reinicio.renovar() == 1
+        restaurada.diario.fechar()
+
+    # Depois de esquecer o estado (ex.: reconexão), o próximo comando é publicado
+    atuadores.esquecer()
+    assert atuadores.comandar("dispositivos/Bomba", True, {"estado": "ligado"})
+    assert not atuadores.comandar("dispositivos/Bomba", True, {"estado": "ligado"})
+
+    # Um comando concorrente com a renovação é publicado depois dela, nunca antes
+    class MQTTConcorrente(MQTTFalso):
+        interferir = False
+        comando = None
+
+        def publicar(self, topico, dados):
+            if self.interferir:
+                # Outra thread comanda o desligamento no meio da renovação
+                self.interferir = False
+                self.comando = threading.Thread(target=atuadores.comandar, daemon=True,
+                                                args=(topico, False, {"estado": "desligado"}))
+                self.comando.start()
+                self.comando.join(0.2)
+            super().publicar(topico, dados)
+
+    mqtt = MQTTConcorrente()
+    atuadores = CamadaAtuadores(mqtt, intervalo_renovacao=60, relogio=relogio)
+    atuadores.comandar("dispositivos/Bomba", True, {"estado": "ligado"})
+    relogio.sleep(60)
+    mqtt.interferir = True
+    assert atuadores.renovar() == 1
+    mqtt.comando.join(5)
+    assert not mqtt.comando.is_alive()
+    assert mqtt.publicados[-1] == ("dispositivos/Bomba", {"estado": "desligado"})
+    assert atuadores.estado("dispositivos/Bomba") is False
+
+    # Ciclos concorrentes (ex.: thread do MQTT e recarregar): a última publicação
+    # de cada tópico corresponde ao estado final da máquina
+    def codificar_devagar(alvo, ligado):
+        if ligado:
+            time.sleep(0.0005)  # um desligamento decidido depois pode passar na frente
+        return comando_padrao(alvo, ligado)
+
+    class Transicoes:
+        def __init__(self):
+            self.estados = []
+
+        def registrar(self, evento):
+            if evento.tipo == TIPO_COMANDO:
+                self.estados.append(evento.args[3])
+
+    mqtt = MQTTFalso()
+    transicoes_maquina = Transicoes()
+    execucao = ExecucaoReativa(programa, mqtt, codificar_comando=codificar_devagar,
+                               gravador=transicoes_maquina, eventos_compactos=True)
+    def enviar(valores):
+        for valor in valores:
+            execucao.receber_leitura(1, valor)
+    threads = [threading.Thread(target=enviar, args=([10, 90] * 100,), daemon=True),
+               threading.Thread(target=enviar, args=([90, 10] * 100,), daemon=True)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+        assert not thread.is_alive()
+    # O broker recebe as transições na ordem em que a máquina as decidiu
+    assert [dados for _, dados in mqtt.publicados] == \
+        [comando_padrao("Bomba", ligado) for ligado in transicoes_maquina.estados]
+    ultimos = dict(mqtt.publicados)
+    assert ultimos == {"dispositivos/Bomba": comando_padrao("Bomba", execucao.maquina.dispositivos["Bomba"])}
+
+def test_decisoes_por_ciclo():
+    print("\n🧪 Teste 32: Um Comando por Dispositivo Alterado em Cada Ciclo")
+    # Passagem completa: todas as regras são verdadeiras para qualquer leitura simulada
+    ast = AnalisadorSintatico(iter_tokens("""INSERIR SENSOR "Umidade" ID 1
+SE SENSOR 1 >= 0 ENTAO LIGAR "Bomba"
+SE SENSOR 1 <= 100 ENTAO DESLIGAR "Bomba"
+SE SENSOR 1 >= 0 ENTAO LIGAR "Bomba"
+ESPERAR 1
+SE SENSOR 1 <= 100 ENTAO DESLIGAR "Bomba"
+""")).analisar()
+    maquina = MaquinaVirtual(silencioso=True, relogio=RelogioVirtual())
+    maquina.executar(ast)
+    eventos = [(e['tipo'], e.get('ligado'), e.get('linha')) for e in maquina.historico
+               if e['tipo'] in (TIPO_COMANDO, 'espera')]
+    assert eventos == [(TIPO_COMANDO, True, 4), ('espera', None, None), (TIPO_COMANDO, False, 6)]
+    assert maquina.disparos == {2: 1, 3: 1, 4: 1, 6: 1}
+    # Cada regra verdadeira também gera um evento de disparo, antes do comando
+    assert [e['linha'] for e in maquina.historico if e['tipo'] == TIPO_DISPARO] == [2, 3, 4, 6]
+
+    # Execução por ciclos com regras de sensores diferentes sobre o mesmo dispositivo
+    ast = AnalisadorSintatico(iter_tokens("""INSERIR SENSOR "Umidade" ID 1
+INSERIR SENSOR "Temperatura" ID 2
+SE SENSOR 1 < 50 ENTAO LIGAR "Bomba"
+SE SENSOR 2 > 30 ENTAO DESLIGAR "Bomba"
+""")).analisar()
+    maquina = MaquinaVirtual(silencioso=True)
+    maquina.carregar(ast, simular=False)
+    maquina.executar_ciclo({1: 10, 2: 40})
+    assert maquina.decisoes_ciclo == maquina.comandos_ciclo == {"Bomba": False}
+    # A regra da linha 4 deixa de valer e a da linha 3 volta a decidir: há comando
+    maquina.executar_ciclo({2: 20})
+    assert maquina.comandos_ciclo == {"Bomba": True}
+    # Mesma decisão de antes: nenhum comando novo
+    maquina.executar_ciclo({1: 30})
+    assert maquina.decisoes_ciclo == {"Bomba": True} and maquina.comandos_ciclo == {}
+    comandos = [(e['ligado'], e['linha']) for e in maquina.historico if e['tipo'] == TIPO_COMANDO]
+    assert comandos == [(False, 4), (True, 3)]
+
 if __name__ == "__main__":
     print("🧪 Iniciando Testes do Sistema de Irrigação")
     print("=" * 50)
 
+    # Os arquivos gerados pelos testes ficam em um diretório temporário
+    temporario = tempfile.TemporaryDirectory()
+    os.chdir(temporario.name)
+
     testes = [
         test_programa_basico,
         test_multiplos_sensores,
         test_tratamento_erros,
         test_regras_complexas,
         test_arquivo,
-        test_logs_e_estado
+        test_logs_e_estado,
+        test_lexico_em_blocos,
+        test_lexico_caractere_invalido,
+        test_regras_compiladas,
+        test_tabela_verdade,
+        test_ciclos_por_alteracao,
+        test_execucao_reativa,
+        test_programas_async,
+        test_hospedeiro_programas,
+        test_cache_programas,
+        test_nos_compactos,
+        test_frontend_incremental,
+        test_regras_conflitantes,
+        test_verificacao_em_lote,
+        test_semantica_incremental,
+        test_otimizador,
+        test_agrupamento_regras,
+        test_gravador_log,
+        test_log_jsonl_indexado,
+        test_diario_estado,
+        test_historico_sqlite,
+        test_series_temporais,
+        test_eventos_compactos,
+        test_reproducao_leituras,
+        test_avaliacao_vetorizada,
+        test_camada_atuadores,
+        test_decisoes_por_ciclo
     ]
 
     for teste in testes:
@@ -110,13 +1362,7 @@ if __name__ == "__main__":
     
     # Limpar arquivos temporários após os testes
     print("\n🧹 Limpando arquivos temporários...")
-    arquivos_temp = ["sistema_irrigacao.log", "estado_sistema.json"]
-    for arquivo in arquivos_temp:
-        if os.path.exists(arquivo):
-            try:
-                os.remove(arquivo)
-                print(f"✅ Arquivo {arquivo} removido")
-            except Exception as e:
-                print(f"❌ Erro ao remover {arquivo}: {e}")
+    os.chdir(DIRETORIO_TESTES)
+    temporario.cleanup()
     
     print("\n🏁 Finalizado!") 
\ No newline at end of file
@@ -1,7 +1,8 @@
-from dataclasses import dataclass
+from typing import NamedTuple
 
-@dataclass
-class Token:
+class Token(NamedTuple):
+    # NamedTuple em vez de @dataclass: sem __dict__ por token
     tipo: str
     valor: str
-    linha: int 
\ No newline at end of file
+    linha: int
+    coluna: int = 0
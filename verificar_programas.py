@@ -0,0 +1,150 @@
+"""
+Validação em lote de programas da DSL, sem executá-los.
+
+Uso:
+    python verificar_programas.py check programas/ outro.txt --processos 8 --saida relatorio.json
+
+Cada arquivo passa pelas análises léxica, sintática e semântica em um pool de
+processos. Os resultados são mostrados à medida que ficam prontos e, ao final,
+é gerado um relatório JSON com os erros e os tempos de cada arquivo.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from irrigation_dsl import AnalisadorSintatico, iter_tokens
+from semantic_analyzer import AnalisadorSemantico
+
+PADRAO_PROGRAMAS = '*.txt'
+
+
+def listar_programas(caminhos: Iterable[str], padrao: str = PADRAO_PROGRAMAS) -> List[str]:
+    """Expande diretórios (recursivamente, pelo padrão) e mantém arquivos informados diretamente"""
+    arquivos = []
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            arquivos.extend(sorted(glob.glob(os.path.join(caminho, '**', padrao), recursive=True)))
+        else:
+            arquivos.append(caminho)
+    return arquivos
+
+
+def verificar_arquivo(caminho: str) -> Dict:
+    """
+    Analisa um arquivo sem executá-lo. O texto é lido em blocos pelo léxico;
+    erros léxicos, sintáticos e de leitura são registrados no resultado em vez
+    de interromper o lote.
+    """
+    inicio = time.perf_counter()
+    resultado = {
+        'arquivo': caminho,
+        'sucesso': False,
+        'erro_sintatico': None,
+        'erros': [],
+        'tempos': {},
+    }
+    try:
+        with open(caminho, 'r', encoding='utf-8') as arquivo:
+            ast = AnalisadorSintatico(iter_tokens(arquivo)).analisar()
+        meio = time.perf_counter()
+        sucesso, erros = AnalisadorSemantico().analisar(ast)
+        fim = time.perf_counter()
+        resultado['sucesso'] = sucesso
+        resultado['erros'] = [asdict(erro) for erro in erros]
+        resultado['tempos'] = {'sintatico': meio - inicio, 'semantico': fim - meio}
+    except (SyntaxError, OSError, UnicodeDecodeError) as e:
+        resultado['erro_sintatico'] = f"{type(e).__name__}: {e}"
+    resultado['tempos']['total'] = time.perf_counter() - inicio
+    return resultado
+
+
+def verificar_programas(arquivos: List[str], processos: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Verifica os arquivos em um pool de processos, devolvendo cada resultado
+    assim que fica pronto (fora da ordem de entrada). Com processos=1 tudo
+    roda no processo atual.
+    """
+    if processos == 1:
+        for caminho in arquivos:
+            yield verificar_arquivo(caminho)
+        return
+
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        futuros = [executor.submit(verificar_arquivo, caminho) for caminho in arquivos]
+        for futuro in as_completed(futuros):
+            yield futuro.result()
+
+
+def gerar_relatorio(resultados: List[Dict], tempo_total: float) -> Dict:
+    """Relatório agregado, com os resultados ordenados pelo nome do arquivo"""
+    resultados = sorted(resultados, key=lambda r: r['arquivo'])
+    validos = sum(1 for r in resultados if r['sucesso'])
+    return {
+        'arquivos': len(resultados),
+        'validos': validos,
+        'invalidos': len(resultados) - validos,
+        'tempo_total': tempo_total,
+        'resultados': resultados,
+    }
+
+
+def check(caminhos: List[str], processos: Optional[int] = None, padrao: str = PADRAO_PROGRAMAS,
+          ao_concluir: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """Valida todos os programas encontrados e retorna o relatório agregado"""
+    inicio = time.perf_counter()
+    resultados = []
+    for resultado in verificar_programas(listar_programas(caminhos, padrao), processos):
+        resultados.append(resultado)
+        if ao_concluir:
+            ao_concluir(resultado)
+    return gerar_relatorio(resultados, time.perf_counter() - inicio)
+
+
+def mostrar_resultado(resultado: Dict):
+    """Imprime uma linha por arquivo concluído (em stderr, para não misturar com o JSON)"""
+    tempo_ms = resultado['tempos']['total'] * 1000
+    if resultado['sucesso']:
+        print(f"✅ {resultado['arquivo']} ({tempo_ms:.1f} ms)", file=sys.stderr)
+    elif resultado['erro_sintatico']:
+        print(f"❌ {resultado['arquivo']}: {resultado['erro_sintatico']}", file=sys.stderr)
+    else:
+        print(f"❌ {resultado['arquivo']}: {len(resultado['erros'])} erro(s) semântico(s)", file=sys.stderr)
+        for erro in resultado['erros']:
+            print(f"  - Linha {erro['linha']}: {erro['mensagem']} ({erro['tipo']})", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ferramentas de linha de comando da DSL de irrigação")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    parser_check = comandos.add_parser('check', help="valida programas sem executá-los")
+    parser_check.add_argument('caminhos', nargs='+', help="arquivos ou diretórios de programas")
+    parser_check.add_argument('--processos', type=int, default=None,
+                              help="número de processos (padrão: número de CPUs)")
+    parser_check.add_argument('--padrao', default=PADRAO_PROGRAMAS,
+                              help=f"padrão dos arquivos nos diretórios (padrão: {PADRAO_PROGRAMAS})")
+    parser_check.add_argument('--saida', help="arquivo do relatório JSON (padrão: saída padrão)")
+    parser_check.add_argument('--silencioso', action='store_true', help="não mostra o progresso")
+
+    args = parser.parse_args(argv)
+    relatorio = check(args.caminhos, args.processos, args.padrao,
+                      None if args.silencioso else mostrar_resultado)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(relatorio, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+
+    return 0 if relatorio['invalidos'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())